@@ -5,31 +5,74 @@ import numpy as np
 import os
 from datetime import datetime
 
+from ModelRegistry import model_registry, STATE_FAILED
+from TiledExecutor import tiled_executor
+from FrameContext import FrameContext
+
+# Modelli del ModelRegistry usati da ciascuna modalità
+MODE_MODELS = {
+    "Rilevamento Volti": ("volti",),
+    "Sfocatura Sfondo": ("volti",),
+    "Rilevamento Oggetti (YOLO)": ("yolo",),
+}
+
+MODELS_DIR = os.path.join(os.path.dirname(__file__), 'models')
+YOLO_DIR = os.path.join(os.path.dirname(__file__), 'yolo')
+
+
+def load_face_cascade():
+    """Carica il classificatore Haar Cascade per il rilevamento dei volti"""
+    face_cascade = cv2.CascadeClassifier(os.path.join(MODELS_DIR, 'haarcascade_frontalface_default.xml'))
+    if face_cascade.empty():
+        raise RuntimeError("haarcascade_frontalface_default.xml non trovato in 'models/'")
+    return face_cascade
+
+
+def warm_up_face_cascade(face_cascade):
+    face_cascade.detectMultiScale(np.zeros((240, 320), dtype=np.uint8))
+
+
+def load_yolo():
+    """Carica YOLOv4-tiny: restituisce (rete, layer di uscita, classi)"""
+    weights_path = os.path.join(YOLO_DIR, 'yolov4-tiny.weights')
+    config_path = os.path.join(YOLO_DIR, 'yolov4-tiny.cfg')
+    names_path = os.path.join(YOLO_DIR, 'coco.names')
+
+    yolo_net = cv2.dnn.readNet(weights_path, config_path)
+    with open(names_path, 'r') as f:
+        classes = [line.strip() for line in f.readlines()]
+
+    layer_names = yolo_net.getLayerNames()
+    output_layers = [layer_names[i - 1] for i in yolo_net.getUnconnectedOutLayers()]
+    return yolo_net, output_layers, classes
+
+
+def warm_up_yolo(model):
+    # Il primo forward alloca i buffer della rete: lo si paga qui, non sul primo frame
+    yolo_net, output_layers, _ = model
+    yolo_net.setInput(np.zeros((1, 3, 416, 416), dtype=np.float32))
+    yolo_net.forward(output_layers)
+
+
 class CVProcessor:
-    def __init__(self):
-        # Carica il classificatore Haar Cascade per il rilevamento dei volti
-        face_cascade_path = os.path.join(os.path.dirname(__file__), 'models', 'haarcascade_frontalface_default.xml')
-        self.face_cascade = cv2.CascadeClassifier(face_cascade_path)
-
-        # Inizializzazione di YOLO
-        self.yolo_net = None
-        self.classes = []
-        try:
-            yolo_dir = os.path.join(os.path.dirname(__file__), 'yolo')
-            weights_path = os.path.join(yolo_dir, 'yolov4-tiny.weights')
-            config_path = os.path.join(yolo_dir, 'yolov4-tiny.cfg')
-            names_path = os.path.join(yolo_dir, 'coco.names')
-
-            self.yolo_net = cv2.dnn.readNet(weights_path, config_path)
-            with open(names_path, 'r') as f:
-                self.classes = [line.strip() for line in f.readlines()]
-
-            layer_names = self.yolo_net.getLayerNames()
-            self.yolo_output_layers = [layer_names[i - 1] for i in self.yolo_net.getUnconnectedOutLayers()]
-            print("Modello YOLO caricato con successo.")
-        except Exception as e:
-            print(f"Errore nel caricare il modello YOLO: {e}")
-            print("Assicurati che i file del modello siano nella cartella 'yolo/'.")
+    def __init__(self, registry=None):
+        """
+        I modelli (Haar Cascade, YOLO) stanno nel ModelRegistry condiviso:
+        vengono caricati in background al primo frame della modalità che li
+        usa, e fino ad allora la modalità mostra lo stato di caricamento.
+        """
+        self.registry = registry or model_registry
+        self.registry.register("volti", load_face_cascade, warm_up_face_cascade)
+        self.registry.register("yolo", load_yolo, warm_up_yolo)
+
+    def draw_model_state(self, frame, name):
+        """Disegna lo stato di un modello non ancora disponibile"""
+        if self.registry.state(name) == STATE_FAILED:
+            text, color = f"Modello {name.upper()} non disponibile", (0, 0, 255)
+        else:
+            text, color = "Caricamento modello...", (0, 255, 255)
+        cv2.putText(frame, text, (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
+        return frame
     
     def draw_osd(self, frame, mode, resolution, fps, show_osd=True):
         if not show_osd or frame is None:
@@ -62,17 +105,18 @@ class CVProcessor:
         
         return osd_frame
 
-    def detect_objects_yolo(self, frame):
-        if self.yolo_net is None:
-            cv2.putText(frame, "Modello YOLO non disponibile", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-            return frame
-
+    def detect_objects_yolo(self, frame, context=None):
+        context = context or FrameContext(frame)
         frame = frame.copy()
         height, width, channels = frame.shape
 
-        blob = cv2.dnn.blobFromImage(frame, 0.00392, (416, 416), (0, 0, 0), True, crop=False)
-        self.yolo_net.setInput(blob)
-        outputs = self.yolo_net.forward(self.yolo_output_layers)
+        blob = context.blob(0.00392, (416, 416), True)
+        with self.registry.use("yolo") as model:
+            if model is None:
+                return self.draw_model_state(frame, "yolo")
+            yolo_net, output_layers, classes = model
+            yolo_net.setInput(blob)
+            outputs = yolo_net.forward(output_layers)
 
         boxes = []
         confidences = []
@@ -99,12 +143,12 @@ class CVProcessor:
         indexes = cv2.dnn.NMSBoxes(boxes, confidences, 0.5, 0.4)
 
         font = cv2.FONT_HERSHEY_PLAIN
-        colors = np.random.uniform(0, 255, size=(len(self.classes), 3))
+        colors = np.random.uniform(0, 255, size=(len(classes), 3))
 
         for i in range(len(boxes)):
             if i in indexes:
                 x, y, w, h = boxes[i]
-                label = str(self.classes[class_ids[i]])
+                label = str(classes[class_ids[i]])
                 confidence = confidences[i]
                 color = colors[class_ids[i]]
                 
@@ -113,18 +157,30 @@ class CVProcessor:
         
         return frame
 
-    def process_frame(self, frame, mode, performance_scale=0.5, show_osd=True, resolution=(1280, 720), fps=30, mirror=False, **kwargs):
+    def process_frame(self, frame, mode, performance_scale=0.5, show_osd=True, resolution=(1280, 720), fps=30, mirror=False, context=None, **kwargs):
+        """
+        context è il FrameContext del frame, se chi chiama lo condivide con
+        altre analisi; altrimenti ne viene creato uno e rilasciato alla fine.
+        """
         if frame is None:
             return None
+        if context is None:
+            context = FrameContext(frame)
+            try:
+                return self.process_frame(frame, mode, performance_scale, show_osd, resolution, fps,
+                                          mirror, context, **kwargs)
+            finally:
+                context.release()
             
         original_h, original_w = frame.shape[:2]
-        small_frame = cv2.resize(frame, (0,0), fx=performance_scale, fy=performance_scale)
-        processed_small_frame = small_frame.copy()
+        small_context = context.scaled(performance_scale)
+        # Le fasi disegnano sulla copia: il frame del contesto resta intatto
+        processed_small_frame = small_context.frame.copy()
         
         if mode == "Rilevamento Volti":
-            processed_small_frame = self.detect_faces(processed_small_frame)
+            processed_small_frame = self.detect_faces(processed_small_frame, small_context)
         elif mode == "Rilevamento Contorni":
-            processed_small_frame = self.detect_edges(processed_small_frame)
+            processed_small_frame = self.detect_edges(processed_small_frame, small_context)
         elif mode == "Segmentazione per Colore":
             hue_min = kwargs.get('hue_min', 0)
             hue_max = kwargs.get('hue_max', 179)
@@ -132,13 +188,13 @@ class CVProcessor:
             sat_max = kwargs.get('sat_max', 255)
             val_min = kwargs.get('val_min', 0)
             val_max = kwargs.get('val_max', 255)
-            processed_small_frame = self.segment_by_color(processed_small_frame, hue_min, hue_max, sat_min, sat_max, val_min, val_max)
+            processed_small_frame = self.segment_by_color(processed_small_frame, hue_min, hue_max, sat_min, sat_max, val_min, val_max, small_context)
         elif mode == "Rilevamento Movimento":
-            processed_small_frame = self.detect_motion(processed_small_frame)
+            processed_small_frame = self.detect_motion(processed_small_frame, small_context)
         elif mode == "Sfocatura Sfondo":
-            processed_small_frame = self.background_blur(processed_small_frame)
+            processed_small_frame = self.background_blur(processed_small_frame, small_context)
         elif mode == "Rilevamento Oggetti (YOLO)":
-            processed_frame = self.detect_objects_yolo(frame)
+            processed_frame = self.detect_objects_yolo(frame, context)
             if show_osd:
                 processed_frame = self.draw_osd(processed_frame, mode, resolution, fps, show_osd)
             if mirror:
@@ -155,31 +211,35 @@ class CVProcessor:
         
         return result
 
-    def detect_faces(self, frame):
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
+    def detect_faces(self, frame, context=None):
+        gray = (context or FrameContext(frame)).gray()
+        with self.registry.use("volti") as face_cascade:
+            if face_cascade is None:
+                return self.draw_model_state(frame, "volti")
+            faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
         for (x, y, w, h) in faces:
             cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 255), 2)
             cv2.circle(frame, (x + w//2, y + h//2), 2, (0, 0, 255), 3)
         return frame
         
-    def detect_edges(self, frame):
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    def detect_edges(self, frame, context=None):
+        gray = (context or FrameContext(frame)).gray()
         edges = cv2.Canny(gray, 100, 200)
         edges_bgr = cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR)
         return edges_bgr
         
-    def segment_by_color(self, frame, hue_min, hue_max, sat_min, sat_max, val_min, val_max):
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    def segment_by_color(self, frame, hue_min, hue_max, sat_min, sat_max, val_min, val_max, context=None):
+        hsv = (context or FrameContext(frame)).hsv()
         lower = np.array([hue_min, sat_min, val_min])
         upper = np.array([hue_max, sat_max, val_max])
-        mask = cv2.inRange(hsv, lower, upper)
-        result = cv2.bitwise_and(frame, frame, mask=mask)
+        mask = tiled_executor.run(lambda src, dst: cv2.inRange(src, lower, upper, dst=dst), hsv, channels=1)
+        # Con dst fornito, bitwise_and non tocca i pixel fuori maschera: si parte da zero
+        result = np.zeros_like(frame)
+        cv2.bitwise_and(frame, frame, dst=result, mask=mask)
         return result
         
-    def detect_motion(self, frame):
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        gray = cv2.GaussianBlur(gray, (21, 21), 0)
+    def detect_motion(self, frame, context=None):
+        gray = (context or FrameContext(frame)).blurred(21, gray=True)
         if not hasattr(self, 'prev_gray') or self.prev_gray is None:
             self.prev_gray = gray.copy()
             return frame
@@ -196,16 +256,20 @@ class CVProcessor:
         self.prev_gray = gray.copy()
         return result
         
-    def background_blur(self, frame):
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(
-            gray, scaleFactor=1.1, minNeighbors=4, minSize=(20, 20)
-        )
+    def background_blur(self, frame, context=None):
+        context = context or FrameContext(frame)
+        gray = context.gray()
+        with self.registry.use("volti") as face_cascade:
+            if face_cascade is None:
+                return self.draw_model_state(frame, "volti")
+            faces = face_cascade.detectMultiScale(
+                gray, scaleFactor=1.1, minNeighbors=4, minSize=(20, 20)
+            )
         if len(faces) == 0:
-            return cv2.GaussianBlur(frame, (15, 15), 0)
+            return context.blurred(15).copy()
         mask = np.zeros(frame.shape[:2], dtype=np.uint8)
         for (x, y, w, h) in faces:
             cv2.rectangle(mask, (x, y), (x+w, y+h), 255, -1)
-        blurred = cv2.GaussianBlur(frame, (51, 51), 0)
+        blurred = context.blurred(51)
         result = np.where(mask[..., None] == 255, frame, blurred)
         return result
\ No newline at end of file
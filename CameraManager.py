@@ -1,10 +1,11 @@
 import os
+import threading
 import cv2
 import numpy as np
-from PyQt6.QtCore import QObject
-from DeviceManager import DeviceType
+from DeviceType import DeviceType
+from TiledExecutor import tiled_executor
 
-class CameraManager(QObject):
+class CameraManager:
     """
     Gestisce la cattura video da diversi dispositivi:
     - PC: usa OpenCV con webcam USB
@@ -13,7 +14,6 @@ class CameraManager(QObject):
     """
     
     def __init__(self, device_type=DeviceType.PC):
-        super().__init__()
         self.device_type = device_type
         self.picam2 = None
         self.config = None
@@ -25,6 +25,7 @@ class CameraManager(QObject):
         self.output = None
         self.cap = None
         self.camera_index = 0  # Per PC e Jetson: indice della webcam
+        self.band_scratch = threading.local()  # Buffer HSV riutilizzati, uno per thread e forma di banda
 
     def set_camera_index(self, index):
         """Imposta l'indice della fotocamera per PC/Jetson"""
@@ -258,22 +259,40 @@ class CameraManager(QObject):
 
     def apply_controls(self, frame, brightness, contrast, saturation):
         """Applica controlli di luminosità, contrasto e saturazione"""
-        if brightness != 0:
-            frame = cv2.convertScaleAbs(frame, alpha=1, beta=brightness)
+        if brightness == 0 and contrast == 0 and saturation == 0:
+            return frame
         
-        if contrast != 0:
-            alpha = 1.0 + contrast / 100.0
-            frame = cv2.convertScaleAbs(frame, alpha=alpha, beta=0)
-        
-        if saturation != 0:
-            hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-            h, s, v = cv2.split(hsv)
-            s = cv2.add(s, saturation)
-            s = np.clip(s, 0, 255)
-            hsv = cv2.merge([h, s, v])
-            frame = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+        # Operazioni per pixel: il frame viene diviso in bande elaborate in parallelo.
+        # Ogni passaggio scrive direttamente nella banda dell'uscita preallocata
+        def apply_band(src, dst):
+            band = src
+            if brightness != 0:
+                cv2.convertScaleAbs(band, dst=dst, alpha=1, beta=brightness)
+                band = dst
+            
+            if contrast != 0:
+                alpha = 1.0 + contrast / 100.0
+                cv2.convertScaleAbs(band, dst=dst, alpha=alpha, beta=0)
+                band = dst
+            
+            if saturation != 0:
+                hsv = self.hsv_scratch(band.shape)
+                cv2.cvtColor(band, cv2.COLOR_BGR2HSV, dst=hsv)
+                # Somma saturata sul solo canale S (come add + clip sul canale separato)
+                cv2.add(hsv, (0, saturation, 0, 0), dst=hsv)
+                cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR, dst=dst)
         
-        return frame
+        return tiled_executor.run(apply_band, frame)
+
+    def hsv_scratch(self, shape):
+        """Buffer HSV della banda, riutilizzato tra un frame e l'altro dallo stesso thread"""
+        buffers = getattr(self.band_scratch, "buffers", None)
+        if buffers is None:
+            buffers = self.band_scratch.buffers = {}
+        buffer = buffers.get(shape)
+        if buffer is None:
+            buffer = buffers[shape] = np.empty(shape, dtype=np.uint8)
+        return buffer
 
     def get_resolution(self):
         """Restituisce la risoluzione impostata"""
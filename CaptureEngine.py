@@ -0,0 +1,327 @@
+# CaptureEngine.py
+
+import time
+import queue
+import threading
+
+from StartupProfiler import profiler
+from FramePipeline import FramePipeline
+from EventEmitter import EventEmitter
+
+
+class CaptureEngine(EventEmitter):
+    """
+    Motore di cattura ed elaborazione, senza Qt: cattura dalla fotocamera,
+    regolazioni, CVProcessor e consegna dei frame elaborati, in un thread
+    proprio (o a pipeline). La GUI (CameraThread) e la modalità headless
+    sono due client dello stesso motore.
+
+    Eventi (EventEmitter, chiamati dal thread del motore):
+    - "frame" (frame BGR elaborato, timestamp di cattura)
+    - "raw_frame" (frame BGR grezzo, timestamp), solo con set_emit_raw(True)
+    - "status" (messaggio)
+    - "pipeline_stats" (utilizzo delle fasi, ogni 2 secondi)
+
+    In alternativa alle callback, subscribe() restituisce una coda con gli
+    ultimi frame elaborati: se il consumatore è lento si tiene il più recente.
+    """
+
+    def __init__(self, camera_manager, cv_processor):
+        super().__init__()
+        self.camera_manager = camera_manager
+        self.cv_processor = cv_processor
+        self.running = False
+        self.thread = None
+        self.mode = "Normale"
+        self.brightness = 0
+        self.contrast = 0
+        self.saturation = 0
+        self.hue_min = 0
+        self.hue_max = 179
+        self.sat_min = 0
+        self.sat_max = 255
+        self.val_min = 0
+        self.val_max = 255
+        self.mirror = False
+        self.performance_scale = 0.5
+        self.show_osd = True
+        self.preroll_buffer = None
+        self.emit_raw = False
+        self.frame_dump = None
+        self.capture_interval = 0.0  # 0 = piena velocità della fotocamera
+        self.wake_event = threading.Event()
+        self.burst_callback = None
+        self.burst_remaining = 0
+        self.process_pool = None
+        self.pipelined = False
+        self.pipeline = None
+        self.next_capture = 0.0
+        self.last_stats = 0.0
+        self.power_policy = None
+        self.failure_backoff = 0.0       # Attesa dopo un frame mancato (cresce fino a 1 s)
+        self.failure_reported = False
+        self.subscribers = []
+        self.subscribers_lock = threading.Lock()
+
+    def start(self):
+        """Avvia il motore in un thread proprio"""
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="capture-engine", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        """Ciclo del motore (nel thread chiamante): termina con stop()"""
+        self.running = True
+
+        # Si apre subito la camera configurata: la ricerca delle camere
+        # disponibili (fino a dieci aperture) serve solo a spiegare un errore
+        success = self.camera_manager.start()
+
+        if not success:
+            if not self.camera_manager.list_available_cameras():
+                self.emit("status", "ERRORE: Nessuna camera disponibile!")
+            else:
+                self.emit("status", "ERRORE: Camera non inizializzata")
+            self.running = False
+            return
+
+        profiler.mark("fotocamera aperta")
+        self.emit("status", "Camera avviata")
+
+        self.next_capture = time.monotonic()
+        if self.pipelined:
+            # Cattura, regolazioni, analisi e uscita in thread separati
+            self.pipeline = FramePipeline([
+                ("regolazioni", self.adjust),
+                ("analisi", self.analyse),
+                ("uscita", self.publish_all),
+            ])
+            self.pipeline.start()
+            self.pipeline.run(self.capture, lambda: self.running)
+            self.pipeline = None
+            return
+
+        while self.running:
+            item = self.capture()
+            if item is not None:
+                self.publish_all(self.analyse(self.adjust(item)))
+
+    def capture(self):
+        """Fase di cattura: restituisce (frame, timestamp) o None se non c'è un frame"""
+        # Cadenza ridotta (tra gli scatti del time-lapse, in risparmio energetico): attesa interrompibile
+        interval = self.capture_interval
+        if self.power_policy is not None:
+            interval = max(interval, self.power_policy.capture_interval())
+        if interval > 0:
+            delay = self.next_capture - time.monotonic()
+            if delay > 0:
+                start = time.perf_counter()
+                if self.wake_event.wait(delay):
+                    self.wake_event.clear()
+                self.waited(start)
+            self.next_capture = max(self.next_capture + interval, time.monotonic())
+
+        if self.pipeline is not None and time.monotonic() - self.last_stats >= 2.0:
+            self.last_stats = time.monotonic()
+            self.emit("pipeline_stats", self.pipeline.get_stats())
+
+        # L'attesa del frame dalla fotocamera non è lavoro della fase di cattura
+        start = time.perf_counter()
+        frame = self.camera_manager.get_frame()
+        self.waited(start)
+        if frame is None:
+            self.wait_after_failure()
+            return None
+        if self.failure_reported:
+            self.emit("status", "Camera ripristinata")
+        self.failure_backoff = 0.0
+        self.failure_reported = False
+
+        if self.power_policy is not None:
+            self.power_policy.observe(frame)
+
+        # Istante di cattura: accompagna il frame fino alla registrazione
+        timestamp = time.monotonic()
+
+        # Dump grezzo per analisi: copia diretta nel file mappato in memoria
+        if self.frame_dump is not None:
+            self.frame_dump.append(frame, timestamp)
+
+        # Scatto a raffica: consegna i prossimi N frame catturati
+        if self.burst_remaining > 0:
+            self.burst_remaining -= 1
+            self.burst_callback(frame, timestamp)
+
+        # 0. Stream grezzo: esce prima di qualsiasi elaborazione
+        if self.emit_raw:
+            self.emit("raw_frame", frame, timestamp)
+        return frame, timestamp
+
+    def wait_after_failure(self):
+        """Attesa crescente (10 ms → 1 s) quando la camera non restituisce frame, invece di girare a vuoto"""
+        self.failure_backoff = min(max(self.failure_backoff * 2, 0.01), 1.0)
+        if self.failure_backoff >= 1.0 and not self.failure_reported:
+            self.failure_reported = True
+            self.emit("status", "ERRORE: Nessun frame dalla camera, nuovo tentativo in corso")
+        start = time.perf_counter()
+        if self.wake_event.wait(self.failure_backoff):
+            self.wake_event.clear()
+        self.waited(start)
+
+    def waited(self, start):
+        """Segnala alla pipeline un'attesa iniziata a start (perf_counter), esclusa dal tempo occupato"""
+        if self.pipeline is not None:
+            self.pipeline.source_waited(time.perf_counter() - start)
+
+    def adjust(self, item):
+        """1. Applica i controlli di base (luminosità, etc.)"""
+        frame, timestamp = item
+        frame = self.camera_manager.apply_controls(
+            frame, self.brightness, self.contrast, self.saturation
+        )
+        return frame, timestamp
+
+    def analyse(self, item):
+        """2. Elabora il frame; restituisce i frame elaborati pronti come [(frame, timestamp)]"""
+        frame, timestamp = item
+        if self.power_policy is not None and not self.power_policy.should_analyse():
+            return []
+        # PROCESSA IL FRAME: questo è il passaggio chiave.
+        # Il CVProcessor applica TUTTO: effetti, YOLO, OSD, specchiatura.
+        # Restituisce un frame BGR finale e completo.
+        params = dict(
+            performance_scale=self.performance_scale,
+            show_osd=self.show_osd,
+            resolution=self.camera_manager.get_resolution(),
+            fps=self.camera_manager.get_fps(),
+            hue_min=self.hue_min, hue_max=self.hue_max,
+            sat_min=self.sat_min, sat_max=self.sat_max,
+            val_min=self.val_min, val_max=self.val_max,
+            mirror=self.mirror  # Passa lo stato della specchiatura
+        )
+        if self.process_pool is not None:
+            # Elaborazione nei processi del pool: i risultati tornano in
+            # ordine, qualche frame dopo; con il pool saturo il frame si scarta
+            self.process_pool.submit(frame, timestamp, self.mode, **params)
+            return [(processed_frame, result_timestamp)
+                    for result_timestamp, processed_frame in self.process_pool.collect()
+                    if processed_frame is not None]
+        return [(self.cv_processor.process_frame(frame, self.mode, **params), timestamp)]
+
+    def publish_all(self, results):
+        for processed_frame, timestamp in results:
+            self.publish(processed_frame, timestamp)
+
+    def publish(self, processed_frame, timestamp):
+        """3. Consegna un frame elaborato a pre-roll, iscritti e listener (registrazione, visualizzazione)"""
+        # Il pre-roll resta sempre attivo, anche senza registrazione
+        if self.preroll_buffer is not None:
+            self.preroll_buffer.add(processed_frame, timestamp)
+
+        with self.subscribers_lock:
+            subscribers = list(self.subscribers)
+        for frames in subscribers:
+            try:
+                frames.put_nowait((processed_frame, timestamp))
+            except queue.Full:
+                # Consumatore lento: si sostituisce il frame più vecchio
+                try:
+                    frames.get_nowait()
+                except queue.Empty:
+                    pass
+                try:
+                    frames.put_nowait((processed_frame, timestamp))
+                except queue.Full:
+                    pass
+
+        self.emit("frame", processed_frame, timestamp)
+
+    def subscribe(self, maxsize=1):
+        """Coda (frame BGR, timestamp) dei frame elaborati; con maxsize=1 solo l'ultimo"""
+        frames = queue.Queue(maxsize=maxsize)
+        with self.subscribers_lock:
+            self.subscribers.append(frames)
+        return frames
+
+    def unsubscribe(self, frames):
+        with self.subscribers_lock:
+            if frames in self.subscribers:
+                self.subscribers.remove(frames)
+
+    def stop(self):
+        self.running = False
+        self.wake_event.set()
+        self.camera_manager.stop()
+        self.wait()
+
+    def wait(self, timeout=None):
+        """Attende la fine del thread del motore"""
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def set_mode(self, mode):
+        self.mode = mode
+
+    def set_brightness(self, value):
+        self.brightness = value
+
+    def set_contrast(self, value):
+        self.contrast = value
+
+    def set_saturation(self, value):
+        self.saturation = value
+
+    def set_hsv_values(self, hue_min, hue_max, sat_min, sat_max, val_min, val_max):
+        self.hue_min = hue_min
+        self.hue_max = hue_max
+        self.sat_min = sat_min
+        self.sat_max = sat_max
+        self.val_min = val_min
+        self.val_max = val_max
+
+    def set_mirror(self, mirror):
+        self.mirror = mirror
+
+    def set_show_osd(self, show_osd):
+        self.show_osd = show_osd
+
+    def set_emit_raw(self, emit_raw):
+        """Abilita l'emissione dei frame grezzi (registrazione dual-stream)"""
+        self.emit_raw = emit_raw
+
+    def set_capture_interval(self, interval):
+        """Imposta l'intervallo minimo tra due catture (0 = piena velocità, ripresa immediata)"""
+        self.capture_interval = interval
+        self.wake_event.set()
+
+    def set_frame_dump(self, frame_dump):
+        """Imposta (o rimuove con None) il FrameDumpWriter che riceve i frame grezzi"""
+        self.frame_dump = frame_dump
+
+    def request_burst(self, count, callback):
+        """
+        Richiede i prossimi count frame catturati, alla piena velocità di cattura.
+        callback(frame, timestamp) viene chiamata dal thread della fotocamera.
+        """
+        self.burst_callback = callback
+        self.burst_remaining = count
+
+    def set_preroll_buffer(self, preroll_buffer):
+        self.preroll_buffer = preroll_buffer
+
+    def set_pipelined(self, pipelined):
+        """Cattura, regolazioni, analisi e uscita in thread separati (da impostare prima di start)"""
+        self.pipelined = pipelined
+
+    def set_power_policy(self, power_policy):
+        """Imposta (o rimuove con None) la PowerPolicy; il ritorno all'attività interrompe l'attesa"""
+        self.power_policy = power_policy
+        if power_policy is not None:
+            power_policy.on_wake = self.wake_event.set
+
+    def set_process_pool(self, process_pool):
+        """Imposta (o rimuove con None) il FrameProcessPool che elabora i frame in altri processi"""
+        self.process_pool = process_pool
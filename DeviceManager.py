@@ -1,13 +1,9 @@
-from enum import Enum
 from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QGroupBox
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont
 
-class DeviceType(Enum):
-    """Enum per i tipi di dispositivo supportati"""
-    PC = "pc"
-    JETSON_NANO = "jetson_nano"
-    RASPBERRY_PI = "raspberry_pi"
+# DeviceType non dipende da Qt (serve anche in modalità headless): resta importabile da qui
+from DeviceType import DeviceType
 
 class DeviceSelectionDialog(QDialog):
     """Dialog per la selezione del dispositivo all'avvio dell'applicazione"""
@@ -0,0 +1,7 @@
+from enum import Enum
+
+class DeviceType(Enum):
+    """Enum per i tipi di dispositivo supportati"""
+    PC = "pc"
+    JETSON_NANO = "jetson_nano"
+    RASPBERRY_PI = "raspberry_pi"
@@ -0,0 +1,354 @@
+# EncoderBackend.py
+
+import os
+import shutil
+import threading
+import subprocess
+import collections
+from fractions import Fraction
+import cv2
+import numpy as np
+
+
+class EncoderBackend:
+    """
+    Interfaccia comune per gli encoder video usati da RecordingThread.
+    Ogni backend riceve frame BGR e li scrive nel file di destinazione.
+    I backend con supports_timestamps = True scrivono ogni frame con il suo
+    timestamp di cattura (video a frame rate variabile); gli altri producono
+    un video a FPS costanti.
+    """
+
+    name = "base"
+    supports_timestamps = False
+
+    def __init__(self):
+        self.path = None
+        self.width = 0
+        self.height = 0
+        self.fps = 0
+
+    def open(self, path, width, height, fps):
+        """Apre il file di destinazione. Restituisce True se l'encoder è pronto"""
+        raise NotImplementedError
+
+    def write(self, frame, timestamp=None):
+        """Scrive un frame BGR nel file (timestamp in secondi, time.monotonic)"""
+        raise NotImplementedError
+
+    def release(self):
+        """Chiude il file e libera le risorse dell'encoder"""
+        raise NotImplementedError
+
+    def is_opened(self):
+        raise NotImplementedError
+
+    def _prepare_frame(self, frame):
+        """Adatta il frame alla risoluzione con cui è stato aperto l'encoder"""
+        h, w = frame.shape[:2]
+        if (w, h) != (self.width, self.height):
+            frame = cv2.resize(frame, (self.width, self.height))
+        return frame
+
+
+class OpenCVEncoder(EncoderBackend):
+    """Encoder basato su cv2.VideoWriter (comportamento storico, FOURCC mp4v)"""
+
+    name = "opencv"
+
+    def __init__(self, fourcc="mp4v"):
+        super().__init__()
+        self.fourcc = fourcc
+        self.video_writer = None
+
+    def open(self, path, width, height, fps):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.video_writer = cv2.VideoWriter(
+            path,
+            cv2.VideoWriter_fourcc(*self.fourcc),
+            fps,
+            (width, height)
+        )
+        return self.video_writer.isOpened()
+
+    def write(self, frame, timestamp=None):
+        self.video_writer.write(self._prepare_frame(frame))
+
+    def release(self):
+        if self.video_writer:
+            self.video_writer.release()
+            self.video_writer = None
+
+    def is_opened(self):
+        return self.video_writer is not None and self.video_writer.isOpened()
+
+
+class FfmpegEncoder(EncoderBackend):
+    """
+    Encoder che avvia un processo ffmpeg locale e gli invia frame BGR grezzi
+    tramite pipe. Codec, preset, CRF e numero di thread sono configurabili.
+    """
+
+    name = "ffmpeg"
+
+    def __init__(self, codec="libx264", preset="veryfast", crf=23, threads=0,
+                 pix_fmt="yuv420p", ffmpeg_path=None):
+        super().__init__()
+        self.codec = codec
+        self.preset = preset
+        self.crf = crf
+        self.threads = threads
+        self.pix_fmt = pix_fmt
+        self.ffmpeg_path = ffmpeg_path or shutil.which("ffmpeg")
+        self.process = None
+        # Ultime righe di stderr: un thread le legge di continuo, altrimenti
+        # a pipe piena ffmpeg si blocca e con lui la scrittura dei frame
+        self.stderr_lines = collections.deque(maxlen=20)
+        self.stderr_thread = None
+
+    def build_command(self, path, width, height, fps):
+        """Costruisce la riga di comando di ffmpeg"""
+        cmd = [
+            self.ffmpeg_path, "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "rawvideo", "-pix_fmt", "bgr24",
+            "-s", f"{width}x{height}", "-r", str(fps),
+            "-i", "-",
+            "-an", "-c:v", self.codec,
+        ]
+        if self.preset is not None:
+            cmd += ["-preset", str(self.preset)]
+        if self.crf is not None:
+            cmd += ["-crf", str(self.crf)]
+        if self.threads is not None:
+            cmd += ["-threads", str(self.threads)]
+        cmd += ["-pix_fmt", self.pix_fmt, path]
+        return cmd
+
+    def open(self, path, width, height, fps):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        if not self.ffmpeg_path:
+            print("Errore: ffmpeg non trovato nel PATH")
+            return False
+        try:
+            self.process = subprocess.Popen(
+                self.build_command(path, width, height, fps),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE
+            )
+            self.stderr_lines.clear()
+            self.stderr_thread = threading.Thread(target=self._drain_stderr, args=(self.process.stderr,),
+                                                  daemon=True)
+            self.stderr_thread.start()
+            return True
+        except OSError as e:
+            print(f"Errore nell'avvio di ffmpeg: {e}")
+            self.process = None
+            return False
+
+    def _drain_stderr(self, stderr):
+        for line in iter(stderr.readline, b""):
+            self.stderr_lines.append(line.decode(errors="replace").rstrip())
+        stderr.close()
+
+    def stderr_text(self):
+        """Ultime righe di stderr, dopo la chiusura della pipe da parte di ffmpeg"""
+        if self.stderr_thread is not None:
+            self.stderr_thread.join(timeout=5)
+        return "\n".join(self.stderr_lines)
+
+    def write(self, frame, timestamp=None):
+        frame = np.ascontiguousarray(self._prepare_frame(frame))
+        try:
+            self.process.stdin.write(frame.data)
+        except (BrokenPipeError, ValueError):
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            raise Exception(f"ffmpeg terminato inaspettatamente: {self.stderr_text()}")
+
+    def release(self):
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        error = self.stderr_text()
+        if self.process.returncode != 0:
+            print(f"ffmpeg ha restituito il codice {self.process.returncode}: {error}")
+        self.process = None
+        self.stderr_thread = None
+
+    def is_opened(self):
+        return self.process is not None and self.process.poll() is None
+
+
+class PyAVEncoder(EncoderBackend):
+    """
+    Encoder basato su PyAV (libav in-process, dipendenza opzionale).
+    A differenza della pipe raw di ffmpeg può assegnare a ogni frame il suo
+    timestamp reale, producendo un MP4 a frame rate variabile.
+    """
+
+    name = "pyav"
+    supports_timestamps = True
+    TIME_BASE = Fraction(1, 1000)  # millisecondi
+
+    def __init__(self, codec="libx264", preset="veryfast", crf=23, threads=0,
+                 pix_fmt="yuv420p"):
+        super().__init__()
+        self.codec = codec
+        self.preset = preset
+        self.crf = crf
+        self.threads = threads
+        self.pix_fmt = pix_fmt
+        self.container = None
+        self.stream = None
+        self.start_time = None
+        self.last_pts = -1
+        self.frame_index = 0
+
+    def open(self, path, width, height, fps):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        try:
+            import av
+            self.av = av
+            self.container = av.open(path, mode="w")
+            self.stream = self.container.add_stream(self.codec, rate=int(round(fps)))
+            self.stream.width = width
+            self.stream.height = height
+            self.stream.pix_fmt = self.pix_fmt
+            self.stream.codec_context.time_base = self.TIME_BASE
+            options = {}
+            if self.preset is not None:
+                options["preset"] = str(self.preset)
+            if self.crf is not None:
+                options["crf"] = str(self.crf)
+            self.stream.options = options
+            if self.threads:
+                self.stream.codec_context.thread_count = self.threads
+            return True
+        except ImportError:
+            print("Errore: PyAV non è installato. Installa con: pip install av")
+            return False
+        except Exception as e:
+            print(f"Errore nell'apertura dell'encoder PyAV: {e}")
+            self.container = None
+            return False
+
+    def write(self, frame, timestamp=None):
+        video_frame = self.av.VideoFrame.from_ndarray(self._prepare_frame(frame), format="bgr24")
+        if timestamp is None:
+            pts = int(round(self.frame_index * 1000 / self.fps))
+        else:
+            if self.start_time is None:
+                self.start_time = timestamp
+            pts = int(round((timestamp - self.start_time) * 1000))
+        # I PTS devono essere strettamente crescenti
+        pts = max(pts, self.last_pts + 1)
+        video_frame.pts = pts
+        video_frame.time_base = self.TIME_BASE
+        self.last_pts = pts
+        self.frame_index += 1
+        for packet in self.stream.encode(video_frame):
+            self.container.mux(packet)
+
+    def release(self):
+        if self.container is None:
+            return
+        try:
+            for packet in self.stream.encode():
+                self.container.mux(packet)
+        finally:
+            self.container.close()
+            self.container = None
+            self.stream = None
+
+    def is_opened(self):
+        return self.container is not None
+
+
+ENCODER_BACKENDS = {
+    OpenCVEncoder.name: OpenCVEncoder,
+    FfmpegEncoder.name: FfmpegEncoder,
+    PyAVEncoder.name: PyAVEncoder,
+}
+
+# Profili di encoding per dispositivo: il Raspberry Pi lascia un core libero
+# per la cattura, il PC usa tutti i thread disponibili.
+ENCODER_PROFILES = {
+    "pc": {
+        "backend": "ffmpeg",
+        "options": {"codec": "libx264", "preset": "veryfast", "crf": 23, "threads": 0},
+    },
+    "jetson_nano": {
+        "backend": "ffmpeg",
+        "options": {"codec": "libx264", "preset": "ultrafast", "crf": 25, "threads": 3},
+    },
+    "raspberry_pi": {
+        "backend": "ffmpeg",
+        "options": {"codec": "libx264", "preset": "ultrafast", "crf": 26, "threads": 3},
+    },
+}
+
+
+def ffmpeg_available():
+    """Verifica se l'eseguibile ffmpeg è disponibile"""
+    return shutil.which("ffmpeg") is not None
+
+
+def pyav_available():
+    """Verifica se PyAV è installato"""
+    try:
+        import av  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def create_encoder(device_type, overrides=None):
+    """
+    Crea l'encoder previsto dal profilo del dispositivo.
+    overrides (es. da settings.json) può cambiare backend e opzioni:
+    {"backend": "pyav"} oppure {"options": {"crf": 20}}.
+    Se ffmpeg o PyAV non sono installati si ripiega su OpenCV.
+    """
+    key = getattr(device_type, "value", device_type)
+    profile = ENCODER_PROFILES.get(key, ENCODER_PROFILES["pc"])
+    overrides = overrides or {}
+
+    backend = overrides.get("backend", profile["backend"])
+    options = dict(profile["options"]) if backend == profile["backend"] else {}
+    options.update(overrides.get("options", {}))
+
+    if backend == FfmpegEncoder.name and not ffmpeg_available():
+        print("ffmpeg non disponibile, uso l'encoder OpenCV")
+        backend = OpenCVEncoder.name
+        options = {}
+    elif backend == PyAVEncoder.name and not pyav_available():
+        print("PyAV non disponibile, uso l'encoder OpenCV")
+        backend = OpenCVEncoder.name
+        options = {}
+
+    encoder_class = ENCODER_BACKENDS.get(backend)
+    if encoder_class is None:
+        print(f"Backend di encoding sconosciuto '{backend}', uso OpenCV")
+        encoder_class = OpenCVEncoder
+        options = {}
+    return encoder_class(**options)
@@ -0,0 +1,34 @@
+# EventEmitter.py
+
+import threading
+
+
+class EventEmitter:
+    """
+    Eventi per i componenti senza Qt (motore di cattura, registrazione):
+    connect(evento, callback) come un segnale Qt, ma le callback vengono
+    chiamate direttamente dal thread che emette l'evento. Chi ha bisogno
+    di un altro thread (es. la GUI) inoltra l'evento a un segnale Qt.
+    """
+
+    def __init__(self):
+        self.listeners = {}
+        self.listeners_lock = threading.Lock()
+
+    def connect(self, event, callback):
+        with self.listeners_lock:
+            self.listeners.setdefault(event, []).append(callback)
+
+    def disconnect(self, event, callback):
+        with self.listeners_lock:
+            if callback in self.listeners.get(event, []):
+                self.listeners[event].remove(callback)
+
+    def emit(self, event, *args):
+        with self.listeners_lock:
+            callbacks = list(self.listeners.get(event, ()))
+        for callback in callbacks:
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Errore nella gestione dell'evento {event}: {e}")
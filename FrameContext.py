@@ -0,0 +1,63 @@
+# FrameContext.py
+
+import cv2
+
+from TiledExecutor import tiled_executor
+
+
+class FrameContext:
+    """
+    Prodotti derivati di un frame (grigio, copie ridimensionate, HSV,
+    sfocature, blob per la DNN), calcolati al primo uso e poi riusati da
+    tutte le fasi che elaborano lo stesso frame. Ogni prodotto è
+    memorizzato con i parametri che lo hanno generato.
+
+    Il frame sorgente non deve essere modificato finché il contesto è in
+    uso: le fasi disegnano su una copia. release() libera i prodotti
+    quando l'elaborazione del frame è finita.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.products = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute):
+        """Restituisce il prodotto key, calcolandolo con compute() solo la prima volta"""
+        product = self.products.get(key)
+        if product is None:
+            self.misses += 1
+            product = self.products[key] = compute()
+        else:
+            self.hits += 1
+        return product
+
+    def release(self):
+        for product in self.products.values():
+            if isinstance(product, FrameContext):
+                product.release()
+        self.products.clear()
+        self.frame = None
+
+    def gray(self):
+        return self.get(("gray",), lambda: cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY))
+
+    def hsv(self):
+        return self.get(("hsv",), lambda: tiled_executor.run(
+            lambda src, dst: cv2.cvtColor(src, cv2.COLOR_BGR2HSV, dst=dst), self.frame))
+
+    def scaled(self, scale, interpolation=cv2.INTER_LINEAR):
+        """Contesto della copia ridimensionata di scale (con i propri prodotti derivati)"""
+        return self.get(("scaled", scale, interpolation), lambda: FrameContext(
+            cv2.resize(self.frame, (0, 0), fx=scale, fy=scale, interpolation=interpolation)))
+
+    def blurred(self, ksize, gray=False):
+        """GaussianBlur a bande del frame (o del grigio): l'alone di ksize // 2 righe lo rende identico"""
+        source = self.gray() if gray else self.frame
+        return self.get(("blurred", ksize, gray), lambda: tiled_executor.run(
+            lambda src, dst: cv2.GaussianBlur(src, (ksize, ksize), 0, dst=dst), source, halo=ksize // 2))
+
+    def blob(self, scale=0.00392, size=(416, 416), swap_rb=True):
+        return self.get(("blob", scale, size, swap_rb), lambda: cv2.dnn.blobFromImage(
+            self.frame, scale, size, (0, 0, 0), swap_rb, crop=False))
@@ -0,0 +1,189 @@
+# FrameDump.py
+
+import os
+import json
+import struct
+import mmap
+import threading
+import numpy as np
+
+# Formato del file .vpdump:
+#   [magic 8 byte][lunghezza header uint32][header JSON, riempito fino a HEADER_SIZE]
+#   [indice: capacity record da 16 byte (timestamp float64, numero frame int64)]
+#   [capacity slot di dimensione fissa, uno per frame]
+# Il file è preallocato: scrivere un frame è una copia in memoria, senza
+# allocazioni né encoding. Quando gli slot finiscono si riparte dal primo
+# (ring), e il numero di frame nell'indice permette di ricostruire l'ordine.
+
+MAGIC = b"VPDUMP01"
+HEADER_SIZE = 4096
+INDEX_RECORD = struct.Struct("<dq")
+EMPTY_SLOT = -1
+
+
+class FrameDumpWriter:
+    """Scrive frame grezzi in un file preallocato e mappato in memoria"""
+
+    def __init__(self, path, shape, dtype=np.uint8, capacity=300):
+        self.path = path
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.capacity = capacity
+        self.frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self.index_offset = HEADER_SIZE
+        self.data_offset = HEADER_SIZE + capacity * INDEX_RECORD.size
+        self.file = None
+        self.map = None
+        self.index = None
+        self.slots = None
+        self.frame_count = 0
+        self.lock = threading.Lock()  # append() dal thread di cattura, close() dalla GUI
+
+    def open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        total_size = self.data_offset + self.capacity * self.frame_bytes
+        self.file = open(self.path, "w+b")
+        self.file.truncate(total_size)
+        self.map = mmap.mmap(self.file.fileno(), total_size)
+
+        header = json.dumps({
+            "shape": list(self.shape),
+            "dtype": self.dtype.str,
+            "capacity": self.capacity,
+            "frame_bytes": self.frame_bytes,
+            "index_offset": self.index_offset,
+            "data_offset": self.data_offset,
+        }).encode("utf-8")
+        if len(MAGIC) + 4 + len(header) > HEADER_SIZE:
+            raise ValueError("Header del dump troppo grande")
+        self.map[:len(MAGIC)] = MAGIC
+        self.map[len(MAGIC):len(MAGIC) + 4] = struct.pack("<I", len(header))
+        self.map[len(MAGIC) + 4:len(MAGIC) + 4 + len(header)] = header
+
+        self.index = np.ndarray((self.capacity, 2), dtype=np.float64, buffer=self.map,
+                                offset=self.index_offset)
+        self.index.view(np.int64)[:, 1] = EMPTY_SLOT
+        self.slots = np.ndarray((self.capacity,) + self.shape, dtype=self.dtype,
+                                buffer=self.map, offset=self.data_offset)
+        self.frame_count = 0
+        return True
+
+    def append(self, frame, timestamp):
+        """Copia il frame nello slot successivo e ne registra il timestamp"""
+        if frame.shape != self.shape or frame.dtype != self.dtype:
+            return False
+        with self.lock:
+            if self.slots is None:
+                return False
+            slot = self.frame_count % self.capacity
+            self.slots[slot] = frame
+            self.index[slot, 0] = timestamp
+            self.index.view(np.int64)[slot, 1] = self.frame_count
+            self.frame_count += 1
+        return True
+
+    def close(self):
+        """Chiude il dump; sicura anche dopo un open() fallito a metà"""
+        with self.lock:
+            self.index = None
+            self.slots = None
+            if self.map is not None:
+                self.map.flush()
+                self.map.close()
+                self.map = None
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+class FrameDumpReader:
+    """
+    Legge un file .vpdump come np.memmap: i frame sono viste sul file,
+    senza copie, con accesso casuale in ordine di cattura.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} non è un dump di VisionPy Pro")
+            header_length = struct.unpack("<I", f.read(4))[0]
+            self.header = json.loads(f.read(header_length).decode("utf-8"))
+
+        self.shape = tuple(self.header["shape"])
+        self.dtype = np.dtype(self.header["dtype"])
+        self.capacity = self.header["capacity"]
+        raw_index = np.memmap(path, dtype=np.float64, mode="r",
+                              offset=self.header["index_offset"], shape=(self.capacity, 2))
+        self.slots = np.memmap(path, dtype=self.dtype, mode="r",
+                               offset=self.header["data_offset"],
+                               shape=(self.capacity,) + self.shape)
+
+        frame_numbers = raw_index.view(np.int64)[:, 1]
+        valid = np.flatnonzero(frame_numbers != EMPTY_SLOT)
+        # Ordine di cattura, anche dopo che il ring ha sovrascritto i primi slot
+        self.order = valid[np.argsort(frame_numbers[valid])]
+        self.timestamps = np.array(raw_index[self.order, 0])
+        self.frame_numbers = np.array(frame_numbers[self.order])
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, i):
+        return self.slots[self.order[i]]
+
+    def export_mp4(self, path, fps=None, encoder=None):
+        """Converte il dump in MP4 rispettando i timestamp di cattura"""
+        from EncoderBackend import OpenCVEncoder
+        from FrameTimeline import FrameTimeline
+
+        if len(self) == 0:
+            return False
+        if fps is None:
+            span = self.timestamps[-1] - self.timestamps[0]
+            fps = round((len(self) - 1) / span) if span > 0 else 30
+        encoder = encoder or OpenCVEncoder()
+        height, width = self.shape[:2]
+        if not encoder.open(path, width, height, fps):
+            return False
+        timeline = FrameTimeline(fps)
+        for i in range(len(self)):
+            for frame in timeline.push(self[i], self.timestamps[i]):
+                encoder.write(frame)
+        encoder.release()
+        return True
+
+    def export_png(self, directory, prefix="frame"):
+        """Esporta ogni frame come PNG numerato (lossless)"""
+        import cv2
+
+        os.makedirs(directory, exist_ok=True)
+        for i in range(len(self)):
+            name = f"{prefix}_{self.frame_numbers[i]:06d}.png"
+            cv2.imwrite(os.path.join(directory, name), self[i])
+        return len(self)
+
+
+def main():
+    """Conversione offline: python3 FrameDump.py dump.vpdump --mp4 out.mp4 | --png cartella"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Converte un dump grezzo di VisionPy Pro")
+    parser.add_argument("dump")
+    parser.add_argument("--mp4", help="file MP4 di destinazione")
+    parser.add_argument("--png", help="cartella per la sequenza PNG")
+    parser.add_argument("--fps", type=int, default=None)
+    args = parser.parse_args()
+
+    reader = FrameDumpReader(args.dump)
+    print(f"{len(reader)} frame {reader.shape} {reader.dtype}")
+    if args.mp4:
+        if reader.export_mp4(args.mp4, fps=args.fps):
+            print(f"✓ Esportato {args.mp4}")
+    if args.png:
+        count = reader.export_png(args.png)
+        print(f"✓ Esportati {count} PNG in {args.png}")
+
+
+if __name__ == "__main__":
+    main()
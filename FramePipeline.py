@@ -0,0 +1,166 @@
+# FramePipeline.py
+
+import time
+import queue
+import threading
+
+_STOP = object()
+
+
+class PipelineStage:
+    """Una fase della pipeline: un thread, una coda d'ingresso limitata e le sue misure"""
+
+    def __init__(self, name, func, queue_size=2):
+        self.name = name
+        self.func = func
+        self.input = queue.Queue(maxsize=queue_size)
+        self.thread = None
+        self.busy = 0.0        # Secondi passati dentro func
+        self.blocked = 0.0     # Secondi in attesa che la fase successiva liberi la coda
+        self.waiting = 0.0     # Secondi in attesa di un frame (coda vuota, fotocamera, cadenza ridotta)
+        self.items = 0
+        self.dropped = 0
+
+
+class FramePipeline:
+    """
+    Pipeline a fasi: ogni fase gira nel proprio thread e passa i frame alla
+    successiva attraverso una coda limitata. Le fasi lavorano in parallelo
+    su frame diversi (quasi tutto il tempo è dentro OpenCV, che rilascia il
+    GIL), quindi il throughput si avvicina a quello della fase più lenta
+    invece che alla somma delle fasi. L'ordine dei frame resta invariato.
+
+    La sorgente (es. la cattura) gira nel thread che chiama run(): se la
+    prima coda è piena si scarta il frame più vecchio, come una fotocamera
+    dal vivo; tra le fasi successive la coda piena rallenta la precedente.
+    Una fase che restituisce None scarta il frame.
+
+    get_stats() riporta per ogni fase l'utilizzo (tempo occupato / tempo
+    trascorso) nell'intervallo dalla chiamata precedente: la fase con
+    l'utilizzo più alto è il collo di bottiglia. La sorgente segnala con
+    source_waited() il tempo passato ad aspettare (la fotocamera, la
+    cadenza ridotta), che non conta come tempo occupato. I contatori sono
+    aggiornati e letti sotto lo stesso lock.
+    """
+
+    def __init__(self, stages, queue_size=2):
+        self.source = PipelineStage("cattura", None)
+        self.stages = [PipelineStage(name, func, queue_size) for name, func in stages]
+        self.lock = threading.Lock()
+        self.window_start = time.perf_counter()
+        self.source_wait = 0.0   # Attesa segnalata dalla sorgente nella chiamata in corso
+
+    def start(self):
+        for i, stage in enumerate(self.stages):
+            following = self.stages[i + 1] if i + 1 < len(self.stages) else None
+            stage.thread = threading.Thread(target=self._stage_loop, args=(stage, following),
+                                            name=f"pipeline-{stage.name}", daemon=True)
+            stage.thread.start()
+        self.window_start = time.perf_counter()
+
+    def run(self, source, is_running, drop_when_full=True):
+        """
+        Esegue la sorgente nel thread chiamante finché is_running() è vero,
+        poi ferma le fasi. Con drop_when_full=False la sorgente attende
+        invece di scartare (es. un file o un benchmark, non una fotocamera).
+        """
+        first = self.stages[0]
+        try:
+            while is_running():
+                self.source_wait = 0.0
+                start = time.perf_counter()
+                item = source()
+                elapsed = time.perf_counter() - start
+                waited = min(self.source_wait, elapsed)
+                with self.lock:
+                    self.source.busy += elapsed - waited
+                    self.source.waiting += waited
+                    if item is not None:
+                        self.source.items += 1
+                if item is None:
+                    continue
+                if not drop_when_full:
+                    start = time.perf_counter()
+                    first.input.put(item)
+                    with self.lock:
+                        self.source.blocked += time.perf_counter() - start
+                    continue
+                try:
+                    first.input.put_nowait(item)
+                except queue.Full:
+                    # Frame dal vivo: si tiene il più recente
+                    try:
+                        first.input.get_nowait()
+                        with self.lock:
+                            first.dropped += 1
+                    except queue.Empty:
+                        pass
+                    first.input.put_nowait(item)
+        finally:
+            self.stop()
+
+    def source_waited(self, seconds):
+        """Dalla sorgente (nel thread di run): secondi d'attesa da non contare come tempo occupato"""
+        self.source_wait += seconds
+
+    def stop(self):
+        first = self.stages[0]
+        while True:
+            try:
+                first.input.put(_STOP, timeout=0.1)
+                break
+            except queue.Full:
+                try:
+                    first.input.get_nowait()
+                except queue.Empty:
+                    pass
+        for stage in self.stages:
+            if stage.thread is not None and stage.thread is not threading.current_thread():
+                stage.thread.join(timeout=5)
+
+    def _stage_loop(self, stage, following):
+        while True:
+            start = time.perf_counter()
+            item = stage.input.get()
+            with self.lock:
+                stage.waiting += time.perf_counter() - start
+            if item is _STOP:
+                if following is not None:
+                    following.input.put(_STOP)
+                return
+            start = time.perf_counter()
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                print(f"Errore nella fase {stage.name} della pipeline: {e}")
+                result = None
+            with self.lock:
+                stage.busy += time.perf_counter() - start
+                stage.items += 1
+            if result is None or following is None:
+                continue
+            start = time.perf_counter()
+            following.input.put(result)
+            with self.lock:
+                stage.blocked += time.perf_counter() - start
+
+    def get_stats(self):
+        """Utilizzo, frame elaborati e scartati per fase dall'ultima chiamata"""
+        with self.lock:
+            now = time.perf_counter()
+            elapsed = max(now - self.window_start, 1e-6)
+            self.window_start = now
+            stats = {}
+            for stage in [self.source] + self.stages:
+                stats[stage.name] = {
+                    "utilization": stage.busy / elapsed,
+                    "blocked": stage.blocked / elapsed,
+                    "waiting": stage.waiting / elapsed,
+                    "fps": stage.items / elapsed,
+                    "dropped": stage.dropped,
+                    "queue": stage.input.qsize(),
+                }
+                stage.busy = stage.blocked = stage.waiting = 0.0
+                stage.items = stage.dropped = 0
+            bottleneck = max(stats, key=lambda name: stats[name]["utilization"])
+            return {"stages": stats, "bottleneck": bottleneck}
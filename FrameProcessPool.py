@@ -0,0 +1,235 @@
+# FrameProcessPool.py
+
+import time
+import queue
+import multiprocessing
+
+from SharedFrameRing import SharedFrameRing
+
+# Modalità che confrontano un frame con il precedente: tutti i loro frame
+# vanno allo stesso worker, che conserva lo stato tra un frame e l'altro
+STATEFUL_MODES = ("Rilevamento Movimento",)
+
+
+def _worker_main(worker, ring_name, slots, slot_bytes, tasks, results, preload):
+    """
+    Processo worker: elabora i frame direttamente negli slot del ring.
+    Sulla coda dei risultati mette (seq, esito) per ogni frame e, una volta
+    pronto (modelli precaricati), (None, worker).
+    """
+    # Import qui: nel processo figlio servono solo OpenCV e i modelli
+    from CVProcessor import CVProcessor
+    from TiledExecutor import tiled_executor
+
+    # I core sono già divisi tra i processi: niente bande dentro il worker
+    tiled_executor.set_bands(1)
+    ring = SharedFrameRing(slots, slot_bytes, name=ring_name)
+    processor = CVProcessor()   # Ogni worker ha il proprio registro dei modelli
+    for name in preload:
+        processor.registry.preload(name)
+    results.put((None, worker))
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        seq, slot, shape, mode, params = task
+        frame = ring.view(slot, shape)
+        try:
+            processed = processor.process_frame(frame, mode, **params)
+            ok = processed is not None and processed.shape == frame.shape
+            if ok:
+                # Il risultato sostituisce il frame nello stesso slot
+                frame[...] = processed
+        except Exception as e:
+            print(f"Errore nell'elaborazione del frame {seq}: {e}")
+            ok = False
+        frame = processed = None
+        results.put((seq, ok))
+    ring.close()
+
+
+class FrameProcessPool:
+    """
+    Elaborazione dei frame in un pool di processi, fuori dal GIL.
+
+    I frame vengono copiati in un SharedFrameRing; i worker (processi
+    avviati con spawn, ognuno con i propri modelli) li elaborano nello
+    stesso slot. Tra i processi passano solo numero di sequenza, slot,
+    forma e parametri. I risultati possono tornare fuori ordine: un buffer
+    di riordino li restituisce per numero di sequenza. Se tutti gli slot
+    sono occupati submit() scarta il frame, come fa una fotocamera dal vivo.
+    preload elenca i modelli da caricare all'avvio dei worker (altrimenti
+    ogni worker li carica al primo uso, come il CVProcessor nel thread).
+
+    Un worker che non restituisce un frame entro task_timeout secondi (una
+    rete bloccata, una chiamata OpenCV in stallo) viene terminato e
+    riavviato: i suoi frame contano come falliti, così il buffer di
+    riordino non resta fermo ad aspettarli. Il valore predefinito lascia
+    margine a YOLO sulle schede più lente, dove un frame può richiedere
+    più di un secondo.
+    """
+
+    def __init__(self, workers=2, max_resolution=(1920, 1080), slots_per_worker=2, preload=(),
+                 task_timeout=5.0):
+        self.workers = workers
+        self.task_timeout = task_timeout
+        self.preload = tuple(preload)
+        self.slot_bytes = max_resolution[0] * max_resolution[1] * 3
+        self.slots = workers * slots_per_worker
+        self.ring = None
+        self.processes = []
+        self.task_queues = []
+        self.results = None
+        self.context = None
+
+        self.free_slots = []
+        self.in_flight = {}         # seq -> (slot, forma, worker, timestamp)
+        self.submitted_at = {}      # seq -> istante di invio (time.monotonic)
+        self.worker_load = []
+        self.worker_ready = []      # Modelli precaricati: da qui parte il timeout
+        self.worker_progress = []   # Ultimo risultato (o avvio) di ogni worker
+        self.finished = {}          # Buffer di riordino: seq -> esito
+        self.next_seq = 0           # Prossimo numero di sequenza da assegnare
+        self.next_result = 0        # Prossimo numero di sequenza da restituire
+        self.stats = {"submitted": 0, "dropped": 0, "completed": 0, "failed": 0, "restarted": 0}
+
+    def start(self):
+        self.context = multiprocessing.get_context("spawn")
+        self.ring = SharedFrameRing(self.slots, self.slot_bytes)
+        self.free_slots = list(range(self.slots))
+        self.results = self.context.Queue()
+        self.task_queues = [None] * self.workers
+        self.processes = [None] * self.workers
+        self.worker_ready = [False] * self.workers
+        self.worker_progress = [time.monotonic()] * self.workers
+        for worker in range(self.workers):
+            self._start_worker(worker)
+        self.worker_load = [0] * self.workers
+        print(f"✓ Pool di elaborazione avviato: {self.workers} processi, {self.slots} slot")
+
+    def _start_worker(self, worker):
+        tasks = self.context.Queue()
+        process = self.context.Process(
+            target=_worker_main,
+            args=(worker, self.ring.name, self.slots, self.slot_bytes, tasks, self.results, self.preload),
+            daemon=True
+        )
+        process.start()
+        self.task_queues[worker] = tasks
+        self.processes[worker] = process
+        self.worker_ready[worker] = False
+        self.worker_progress[worker] = time.monotonic()
+
+    def stop(self):
+        for tasks in self.task_queues:
+            tasks.put(None)
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+        self.task_queues = []
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def submit(self, frame, timestamp, mode, **params):
+        """Accoda un frame; restituisce il numero di sequenza o None se scartato"""
+        alive = [w for w, process in enumerate(self.processes) if process.is_alive()]
+        if not alive or not self.free_slots or not self.ring.fits(frame):
+            self.stats["dropped"] += 1
+            return None
+        slot = self.free_slots.pop()
+        self.ring.view(slot, frame.shape)[...] = frame
+
+        if mode in STATEFUL_MODES:
+            worker = alive[0]
+        else:
+            worker = min(alive, key=self.worker_load.__getitem__)
+        seq = self.next_seq
+        self.next_seq += 1
+        self.in_flight[seq] = (slot, frame.shape, worker, timestamp)
+        self.submitted_at[seq] = time.monotonic()
+        self.worker_load[worker] += 1
+        self.task_queues[worker].put((seq, slot, frame.shape, mode, params))
+        self.stats["submitted"] += 1
+        return seq
+
+    def collect(self, timeout=0.0):
+        """
+        Restituisce, in ordine di sequenza, i risultati pronti come lista di
+        (timestamp, frame); frame è None se l'elaborazione è fallita.
+        Con timeout > 0 attende al massimo tanto il primo risultato.
+        """
+        try:
+            while True:
+                seq, ok = self.results.get(timeout=timeout) if timeout > 0 else self.results.get_nowait()
+                timeout = 0.0
+                if seq is None:
+                    # Worker pronto: ok è il suo indice
+                    self.worker_ready[ok] = True
+                    self.worker_progress[ok] = time.monotonic()
+                    continue
+                if seq not in self.in_flight or seq in self.finished:
+                    continue   # Risultato arrivato dopo il timeout: il frame è già contato come fallito
+                self.finished[seq] = ok
+                self.worker_progress[self.in_flight[seq][2]] = time.monotonic()
+        except queue.Empty:
+            pass
+        self.check_workers()
+
+        ready = []
+        while self.next_result in self.finished:
+            ok = self.finished.pop(self.next_result)
+            slot, shape, worker, timestamp = self.in_flight.pop(self.next_result)
+            self.submitted_at.pop(self.next_result, None)
+            frame = self.ring.view(slot, shape).copy() if ok else None
+            self.free_slots.append(slot)
+            self.worker_load[worker] -= 1
+            self.stats["completed" if ok else "failed"] += 1
+            ready.append((timestamp, frame))
+            self.next_result += 1
+        return ready
+
+    def check_workers(self):
+        # I frame di un worker terminato o bloccato non torneranno: si segnano
+        # come falliti perché il buffer di riordino non resti bloccato in attesa
+        now = time.monotonic()
+        for worker, process in enumerate(self.processes):
+            if not self.worker_load[worker]:
+                continue
+            lost = [seq for seq, (_, _, owner, _) in self.in_flight.items()
+                    if owner == worker and seq not in self.finished]
+            if not lost:
+                continue
+            if process.is_alive():
+                # I frame di un worker sono elaborati in ordine: il più vecchio
+                # è in lavorazione dall'ultimo risultato (o dal suo invio, se successivo)
+                started = max(self.submitted_at[lost[0]], self.worker_progress[worker])
+                if not self.worker_ready[worker] or now - started < self.task_timeout:
+                    continue
+                print(f"Errore: il worker {worker} del pool di elaborazione non risponde da "
+                      f"{now - started:.1f}s, riavvio ({len(lost)} frame persi)")
+                process.terminate()
+                process.join(timeout=1)
+                self._start_worker(worker)
+                self.stats["restarted"] += 1
+            else:
+                print(f"Errore: il worker {worker} del pool di elaborazione è terminato "
+                      f"({len(lost)} frame persi)")
+            for seq in lost:
+                self.finished[seq] = False
+
+    def pending(self):
+        return len(self.in_flight)
+
+    def get_stats(self):
+        return {**self.stats, "in_flight": len(self.in_flight)}
+
+    def wait_idle(self, timeout=10.0):
+        """Raccoglie i risultati finché non restano frame in elaborazione"""
+        ready = []
+        deadline = time.monotonic() + timeout
+        while self.in_flight and time.monotonic() < deadline:
+            ready.extend(self.collect(timeout=0.05))
+        return ready
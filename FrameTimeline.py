@@ -0,0 +1,55 @@
+# FrameTimeline.py
+
+
+class FrameTimeline:
+    """
+    Adatta frame con timestamp di cattura a un contenitore a FPS costanti.
+    Ogni frame occupa lo slot round((t - t0) * fps): se la cattura è più lenta
+    degli FPS del file il frame precedente viene duplicato per coprire il
+    buco, se è più veloce i frame in eccesso vengono scartati. La durata del
+    video risulta così uguale al tempo reale trascorso.
+    """
+
+    def __init__(self, fps, start_time=None):
+        self.fps = fps
+        self.start_time = start_time
+        self.next_slot = 0
+        self.last_frame = None
+        self.duplicated = 0
+        self.dropped = 0
+
+    def slot(self, timestamp):
+        return int(round((timestamp - self.start_time) * self.fps))
+
+    def push(self, frame, timestamp):
+        """Restituisce la lista dei frame da scrivere per questo frame catturato"""
+        if self.start_time is None:
+            self.start_time = timestamp
+        slot = self.slot(timestamp)
+
+        if slot < self.next_slot:
+            # Slot già occupato: il frame più recente servirà per i duplicati
+            self.last_frame = frame
+            self.dropped += 1
+            return []
+
+        output = []
+        if self.last_frame is not None:
+            gap = slot - self.next_slot
+            output.extend([self.last_frame] * gap)
+            self.duplicated += gap
+        output.append(frame)
+        self.last_frame = frame
+        self.next_slot = slot + 1
+        return output
+
+    def finish(self, end_time):
+        """Frame con cui completare il video fino a end_time"""
+        if self.last_frame is None or self.start_time is None:
+            return []
+        gap = self.slot(end_time) - self.next_slot
+        if gap <= 0:
+            return []
+        self.next_slot += gap
+        self.duplicated += gap
+        return [self.last_frame] * gap
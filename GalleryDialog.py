@@ -1,17 +1,19 @@
 # GalleryDialog.py (VERSIONE MIGLIORATA)
 
 import os
-from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
-                            QScrollArea, QWidget, QGridLayout, QPushButton,
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
+                            QListView, QPushButton, QComboBox, QLineEdit,
                             QMessageBox)
-from PyQt6.QtGui import QFont
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QSize
 
-from MediaThumbnailWidget import MediaThumbnailWidget
+from MediaIndex import MediaIndex
+from MediaListModel import MediaListModel
+from MediaItemDelegate import MediaItemDelegate
 from PreviewDialog import PreviewDialog
+from ThumbnailService import ThumbnailService
 
 class GalleryDialog(QDialog):
-    def __init__(self, photo_dir, video_dir, parent=None):
+    def __init__(self, photo_dir, video_dir, parent=None, thumbnail_service=None, catalog=None):
         super().__init__(parent)
         self.setWindowTitle("Galleria")
         self.setModal(False)
@@ -19,7 +21,16 @@ class GalleryDialog(QDialog):
 
         self.photo_dir = photo_dir
         self.video_dir = video_dir
-        self.all_media_paths = []
+
+        # Le miniature vengono generate in background e salvate in cache su disco
+        self.thumbnail_service = thumbnail_service or ThumbnailService()
+        self.model = MediaListModel(self.thumbnail_service, parent=self)
+        # L'indice segue le cartelle e passa al modello solo le differenze
+        self.media_index = MediaIndex(photo_dir, video_dir, catalog, parent=self)
+        self.media_index.entries_added.connect(self.on_entries_added)
+        self.media_index.entries_removed.connect(self.on_entries_removed)
+        self.media_index.entry_renamed.connect(self.model.rename_path)
+        self.finished.connect(self.on_finished)
 
         self.init_ui()
         self.load_media()
@@ -27,62 +38,87 @@ class GalleryDialog(QDialog):
     def init_ui(self):
         layout = QVBoxLayout(self)
 
+        toolbar = QHBoxLayout()
         self.refresh_btn = QPushButton("Aggiorna Galleria")
-        self.refresh_btn.clicked.connect(self.load_media)
-        layout.addWidget(self.refresh_btn)
+        self.refresh_btn.clicked.connect(self.media_index.refresh)
+        toolbar.addWidget(self.refresh_btn)
+
+        self.kind_combo = QComboBox()
+        for label, kind in (("Tutti", "all"), ("Foto", "photo"), ("Video", "video")):
+            self.kind_combo.addItem(label, kind)
+        self.kind_combo.currentIndexChanged.connect(self.on_filter_changed)
+        toolbar.addWidget(self.kind_combo)
+
+        self.sort_combo = QComboBox()
+        for label, mode in (("Più recenti", "newest"), ("Meno recenti", "oldest"),
+                            ("Nome", "name"), ("Dimensione", "size")):
+            self.sort_combo.addItem(label, mode)
+        self.sort_combo.currentIndexChanged.connect(self.on_sort_changed)
+        toolbar.addWidget(self.sort_combo)
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Cerca per nome...")
+        self.search_edit.textChanged.connect(self.on_filter_changed)
+        toolbar.addWidget(self.search_edit)
+
+        self.count_label = QLabel()
+        toolbar.addWidget(self.count_label)
+        layout.addLayout(toolbar)
+
+        # Vista virtualizzata: disegna solo gli elementi visibili
+        self.list_view = QListView()
+        self.list_view.setViewMode(QListView.ViewMode.IconMode)
+        self.list_view.setResizeMode(QListView.ResizeMode.Adjust)
+        self.list_view.setMovement(QListView.Movement.Static)
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setGridSize(QSize(180, 200))
+        self.list_view.setMouseTracking(True)
+        self.list_view.setSelectionMode(QListView.SelectionMode.NoSelection)
+        self.list_view.setStyleSheet("QListView { border: none; }")
+
+        self.delegate = MediaItemDelegate(self.list_view)
+        self.delegate.clicked.connect(self.on_thumbnail_clicked)
+        self.delegate.delete_requested.connect(self.on_delete_requested)
+        self.list_view.setItemDelegate(self.delegate)
+        self.list_view.setModel(self.model)
+        layout.addWidget(self.list_view)
 
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setStyleSheet("QScrollArea { border: none; }")
+    def load_media(self):
+        self.model.set_entries(self.media_index.start())
+        self.update_count()
 
-        self.scroll_widget = QWidget()
-        self.grid_layout = QGridLayout(self.scroll_widget)
-        self.grid_layout.setSpacing(10)
-        
-        self.scroll_area.setWidget(self.scroll_widget)
-        layout.addWidget(self.scroll_area)
+    def on_entries_added(self, entries):
+        self.model.add_entries(entries)
+        self.update_count()
 
-    def load_media(self):
-        for i in reversed(range(self.grid_layout.count())):
-            self.grid_layout.itemAt(i).widget().setParent(None)
-        self.all_media_paths.clear()
+    def on_entries_removed(self, paths):
+        self.model.remove_paths(paths)
+        self.update_count()
 
-        self.load_photos()
-        self.load_videos()
+    def update_count(self):
+        self.count_label.setText(f"{len(self.model.visible)} elementi")
 
-    def load_photos(self):
-        if not os.path.exists(self.photo_dir):
-            return
-        files = sorted([f for f in os.listdir(self.photo_dir) if f.lower().endswith(('.png', '.jpg', '.jpeg'))])
-        for filename in files:
-            path = os.path.join(self.photo_dir, filename)
-            self.all_media_paths.append(path)
-            self.create_and_add_thumbnail(path)
-            
-    def load_videos(self):
-        if not os.path.exists(self.video_dir):
-            return
-        files = sorted([f for f in os.listdir(self.video_dir) if f.lower().endswith('.mp4')])
-        for filename in files:
-            path = os.path.join(self.video_dir, filename)
-            self.all_media_paths.append(path)
-            self.create_and_add_thumbnail(path)
-
-    def create_and_add_thumbnail(self, path):
-        thumbnail = MediaThumbnailWidget(path, self)
-        thumbnail.clicked.connect(self.on_thumbnail_clicked)
-        thumbnail.delete_requested.connect(self.on_delete_requested)
-        
-        row, col = divmod(self.grid_layout.count(), 4)
-        self.grid_layout.addWidget(thumbnail, row, col)
+    def on_filter_changed(self):
+        self.model.set_filter(self.kind_combo.currentData(), self.search_edit.text())
+        self.update_count()
+
+    def on_sort_changed(self):
+        self.model.set_sort_mode(self.sort_combo.currentData())
+
+    def on_finished(self):
+        # Alla chiusura le estrazioni ancora in coda non servono più
+        self.media_index.stop()
+        self.model.close()
+        self.thumbnail_service.cancel_all()
 
     def on_thumbnail_clicked(self, file_path):
-        try:
-            index = self.all_media_paths.index(file_path)
-            preview_dialog = PreviewDialog(self.all_media_paths, index, self)
-            preview_dialog.exec()
-        except ValueError:
+        paths = self.model.paths()
+        index = self.model.row_of(file_path)
+        if index is None:
             print(f"Errore: percorso {file_path} non trovato nella lista.")
+            return
+        preview_dialog = PreviewDialog(paths, index, self, self.media_index.catalog)
+        preview_dialog.exec()
 
     def on_delete_requested(self, file_path):
         reply = QMessageBox.question(
@@ -95,6 +131,6 @@ class GalleryDialog(QDialog):
         if reply == QMessageBox.StandardButton.Yes:
             try:
                 os.remove(file_path)
-                self.load_media()
+                self.media_index.remove(file_path)
             except OSError as e:
-                QMessageBox.critical(self, "Errore di Cancellazione", f"Impossibile cancellare il file:\n{e}")
\ No newline at end of file
+                QMessageBox.critical(self, "Errore di Cancellazione", f"Impossibile cancellare il file:\n{e}")
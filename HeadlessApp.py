@@ -0,0 +1,157 @@
+# HeadlessApp.py
+
+import os
+import time
+import signal
+import threading
+from datetime import datetime
+
+from StartupProfiler import profiler
+from SettingsManager import SettingsManager
+from DeviceType import DeviceType
+from CameraManager import CameraManager
+from CVProcessor import CVProcessor
+from ModelRegistry import model_registry
+from CaptureEngine import CaptureEngine
+from FrameProcessPool import FrameProcessPool
+from PowerPolicy import PowerPolicy
+from StreamServer import StreamServer
+
+
+class HeadlessApp:
+    """
+    VisionPy Pro senza interfaccia (e senza Qt): CaptureEngine configurato
+    da settings.json, con registrazione facoltativa dello stream elaborato.
+    Pensato per schede senza display o per girare come servizio: termina
+    con SIGINT/SIGTERM (o dopo seconds secondi) chiudendo il file in corso.
+    """
+
+    STATS_INTERVAL = 10.0  # secondi tra due righe di statistiche sul terminale
+
+    def __init__(self, mode="Normale", record=False, seconds=0):
+        self.mode = mode
+        self.record = record
+        self.seconds = seconds
+        self.settings_manager = SettingsManager()
+        self.stop_event = threading.Event()
+        self.engine = None
+        self.recorder = None
+        self.catalog = None
+        self.process_pool = None
+        self.stream_server = None
+        self.frames = 0
+
+    def request_stop(self, signum=None, frame=None):
+        self.stop_event.set()
+
+    def create_engine(self):
+        settings = self.settings_manager
+        try:
+            device_type = DeviceType(settings.get_device_type())
+        except ValueError:
+            device_type = DeviceType.PC
+        camera_manager = CameraManager(device_type)
+        camera_manager.set_camera_index(settings.get_camera_index())
+        camera_manager.set_resolution(settings.get_resolution())
+        camera_manager.set_fps(settings.get_fps())
+
+        model_registry.configure(settings.get_model_settings()["idle_unload_seconds"])
+        engine = CaptureEngine(camera_manager, CVProcessor())
+        engine.set_mode(self.mode)
+
+        processing_settings = settings.get_processing_settings()
+        if processing_settings["workers"] > 0:
+            self.process_pool = FrameProcessPool(workers=processing_settings["workers"])
+            self.process_pool.start()
+        engine.set_process_pool(self.process_pool)
+        engine.set_pipelined(processing_settings["pipeline"])
+
+        # Senza finestra nessuno è "davanti": il risparmio dipende solo dalla scena
+        power_settings = settings.get_power_settings()
+        if power_settings["enabled"]:
+            power_policy = PowerPolicy.from_settings(power_settings)
+            power_policy.set_window_visible(False)
+            engine.set_power_policy(power_policy)
+
+        stream_settings = settings.get_stream_settings()
+        if stream_settings["enabled"]:
+            self.stream_server = StreamServer(
+                host=stream_settings["host"], port=stream_settings["port"],
+                qualities=stream_settings["qualities"], max_fps=stream_settings["max_fps"]
+            )
+            if self.stream_server.start():
+                engine.connect("frame", self.stream_server.publish)
+            else:
+                self.stream_server = None
+
+        engine.connect("status", print)
+        engine.connect("frame", self.on_frame)
+        return engine
+
+    def on_frame(self, frame, timestamp):
+        self.frames += 1
+        if self.frames == 1:
+            profiler.mark("primo frame elaborato")
+            profiler.report("primo frame")
+
+    def start_recording(self):
+        from VideoRecorder import VideoRecorder
+        from MediaCatalog import MediaCatalog
+
+        camera_manager = self.engine.camera_manager
+        resolution = camera_manager.get_resolution()
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        path = os.path.expanduser(f"~/VisionPy_Pro/videos/{timestamp}.mp4")
+
+        self.catalog = MediaCatalog()
+        self.recorder = VideoRecorder(camera_manager, self.settings_manager.get_encoder_settings(),
+                                      self.settings_manager.get_recording_settings(),
+                                      catalog=self.catalog)
+        self.recorder.connect("status", print)
+        self.engine.connect("frame", self.recorder.add_frame_to_queue)
+        self.recorder.start_recording(path, resolution[0], resolution[1], camera_manager.get_fps())
+        if self.engine.power_policy is not None:
+            self.engine.power_policy.set_recording(True)
+
+    def run(self):
+        """Avvia il motore e attende un segnale di arresto; restituisce il codice di uscita"""
+        signal.signal(signal.SIGINT, self.request_stop)
+        signal.signal(signal.SIGTERM, self.request_stop)
+
+        self.engine = self.create_engine()
+        self.engine.start()
+        if self.record:
+            self.start_recording()
+        profiler.mark("motore avviato")
+
+        start = time.monotonic()
+        last_stats, last_frames = start, 0
+        while not self.stop_event.wait(0.5):
+            now = time.monotonic()
+            if not self.engine.is_running():
+                print("Errore: il motore di cattura si è fermato")
+                break
+            if self.seconds and now - start >= self.seconds:
+                break
+            if now - last_stats >= self.STATS_INTERVAL:
+                print(f"Modalità: {self.mode} | {(self.frames - last_frames) / (now - last_stats):.1f} FPS")
+                last_stats, last_frames = now, self.frames
+
+        exit_code = 0 if self.engine.is_running() else 1
+        self.stop()
+        return exit_code
+
+    def stop(self):
+        if self.recorder is not None:
+            self.engine.disconnect("frame", self.recorder.add_frame_to_queue)
+            self.recorder.stop_recording()
+            self.recorder = None
+        self.engine.stop()
+        if self.process_pool is not None:
+            self.process_pool.stop()
+        if self.stream_server is not None:
+            self.stream_server.stop()
+        if self.catalog is not None:
+            self.catalog.close()
+        self.settings_manager.flush(force=True)
+        print("✓ VisionPy Pro headless terminato")
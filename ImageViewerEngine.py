@@ -0,0 +1,130 @@
+# ImageViewerEngine.py
+
+import threading
+import collections
+from PyQt6.QtCore import QObject, QSize, Qt, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+class ImageViewerEngine(QObject):
+    """
+    Motore del visualizzatore di PreviewDialog:
+    - decodifica alla risoluzione dello schermo (QImageReader.setScaledSize,
+      che per i JPEG riduce già in fase di decodifica)
+    - un thread in background decodifica l'immagine richiesta e poi le
+      vicine (indice ±prefetch), dalla più vicina alla più lontana
+    - cache LRU delle immagini decodificate, limitata in byte
+    Le immagini arrivano con image_ready nel thread della GUI.
+    """
+    image_ready = pyqtSignal(str, QImage)
+    image_failed = pyqtSignal(str)
+
+    def __init__(self, paths, target_size, prefetch=2, max_bytes=96 * 1024 * 1024):
+        super().__init__()
+        self.paths = list(paths)
+        self.target_size = QSize(target_size)
+        self.prefetch = prefetch
+        self.max_bytes = max_bytes
+
+        self.cache = collections.OrderedDict()  # path -> QImage
+        self.cache_bytes = 0
+        self.failed = set()
+        self.queue = []                          # Percorsi da decodificare, in ordine di priorità
+        self.condition = threading.Condition()
+        self.running = False
+        self.worker = None
+        self.stats = {"hits": 0, "misses": 0, "decoded": 0}
+
+    def start(self):
+        self.running = True
+        self.worker = threading.Thread(target=self._decode_loop, daemon=True)
+        self.worker.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.queue = []
+            self.condition.notify()
+        if self.worker:
+            self.worker.join()
+            self.worker = None
+
+    def request(self, index):
+        """
+        Restituisce subito l'immagine index se è in cache, altrimenti None
+        (arriverà con image_ready). In entrambi i casi riprogramma il prefetch.
+        """
+        path = self.paths[index]
+        with self.condition:
+            image = self.cache.get(path)
+            if image is not None:
+                self.cache.move_to_end(path)
+                self.stats["hits"] += 1
+            else:
+                self.stats["misses"] += 1
+            # La coda precedente non serve più: conta solo la posizione attuale
+            wanted = [path] if image is None else []
+            for distance in range(1, self.prefetch + 1):
+                for neighbour in (index + distance, index - distance):
+                    if 0 <= neighbour < len(self.paths):
+                        wanted.append(self.paths[neighbour])
+            self.queue = [p for p in wanted if p.lower().endswith(IMAGE_EXTENSIONS)
+                          and p not in self.cache and p not in self.failed]
+            self.condition.notify()
+        return image
+
+    def _decode_loop(self):
+        while True:
+            with self.condition:
+                while self.running and not self.queue:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                path = self.queue.pop(0)
+                if path in self.cache:
+                    continue
+
+            image = self.decode(path)
+
+            if image is None:
+                with self.condition:
+                    self.failed.add(path)
+                self.image_failed.emit(path)
+                continue
+            with self.condition:
+                self.store(path, image)
+                self.stats["decoded"] += 1
+            self.image_ready.emit(path, image)
+
+    def decode(self, path):
+        reader = QImageReader(path)
+        reader.setAutoTransform(True)
+        size = reader.size()
+        if size.isValid() and (size.width() > self.target_size.width()
+                               or size.height() > self.target_size.height()):
+            reader.setScaledSize(size.scaled(self.target_size, Qt.AspectRatioMode.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            print(f"Errore nel decodificare {path}: {reader.errorString()}")
+            return None
+        return image
+
+    def store(self, path, image):
+        self.cache[path] = image
+        self.cache_bytes += image.sizeInBytes()
+        # Le immagini più vecchie escono, ma non quella appena decodificata
+        while self.cache_bytes > self.max_bytes and len(self.cache) > 1:
+            _, old = self.cache.popitem(last=False)
+            self.cache_bytes -= old.sizeInBytes()
+
+    def is_failed(self, index):
+        return self.paths[index] in self.failed
+
+    def get_stats(self):
+        with self.condition:
+            stats = dict(self.stats)
+            stats["cached"] = len(self.cache)
+            stats["cache_bytes"] = self.cache_bytes
+        return stats
@@ -1,33 +1,48 @@
 import os
 import sys
+import time
+import itertools
+import threading
 import cv2
 from datetime import datetime
-from PyQt6.QtWidgets import (QMainWindow, QWidget, QHBoxLayout, QVBoxLayout,
+from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout,
     QMessageBox, QFileDialog, QStatusBar, QMenu, QDialog)
-from PyQt6.QtCore import Qt, QTimer, QUrl
+from PyQt6.QtCore import Qt, QTimer, QUrl, QEvent, pyqtSignal
 from PyQt6.QtGui import QFont, QKeySequence, QShortcut
-from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 
 from CameraManager import CameraManager
 from CVProcessor import CVProcessor
-from GalleryDialog import GalleryDialog
+from ModelRegistry import model_registry
+from MediaCatalog import MediaCatalog
 from CameraThread import CameraThread
 from RecordingThread import RecordingThread
+from PreRollBuffer import PreRollBuffer
+from PhotoWriter import PhotoWriter
+from FrameDump import FrameDumpWriter
+from FrameProcessPool import FrameProcessPool
+from PowerPolicy import PowerPolicy
+from StreamServer import StreamServer
 from CameraWidget import CameraWidget
 from ControlPanel import ControlPanel
 from OSDNotification import OSDNotification
 from PreviewWidget import PreviewWidget
 from MenuBar import MenuBar
 from TimerManager import TimerManager
+from TimeLapseManager import TimeLapseManager
 from SettingsManager import SettingsManager
 from DeviceManager import DeviceSelectionDialog, DeviceType
+from StartupProfiler import profiler
 
 class MainWindow(QMainWindow):
+    photo_saved = pyqtSignal(str, bool, dict)  # Emesso dai worker di PhotoWriter, con i metadati di cattura
+    media_catalog_ready = pyqtSignal()         # Emesso dal thread dell'avvio in background
+    
     def __init__(self):
         super().__init__()
         
         # === INIZIALIZZA IL GESTORE DELLE IMPOSTAZIONI ===
         self.settings_manager = SettingsManager()
+        profiler.mark("impostazioni lette")
         
         # === LEGGI IL DISPOSITIVO DALLE IMPOSTAZIONI ===
         device_type_str = self.settings_manager.get_device_type()
@@ -56,25 +71,73 @@ class MainWindow(QMainWindow):
         self.is_recording = False
         
         # Inizializza i componenti con il dispositivo selezionato
+        # Avvio a fasi: finestra e fotocamera subito, catalogo e galleria in
+        # background dopo il primo frame (start_background_init). I modelli
+        # vengono caricati dal ModelRegistry al primo uso della modalità.
         self.camera_manager = CameraManager(device_type)
+        model_registry.configure(self.settings_manager.get_model_settings()["idle_unload_seconds"])
         self.cv_processor = CVProcessor()
+        self.first_frame_shown = False
+        self.background_thread = None
+        self.closing = False
         self.camera_thread = None
         self.recording_thread = None
+        self.raw_recording_thread = None
+        self.recording_camera_thread = None  # CameraThread a cui sono collegate le registrazioni
+        self.stopping_recordings = []  # Registrazioni fermate che stanno ancora chiudendo il file
+        self.recording_stats = {}
+        self.frame_dump = None
+        self.thumbnail_service = None
+        self.process_pool = None
+        self.pipeline_bottleneck = None
+        self.stream_server = None
+        
+        # Risparmio energetico: scena ferma, nessuna registrazione, finestra inutilizzata
+        power_settings = self.settings_manager.get_power_settings()
+        self.power_policy = PowerPolicy.from_settings(power_settings) if power_settings["enabled"] else None
+        
+        # Catalogo SQLite di foto e video (scritture in background),
+        # aperto da start_background_init o alla prima cattura
+        self.media_catalog = None
+        self.catalog_lock = threading.Lock()
+        self.uncatalogued = []    # (path, tipo, metadati) salvati prima dell'apertura del catalogo
+        self.media_catalog_ready.connect(self.on_media_catalog_ready)
+        
+        # Salvataggio foto in background (PNG/JPEG fuori dal thread della GUI)
+        photo_settings = self.settings_manager.get_photo_settings()
+        self.photo_writer = PhotoWriter(jpeg_quality=photo_settings["jpeg_quality"])
+        self.photo_writer.start()
+        self.photo_saved.connect(self.on_photo_saved)
+        
+        # Buffer di pre-roll: mantiene gli ultimi secondi prima del trigger
+        self.preroll_buffer = None
+        preroll_settings = self.settings_manager.get_preroll_settings()
+        if preroll_settings["seconds"] > 0:
+            self.preroll_buffer = PreRollBuffer(
+                seconds=preroll_settings["seconds"],
+                jpeg_quality=preroll_settings["jpeg_quality"],
+                fps=preroll_settings["fps"],
+                max_bytes=preroll_settings["max_mb"] * 1024 * 1024
+            )
+            self.preroll_buffer.start()
         
         # Inizializza il gestore del timer
         self.timer_manager = TimerManager(self)
         self.timer_manager.countdown_update.connect(self.update_countdown)
         self.timer_manager.countdown_finished.connect(self.on_timer_finished)
         
+        # Intervallometro / time-lapse
+        self.timelapse_manager = TimeLapseManager(self.camera_manager, self)
+        self.timelapse_manager.shot_taken.connect(self.on_timelapse_shot)
+        self.timelapse_manager.timelapse_finished.connect(self.on_timelapse_finished)
+        
         # Impostazioni fisse e ottimizzate
         self.camera_manager.set_resolution((1280, 720))
         self.camera_manager.set_fps(30)
         
-        # === Inizializza il media player per la musica di sottofondo ===
-        self.media_player = QMediaPlayer()
-        self.audio_output = QAudioOutput()
-        self.media_player.setAudioOutput(self.audio_output)
-        self.media_player.setLoops(QMediaPlayer.Loops.Infinite)
+        # Il media player per la musica di sottofondo viene creato al primo uso
+        self.media_player = None
+        self.audio_output = None
         
         # Configura la finestra principale
         self.setWindowTitle("VisionPy Pro")
@@ -89,13 +152,77 @@ class MainWindow(QMainWindow):
         # Imposta le scorciatoie globali
         self.setup_shortcuts()
         
+        profiler.mark("interfaccia creata")
+        
         # Inizializza la fotocamera
         self.init_camera()
         
+        # L'input dell'utente in qualunque finestra dell'applicazione riporta alla piena velocità
+        if self.power_policy is not None:
+            QApplication.instance().installEventFilter(self)
+        
+        # Se la fotocamera non produce frame, il caricamento parte comunque
+        QTimer.singleShot(3000, self.start_background_init)
+        
         # Visualizza il dispositivo attuale nella barra di stato
         device_name = "Jetson Nano" if device_type == DeviceType.JETSON_NANO else "Raspberry Pi" if device_type == DeviceType.RASPBERRY_PI else "PC"
         print(f"✓ VisionPy Pro avviato con {device_name}")
 
+    def start_background_init(self):
+        """Seconda fase dell'avvio: catalogo e moduli della galleria in background"""
+        if self.background_thread is not None or self.closing:
+            return
+        self.background_thread = threading.Thread(target=self._background_init, daemon=True)
+        self.background_thread.start()
+
+    def _background_init(self):
+        self.ensure_media_catalog()
+        self.media_catalog_ready.emit()
+        profiler.mark("catalogo media aperto")
+        # Il primo import di galleria e QtMultimedia non pesa più sull'avvio né sul primo clic
+        import GalleryDialog
+        import PyQt6.QtMultimedia
+        profiler.mark("moduli galleria e multimedia importati")
+        profiler.report("avvio completo")
+
+    def ensure_media_catalog(self):
+        """Restituisce il catalogo media, aprendolo se l'avvio non l'ha ancora fatto"""
+        with self.catalog_lock:
+            if self.media_catalog is None and not self.closing:
+                self.media_catalog = MediaCatalog()
+            return self.media_catalog
+
+    def catalog_media(self, path, media_type, **metadata):
+        """
+        Registra un file nel catalogo (thread della GUI). Se il catalogo non è
+        ancora aperto il file attende l'avvio in background, che viene
+        anticipato: l'apertura del database non avviene mai nel thread della GUI.
+        """
+        if self.closing:
+            # Il file verrà riconciliato al prossimo avvio
+            return
+        if self.media_catalog is None:
+            self.uncatalogued.append((path, media_type, metadata))
+            self.start_background_init()
+            return
+        self.media_catalog.add(path, media_type, **metadata)
+
+    def on_media_catalog_ready(self):
+        uncatalogued, self.uncatalogued = self.uncatalogued, []
+        for path, media_type, metadata in uncatalogued:
+            self.catalog_media(path, media_type, **metadata)
+
+    def ensure_media_player(self):
+        """Crea il media player per la musica di sottofondo al primo uso"""
+        if self.media_player is None:
+            from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
+            
+            self.media_player = QMediaPlayer()
+            self.audio_output = QAudioOutput()
+            self.media_player.setAudioOutput(self.audio_output)
+            self.media_player.setLoops(QMediaPlayer.Loops.Infinite)
+        return self.media_player
+
     def setup_shortcuts(self):
         """Configura le scorciatoie da tastiera globali"""
         shortcut_c = QShortcut(QKeySequence('C'), self)
@@ -104,6 +231,9 @@ class MainWindow(QMainWindow):
         shortcut_m = QShortcut(QKeySequence('M'), self)
         shortcut_m.activated.connect(self.toggle_mirror_shortcut)
         
+        shortcut_b = QShortcut(QKeySequence('B'), self)
+        shortcut_b.activated.connect(self.capture_burst)
+        
         shortcut_v = QShortcut(QKeySequence('V'), self)
         shortcut_v.activated.connect(self.on_record_clicked)
         
@@ -154,6 +284,7 @@ class MainWindow(QMainWindow):
         
         # Aggiungi un menu per il cambio dispositivo
         self.add_device_menu()
+        self.add_capture_menu()
         
         # Crea la barra di stato
         self.status_bar = QStatusBar()
@@ -179,6 +310,92 @@ class MainWindow(QMainWindow):
         rpi_action = device_menu.addAction("Usa Raspberry Pi")
         rpi_action.triggered.connect(lambda: self.switch_device(DeviceType.RASPBERRY_PI))
 
+    def add_capture_menu(self):
+        """Aggiunge il menu per le modalità di acquisizione per analisi"""
+        capture_menu = self.menu_bar.addMenu("Acquisizione")
+        
+        self.dump_action = capture_menu.addAction("Dump grezzo (lossless)")
+        self.dump_action.setCheckable(True)
+        self.dump_action.toggled.connect(self.toggle_frame_dump)
+        
+        self.timelapse_action = capture_menu.addAction("Time-lapse")
+        self.timelapse_action.setCheckable(True)
+        self.timelapse_action.toggled.connect(self.toggle_timelapse)
+
+    def toggle_timelapse(self, enabled):
+        """Avvia/ferma il time-lapse; tra uno scatto e l'altro la cattura rallenta"""
+        settings = self.settings_manager.get_timelapse_settings()
+        if enabled:
+            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            path = os.path.expanduser(f"~/VisionPy_Pro/videos/{timestamp}_timelapse.mp4")
+            started = self.timelapse_manager.start(
+                path, settings["interval"], settings["playback_fps"],
+                self.settings_manager.get_encoder_settings()
+            )
+            if not started:
+                QMessageBox.critical(self, "Errore", "Impossibile avviare il time-lapse")
+                self.timelapse_action.setChecked(False)
+                return
+            if self.camera_thread and settings["low_power_fps"] > 0:
+                self.camera_thread.set_capture_interval(1.0 / settings["low_power_fps"])
+            self.osd_notification.show_notification(f"Time-lapse: ogni {settings['interval']}s")
+        else:
+            if self.camera_thread:
+                self.camera_thread.set_capture_interval(0)
+            self.timelapse_manager.stop()
+
+    def on_timelapse_shot(self, frame_count):
+        """Aggiorna la barra di stato a ogni scatto del time-lapse"""
+        self.status_bar.showMessage(f"Time-lapse in corso: {frame_count} frame")
+
+    def on_timelapse_finished(self, path):
+        """Callback (nel thread della GUI) quando il file del time-lapse è chiuso"""
+        self.catalog_media(path, "video", device_type=self.camera_manager.get_device_type().value,
+                           capture_mode="timelapse")
+        self.status_bar.showMessage(f"Time-lapse salvato: {os.path.basename(path)}")
+
+    def toggle_frame_dump(self, enabled):
+        """Avvia/ferma il dump grezzo di ogni frame in un file mappato in memoria"""
+        if enabled:
+            # Senza fotocamera avviata (o dopo un errore di inizializzazione) non c'è nulla da registrare
+            if self.camera_thread is None:
+                QMessageBox.critical(self, "Errore", "Fotocamera non disponibile: impossibile avviare il dump")
+                self.dump_action.setChecked(False)
+                return
+            frame = self.camera_manager.capture_frame()
+            if frame is not None:
+                shape = frame.shape
+            else:
+                width, height = self.camera_manager.get_resolution()
+                shape = (height, width, 3)
+            dump_settings = self.settings_manager.get_dump_settings()
+            capacity = int(dump_settings["seconds"] * self.camera_manager.get_fps())
+            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            path = os.path.expanduser(f"~/VisionPy_Pro/dumps/{timestamp}.vpdump")
+            frame_dump = FrameDumpWriter(path, shape, capacity=capacity)
+            try:
+                frame_dump.open()
+                self.camera_thread.set_frame_dump(frame_dump)
+            except (OSError, ValueError) as e:
+                QMessageBox.critical(self, "Errore", f"Impossibile creare il dump: {str(e)}")
+                frame_dump.close()
+                if os.path.exists(path):
+                    os.remove(path)
+                self.dump_action.setChecked(False)
+                return
+            self.frame_dump = frame_dump
+            self.osd_notification.show_notification("Dump Avviato!")
+            self.status_bar.showMessage(f"Dump grezzo in corso: {os.path.basename(path)}")
+        elif self.frame_dump is not None:
+            if self.camera_thread is not None:
+                self.camera_thread.set_frame_dump(None)
+            frame_count = self.frame_dump.frame_count
+            self.frame_dump.close()
+            self.status_bar.showMessage(
+                f"Dump salvato: {os.path.basename(self.frame_dump.path)} ({frame_count} frame)"
+            )
+            self.frame_dump = None
+
     def switch_device(self, device_type):
         """Cambia il dispositivo della fotocamera"""
         if self.camera_manager.get_device_type() == device_type:
@@ -193,6 +410,10 @@ class MainWindow(QMainWindow):
         
         if reply == QMessageBox.StandardButton.Yes:
             try:
+                # La registrazione in corso si chiude prima di fermare la fotocamera
+                if self.is_recording:
+                    self.on_record_clicked()
+                
                 # Ferma la fotocamera attuale
                 if self.camera_thread:
                     self.camera_thread.stop()
@@ -303,6 +524,31 @@ class MainWindow(QMainWindow):
             self.camera_thread = CameraThread(self.camera_manager, self.cv_processor)
             self.camera_thread.frame_ready.connect(self.update_frame)
             self.camera_thread.status_update.connect(self.update_status)
+            self.camera_thread.set_preroll_buffer(self.preroll_buffer)
+            
+            # Elaborazione in processi separati (fuori dal GIL) e a pipeline, se configurate
+            processing_settings = self.settings_manager.get_processing_settings()
+            workers = processing_settings["workers"]
+            if workers > 0 and self.process_pool is None:
+                self.process_pool = FrameProcessPool(workers=workers)
+                self.process_pool.start()
+            self.camera_thread.set_process_pool(self.process_pool)
+            self.camera_thread.set_pipelined(processing_settings["pipeline"])
+            self.camera_thread.set_power_policy(self.power_policy)
+            self.camera_thread.pipeline_stats.connect(self.on_pipeline_stats)
+            
+            # Streaming MJPEG per la visione da remoto: riceve i frame direttamente dal motore
+            stream_settings = self.settings_manager.get_stream_settings()
+            if stream_settings["enabled"] and self.stream_server is None:
+                self.stream_server = StreamServer(
+                    host=stream_settings["host"], port=stream_settings["port"],
+                    qualities=stream_settings["qualities"], max_fps=stream_settings["max_fps"]
+                )
+                if not self.stream_server.start():
+                    self.stream_server = None
+            if self.stream_server is not None:
+                self.camera_thread.engine.connect("frame", self.stream_server.publish)
+            
             self.camera_thread.start()
             
             resolution = self.camera_manager.get_resolution()
@@ -316,9 +562,37 @@ class MainWindow(QMainWindow):
                 f"Impossibile inizializzare la fotocamera: {str(e)}")
             self.camera_view.setText("Errore: Fotocamera non disponibile")
 
+    INPUT_EVENTS = (QEvent.Type.MouseMove, QEvent.Type.MouseButtonPress, QEvent.Type.KeyPress,
+                    QEvent.Type.Wheel)
+
+    def eventFilter(self, obj, event):
+        """Segnala l'input dell'utente alla PowerPolicy (senza intercettarlo)"""
+        if event.type() in self.INPUT_EVENTS:
+            self.power_policy.notify_input()
+        return False
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.Type.WindowStateChange and self.power_policy is not None:
+            self.power_policy.set_window_visible(not self.isMinimized())
+        super().changeEvent(event)
+
+    def on_pipeline_stats(self, stats):
+        """Segnala quando cambia la fase che limita la pipeline"""
+        bottleneck = stats["bottleneck"]
+        if bottleneck != self.pipeline_bottleneck:
+            self.pipeline_bottleneck = bottleneck
+            summary = ", ".join(f"{name} {s['utilization']:.0%}" for name, s in stats["stages"].items())
+            print(f"Pipeline: collo di bottiglia '{bottleneck}' ({summary})")
+
     def update_frame(self, rgb_frame):
         """Aggiorna il frame visualizzato"""
         self.camera_view.update_frame(rgb_frame)
+        if not self.first_frame_shown:
+            self.first_frame_shown = True
+            profiler.mark("primo frame a schermo")
+            profiler.report("primo frame")
+            # Il resto dell'avvio parte solo ora, senza competere con il primo frame
+            QTimer.singleShot(0, self.start_background_init)
 
     def update_status(self, message):
         """Aggiorna la barra di stato"""
@@ -341,13 +615,54 @@ class MainWindow(QMainWindow):
             filename = f"{timestamp}.jpg"
             path = os.path.expanduser(f"~/VisionPy_Pro/photos/{filename}")
             
-            success = self.camera_manager.save_frame(frame, path)
-            if success:
-                self.status_bar.showMessage(f"Immagine salvata: {filename}")
+            # Il salvataggio avviene in background: la GUI non attende l'encoding
+            if self.photo_writer.submit(frame, path, self.photo_callback(frame, "foto")):
                 self.preview_widget.show_preview(frame)
                 self.osd_notification.show_notification("Foto Scattata!")
             else:
-                self.status_bar.showMessage("Errore nel salvare l'immagine")
+                self.status_bar.showMessage("Errore: troppe foto in attesa di salvataggio")
+
+    def capture_burst(self):
+        """Scatto a raffica: salva i prossimi N frame alla velocità di cattura"""
+        if self.camera_thread is None:
+            return
+        count = self.settings_manager.get_photo_settings()["burst_count"]
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        counter = itertools.count(1)
+        
+        def on_burst_frame(frame, capture_time):
+            # Chiamata dal thread della fotocamera
+            index = next(counter)
+            path = os.path.expanduser(f"~/VisionPy_Pro/photos/{timestamp}_burst_{index:03d}.jpg")
+            if not self.photo_writer.submit(frame, path, self.photo_callback(frame, "raffica")):
+                print(f"Coda foto piena: frame {index} della raffica scartato")
+        
+        self.camera_thread.request_burst(count, on_burst_frame)
+        self.osd_notification.show_notification(f"Raffica: {count} foto")
+
+    def photo_callback(self, frame, capture_mode):
+        """
+        Callback per PhotoWriter con i metadati di cattura della foto: viaggiano
+        con il segnale fino al thread della GUI (anche dal thread della
+        fotocamera, per la raffica), senza stato condiviso.
+        """
+        metadata = {
+            "width": frame.shape[1],
+            "height": frame.shape[0],
+            "device_type": self.camera_manager.get_device_type().value,
+            "capture_mode": capture_mode,
+            "captured_at": time.time(),
+        }
+        return lambda path, success: self.photo_saved.emit(path, success, metadata)
+
+    def on_photo_saved(self, path, success, metadata):
+        """Callback (nel thread della GUI) al termine del salvataggio di una foto"""
+        filename = os.path.basename(path)
+        if success:
+            self.catalog_media(path, "photo", **metadata)
+            self.status_bar.showMessage(f"Immagine salvata: {filename}")
+        else:
+            self.status_bar.showMessage(f"Errore nel salvare l'immagine: {filename}")
 
     def on_record_clicked(self):
         """Gestisce l'avvio/arresto della registrazione"""
@@ -360,16 +675,44 @@ class MainWindow(QMainWindow):
             
             resolution = self.camera_manager.get_resolution()
             fps = self.camera_manager.get_fps()
+            recording_settings = self.settings_manager.get_recording_settings()
             
-            self.recording_thread = RecordingThread(self.camera_manager)
-            self.recording_thread.recording_finished.connect(self.on_recording_finished)
-            self.recording_thread.status_update.connect(self.update_status)
-            
+            self.recording_thread = self.create_recording_thread("elaborato")
+            self.recording_camera_thread = self.camera_thread
             self.camera_thread.processed_frame_ready.connect(
                 self.recording_thread.add_frame_to_queue
             )
             
-            self.recording_thread.start_recording(path, resolution[0], resolution[1], fps)
+            preroll = None
+            if self.preroll_buffer is not None:
+                preroll = self.preroll_buffer.snapshot()
+                stats = self.preroll_buffer.get_stats()
+                print(f"Pre-roll: {stats['seconds']:.1f}s, {stats['frames']} frame, "
+                      f"{stats['bytes'] / 1024:.0f} KB ({stats['bytes_per_second'] / 1024:.0f} KB/s)")
+            
+            self.recording_thread.start_recording(
+                path, resolution[0], resolution[1], fps, preroll=preroll
+            )
+            
+            # Dual-stream: il flusso grezzo ha il suo encoder, la sua coda e il suo thread
+            if recording_settings["raw_stream"]:
+                raw_resolution = recording_settings["raw_resolution"] or resolution
+                raw_path = os.path.expanduser(f"~/VisionPy_Pro/videos/{timestamp}_raw.mp4")
+                self.raw_recording_thread = self.create_recording_thread("raw")
+                self.camera_thread.raw_frame_ready.connect(
+                    self.raw_recording_thread.add_frame_to_queue
+                )
+                self.raw_recording_thread.start_recording(
+                    raw_path, raw_resolution[0], raw_resolution[1], fps
+                )
+                self.camera_thread.set_emit_raw(True)
+            
+            # Le miniature dei video non devono competere con l'encoder
+            if self.thumbnail_service is not None:
+                self.thumbnail_service.set_recording_active(True)
+            if self.power_policy is not None:
+                self.power_policy.set_recording(True)
+            
             self.is_recording = True
             
             self.control_panel.record_btn.setStyleSheet("""
@@ -390,9 +733,36 @@ class MainWindow(QMainWindow):
             self.osd_notification.show_notification("Registrazione Avviata!")
             self.status_bar.showMessage(f"Registrazione in corso: {filename}")
         else:
+            # Le registrazioni restano collegate alla CameraThread su cui sono partite
+            camera_thread = self.recording_camera_thread
+            self.recording_camera_thread = None
             if self.recording_thread:
-                self.recording_thread.stop_recording()
+                try:
+                    camera_thread.processed_frame_ready.disconnect(
+                        self.recording_thread.add_frame_to_queue
+                    )
+                except TypeError:
+                    pass
+                # La chiusura del file avviene nel thread della registrazione
+                self.recording_thread.stop_recording(wait=False)
+                self.stopping_recordings.append(self.recording_thread)
+            if self.raw_recording_thread:
+                camera_thread.set_emit_raw(False)
+                try:
+                    camera_thread.raw_frame_ready.disconnect(
+                        self.raw_recording_thread.add_frame_to_queue
+                    )
+                except TypeError:
+                    pass
+                self.raw_recording_thread.stop_recording(wait=False)
+                self.stopping_recordings.append(self.raw_recording_thread)
+                self.raw_recording_thread = None
+            self.recording_stats.clear()
             self.is_recording = False
+            if self.thumbnail_service is not None:
+                self.thumbnail_service.set_recording_active(False)
+            if self.power_policy is not None:
+                self.power_policy.set_recording(False)
             
             self.control_panel.record_btn.setStyleSheet("""
             QPushButton {
@@ -411,8 +781,33 @@ class MainWindow(QMainWindow):
             self.control_panel.record_btn.setText("REGISTRA VIDEO")
             self.osd_notification.show_notification("Registrazione Fermata!")
 
+    def create_recording_thread(self, stream_name):
+        """Crea un RecordingThread con le impostazioni correnti di encoder e registrazione"""
+        recording_thread = RecordingThread(
+            self.camera_manager,
+            self.settings_manager.get_encoder_settings(),
+            self.settings_manager.get_recording_settings(),
+            stream_name=stream_name,
+            catalog=self.ensure_media_catalog()
+        )
+        recording_thread.recording_finished.connect(self.on_recording_finished)
+        recording_thread.status_update.connect(self.update_status)
+        recording_thread.stats_update.connect(self.on_recording_stats)
+        return recording_thread
+
+    def on_recording_stats(self, stats):
+        """Mostra il throughput di ogni stream in registrazione"""
+        self.recording_stats[stats["stream"]] = stats
+        summary = " | ".join(
+            f"{name}: {s['encode_fps']:.1f} FPS, {s['dropped']} scartati"
+            for name, s in self.recording_stats.items()
+        )
+        self.status_bar.showMessage(f"Registrazione - {summary}")
+
     def on_recording_finished(self, success):
         """Callback quando la registrazione è terminata"""
+        if self.sender() in self.stopping_recordings:
+            self.stopping_recordings.remove(self.sender())
         if success:
             self.status_bar.showMessage("Registrazione salvata con successo")
         else:
@@ -420,9 +815,17 @@ class MainWindow(QMainWindow):
 
     def show_gallery(self):
         """Mostra la galleria"""
+        from GalleryDialog import GalleryDialog
+        from ThumbnailService import ThumbnailService
+        
         photo_dir = os.path.expanduser("~/VisionPy_Pro/photos")
         video_dir = os.path.expanduser("~/VisionPy_Pro/videos")
-        gallery_dialog = GalleryDialog(photo_dir, video_dir, self)
+        # Il servizio di miniature resta vivo tra un'apertura e l'altra della galleria
+        if self.thumbnail_service is None:
+            self.thumbnail_service = ThumbnailService()
+            self.thumbnail_service.set_recording_active(self.is_recording)
+        gallery_dialog = GalleryDialog(photo_dir, video_dir, self, self.thumbnail_service,
+                                       self.ensure_media_catalog())
         gallery_dialog.show()
 
     def on_mode_changed(self, mode):
@@ -456,8 +859,8 @@ class MainWindow(QMainWindow):
     def on_music_changed(self, muted):
         """Gestisce il cambio dello stato della musica"""
         if muted:
-            self.media_player.play()
-        else:
+            self.ensure_media_player().play()
+        elif self.media_player is not None:
             self.media_player.stop()
 
     def toggle_mirror_shortcut(self):
@@ -513,10 +916,44 @@ class MainWindow(QMainWindow):
         if self.camera_thread:
             self.camera_thread.stop()
         
+        if self.process_pool is not None:
+            self.process_pool.stop()
+        
+        if self.stream_server is not None:
+            self.stream_server.stop()
+        
+        if self.frame_dump is not None:
+            self.frame_dump.close()
+        
+        # In chiusura si attende la fine del file del time-lapse
+        self.timelapse_manager.stop(wait=True)
+        
         if self.recording_thread and self.is_recording:
             self.recording_thread.stop_recording()
         
-        if self.media_player.isPlaying():
+        if self.raw_recording_thread and self.is_recording:
+            self.raw_recording_thread.stop_recording()
+        
+        # Attende anche i file delle registrazioni già fermate
+        for recording in self.stopping_recordings:
+            recording.stop_recording()
+        
+        if self.preroll_buffer is not None:
+            self.preroll_buffer.stop()
+        
+        # Attende il salvataggio delle foto ancora in coda
+        self.photo_writer.stop(wait=True)
+        
+        # Le foto salvate in chiusura verranno catalogate dalla prossima riconciliazione
+        with self.catalog_lock:
+            self.closing = True
+            if self.media_catalog is not None:
+                self.media_catalog.close()
+        
+        # Scrive le impostazioni ancora in attesa del salvataggio differito
+        self.settings_manager.flush()
+        
+        if self.media_player is not None and self.media_player.isPlaying():
             self.media_player.stop()
         
         event.accept()
@@ -0,0 +1,293 @@
+# MediaCatalog.py
+
+import os
+import time
+import queue
+import sqlite3
+import threading
+import collections
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+VIDEO_EXTENSIONS = ('.mp4',)
+
+MediaEntry = collections.namedtuple("MediaEntry", "path name is_image mtime size")
+
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    path TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    width INTEGER,
+    height INTEGER,
+    duration REAL,
+    frame_count INTEGER,
+    device_type TEXT,
+    capture_mode TEXT,
+    captured_at REAL NOT NULL,
+    modified_at REAL NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_media_captured ON media(captured_at);
+CREATE INDEX IF NOT EXISTS idx_media_type_captured ON media(type, captured_at);
+"""
+
+COLUMNS = ("path", "type", "size", "width", "height", "duration", "frame_count",
+           "device_type", "capture_mode", "captured_at", "modified_at", "indexed_at")
+
+# Upsert: i campi noti solo al momento della cattura (dispositivo, modalità,
+# risoluzione) non vengono cancellati da una riconciliazione che non li conosce
+UPSERT = f"""
+INSERT INTO media ({", ".join(COLUMNS)}) VALUES ({", ".join("?" * len(COLUMNS))})
+ON CONFLICT(path) DO UPDATE SET
+    type = excluded.type,
+    size = excluded.size,
+    width = COALESCE(excluded.width, media.width),
+    height = COALESCE(excluded.height, media.height),
+    duration = COALESCE(excluded.duration, media.duration),
+    frame_count = COALESCE(excluded.frame_count, media.frame_count),
+    device_type = COALESCE(excluded.device_type, media.device_type),
+    capture_mode = COALESCE(excluded.capture_mode, media.capture_mode),
+    captured_at = CASE WHEN excluded.capture_mode IS NOT NULL
+                       THEN excluded.captured_at ELSE media.captured_at END,
+    modified_at = excluded.modified_at,
+    indexed_at = excluded.indexed_at
+"""
+
+
+def media_type_of(path):
+    name = path.lower()
+    if name.endswith(IMAGE_EXTENSIONS):
+        return "photo"
+    if name.endswith(VIDEO_EXTENSIONS):
+        return "video"
+    return None
+
+
+class MediaCatalog:
+    """
+    Catalogo SQLite di foto e video (~/VisionPy_Pro/media.db).
+
+    Le scritture (da capture_photo, RecordingThread, time-lapse) vengono
+    accodate e fatte da un thread dedicato, raggruppate in transazioni:
+    chi cattura non attende mai il disco. Le letture sono query indicizzate
+    per data e tipo. reconcile() riallinea il catalogo alle cartelle
+    (file aggiunti, modificati o cancellati fuori dall'applicazione).
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.expanduser("~/VisionPy_Pro/media.db")
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        with self.lock:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.migrate()
+
+        self.pending = queue.Queue()
+        self.writer = threading.Thread(target=self._write_loop, daemon=True)
+        self.writer.start()
+
+    def migrate(self):
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            self.connection.executescript(SCHEMA)
+        self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.connection.commit()
+
+    def close(self):
+        self.pending.put(None)
+        self.writer.join()
+        with self.lock:
+            self.connection.close()
+
+    # --- Scritture (asincrone) ---
+
+    def add(self, path, media_type=None, width=None, height=None, duration=None,
+            frame_count=None, device_type=None, capture_mode=None, captured_at=None):
+        """Registra un file appena salvato; i dati mancanti vengono letti dal file"""
+        self.pending.put(("add", dict(
+            path=os.path.abspath(path), media_type=media_type or media_type_of(path),
+            width=width, height=height, duration=duration, frame_count=frame_count,
+            device_type=device_type, capture_mode=capture_mode, captured_at=captured_at
+        )))
+
+    def remove(self, path):
+        self.pending.put(("remove", os.path.abspath(path)))
+
+    def flush(self):
+        """Attende che le scritture accodate finora siano nel database"""
+        done = threading.Event()
+        self.pending.put(("flush", done))
+        done.wait()
+
+    def _write_loop(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            batch = [item]
+            # Le scritture arrivate nel frattempo (es. una raffica) vanno nella stessa transazione
+            while True:
+                try:
+                    item = self.pending.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.pending.put(None)
+                    break
+                batch.append(item)
+
+            upserts, removals, flushes = [], [], []
+            for action, payload in batch:
+                if action == "add":
+                    record = self.probe(**payload)
+                    if record is not None:
+                        upserts.append(record)
+                elif action == "remove":
+                    removals.append((payload,))
+                else:
+                    flushes.append(payload)
+            try:
+                with self.lock, self.connection:
+                    self.connection.executemany(UPSERT, [tuple(r[c] for c in COLUMNS) for r in upserts])
+                    self.connection.executemany("DELETE FROM media WHERE path = ?", removals)
+            except sqlite3.Error as e:
+                print(f"Errore nel catalogo media: {e}")
+            for done in flushes:
+                done.set()
+
+    def probe(self, path, media_type=None, width=None, height=None, duration=None, frame_count=None,
+              device_type=None, capture_mode=None, captured_at=None, stat=None):
+        """Completa un record con dimensione, date e (per i video) durata e frame"""
+        try:
+            stat = stat or os.stat(path)
+        except OSError:
+            return None
+        if media_type == "video" and (duration is None or width is None):
+            import cv2
+
+            cap = cv2.VideoCapture(path)
+            if cap.isOpened():
+                fps = cap.get(cv2.CAP_PROP_FPS)
+                frame_count = frame_count or int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                width = width or int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                height = height or int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                if duration is None and fps > 0:
+                    duration = frame_count / fps
+            cap.release()
+        if captured_at is None:
+            # Un video inizia una durata prima della sua ultima scrittura
+            captured_at = stat.st_mtime - (duration or 0)
+        return {
+            "path": path, "type": media_type, "size": stat.st_size, "width": width, "height": height,
+            "duration": duration, "frame_count": frame_count, "device_type": device_type,
+            "capture_mode": capture_mode, "captured_at": captured_at,
+            "modified_at": stat.st_mtime, "indexed_at": time.time(),
+        }
+
+    # --- Letture ---
+
+    def get(self, path):
+        with self.lock:
+            row = self.connection.execute("SELECT * FROM media WHERE path = ?",
+                                          (os.path.abspath(path),)).fetchone()
+        return dict(row) if row else None
+
+    def query(self, media_type=None, start=None, end=None, newest_first=True):
+        """Elenco dei media, filtrato per tipo e intervallo di cattura (indici su captured_at)"""
+        clauses, params = [], []
+        if media_type:
+            clauses.append("type = ?")
+            params.append(media_type)
+        if start is not None:
+            clauses.append("captured_at >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("captured_at < ?")
+            params.append(end)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = "DESC" if newest_first else "ASC"
+        with self.lock:
+            return self.connection.execute(
+                f"SELECT path, type, size, modified_at FROM media {where} ORDER BY captured_at {order}",
+                params
+            ).fetchall()
+
+    def entries(self, directories):
+        """
+        MediaEntry dei file catalogati nelle cartelle indicate (una sola query).
+        Ogni cartella è un intervallo di prefissi sulla chiave primaria path:
+        il costo dipende dai file delle cartelle, non dall'intero catalogo.
+        """
+        clauses, params = [], []
+        for directory in sorted({os.path.abspath(d) for d in directories}):
+            prefix = os.path.join(directory, "")
+            # [prefisso, prefisso con l'ultimo carattere successivo): tutti i path sotto la cartella,
+            # senza le sottocartelle (nessun separatore dopo il prefisso)
+            upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+            clauses.append("(path >= ? AND path < ? AND instr(substr(path, ?), ?) = 0)")
+            params.extend((prefix, upper, len(prefix) + 1, os.sep))
+        if not clauses:
+            return []
+        with self.lock:
+            cursor = self.connection.cursor()
+            cursor.row_factory = None  # Tuple semplici: molto più veloci di sqlite3.Row
+            rows = cursor.execute(
+                f"SELECT path, type, modified_at, size FROM media WHERE {' OR '.join(clauses)} "
+                "ORDER BY captured_at DESC", params
+            ).fetchall()
+        basename = os.path.basename
+        return [MediaEntry(path, basename(path), media_type == "photo", modified_at, size)
+                for path, media_type, modified_at, size in rows]
+
+    # --- Riconciliazione ---
+
+    def reconcile(self, directories, settle_seconds=0.0):
+        """
+        Riallinea il catalogo alle cartelle (da chiamare fuori dal thread della GUI).
+        Restituisce (trovati, in_scrittura): trovati è path -> (MediaEntry, inode)
+        dei file stabili; in_scrittura è path -> inode dei file modificati da
+        meno di settle_seconds, che non vengono ancora catalogati.
+        """
+        with self.lock:
+            known = {row["path"]: (row["size"], row["modified_at"]) for row in
+                     self.connection.execute("SELECT path, size, modified_at FROM media")}
+
+        now = time.time()
+        found, writing, changed = {}, {}, []
+        for directory in directories:
+            if not os.path.exists(directory):
+                continue
+            for item in os.scandir(os.path.abspath(directory)):
+                media_type = media_type_of(item.name)
+                # I file nascosti (es. temporanei) non fanno parte del catalogo
+                if media_type is None or item.name.startswith("."):
+                    continue
+                try:
+                    if not item.is_file():
+                        continue
+                    stat = item.stat()
+                except OSError:
+                    continue
+                if now - stat.st_mtime < settle_seconds:
+                    writing[item.path] = stat.st_ino
+                    continue
+                found[item.path] = (MediaEntry(item.path, item.name, media_type == "photo",
+                                               stat.st_mtime, stat.st_size), stat.st_ino)
+                if known.get(item.path) != (stat.st_size, stat.st_mtime):
+                    changed.append(self.probe(item.path, media_type, stat=stat))
+
+        scanned = {os.path.abspath(d) for d in directories}
+        vanished = [(path,) for path in known
+                    if os.path.dirname(path) in scanned and path not in found and path not in writing]
+        if changed or vanished:
+            try:
+                with self.lock, self.connection:
+                    self.connection.executemany(UPSERT, [tuple(r[c] for c in COLUMNS) for r in changed])
+                    self.connection.executemany("DELETE FROM media WHERE path = ?", vanished)
+            except sqlite3.Error as e:
+                print(f"Errore nella riconciliazione del catalogo: {e}")
+        return found, writing
@@ -0,0 +1,164 @@
+# MediaIndex.py
+
+import os
+import time
+import threading
+from PyQt6.QtCore import QObject, QTimer, QFileSystemWatcher, pyqtSignal
+
+from MediaCatalog import MediaCatalog, MediaEntry, IMAGE_EXTENSIONS, media_type_of
+
+
+class MediaIndex(QObject):
+    """
+    Indice dei file della galleria, aggiornato in modo incrementale.
+
+    All'apertura l'elenco arriva dal MediaCatalog con una sola query.
+    QFileSystemWatcher segnala che una cartella è cambiata; dopo un breve
+    debounce il catalogo viene riconciliato con le cartelle in un thread in
+    background, e alla vista arrivano solo le differenze (aggiunte,
+    rimozioni, rinomine riconosciute dall'inode). Un file nuovo viene
+    pubblicato solo quando non è stato modificato per settle_seconds: un
+    video ancora in scrittura da RecordingThread non compare come elemento
+    rotto. Nel frattempo si controlla solo quel file.
+    """
+    entries_added = pyqtSignal(list)          # [MediaEntry]
+    entries_removed = pyqtSignal(list)        # [path]
+    entry_renamed = pyqtSignal(str, object)   # vecchio path, MediaEntry
+    scan_finished = pyqtSignal(object)        # Interno: risultato della riconciliazione
+
+    def __init__(self, photo_dir, video_dir, catalog=None, settle_seconds=3.0, debounce_ms=300,
+                 parent=None):
+        super().__init__(parent)
+        self.directories = [os.path.abspath(photo_dir), os.path.abspath(video_dir)]
+        self.catalog = catalog or MediaCatalog()
+        self.settle_seconds = settle_seconds
+
+        self.entries = {}   # path -> MediaEntry
+        self.inodes = {}    # path -> inode, per riconoscere le rinomine
+        self.pending = {}   # path -> inode dei file ancora in scrittura
+        self.scanning = False
+        self.rescan = False
+        self.scan_finished.connect(self.apply_scan)
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.schedule_refresh)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(debounce_ms)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+        self.settle_timer = QTimer(self)
+        self.settle_timer.setSingleShot(True)
+        self.settle_timer.setInterval(int(settle_seconds * 1000))
+        self.settle_timer.timeout.connect(self.check_pending)
+
+    def start(self):
+        """Elenco dal catalogo e avvio della sorveglianza; la riconciliazione segue in background"""
+        for directory in self.directories:
+            os.makedirs(directory, exist_ok=True)
+        self.watcher.addPaths(self.directories)
+        self.pending.clear()
+        self.entries = {entry.path: entry for entry in self.catalog.entries(self.directories)}
+        self.inodes = {}
+        self.refresh()
+        return list(self.entries.values())
+
+    def stop(self):
+        self.refresh_timer.stop()
+        self.settle_timer.stop()
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+
+    def schedule_refresh(self, _path=None):
+        # Più notifiche ravvicinate (es. raffica di foto) producono una sola scansione
+        self.refresh_timer.start()
+
+    def refresh(self):
+        """Riconcilia catalogo e cartelle in background; il diff arriva con scan_finished"""
+        if self.scanning:
+            self.rescan = True
+            return
+        self.scanning = True
+        threading.Thread(target=self._scan, daemon=True).start()
+
+    def _scan(self):
+        try:
+            result = self.catalog.reconcile(self.directories, self.settle_seconds)
+        except OSError as e:
+            print(f"Errore nella scansione della galleria: {e}")
+            result = None
+        self.scan_finished.emit(result)
+
+    def apply_scan(self, result):
+        """Confronta il risultato della scansione con l'indice ed emette solo le differenze"""
+        self.scanning = False
+        if result is not None:
+            found, writing = result
+            removed = [path for path in self.entries if path not in found and path not in writing]
+            added = [(entry, inode) for path, (entry, inode) in found.items()
+                     if path not in self.entries]
+            # Gli inode delle voci arrivate dal catalogo si conoscono solo ora
+            for path, (_, inode) in found.items():
+                self.inodes.setdefault(path, inode)
+            self.pending = dict(writing)
+            self.publish(added, removed)
+            if self.pending and not self.settle_timer.isActive():
+                self.settle_timer.start()
+        if self.rescan:
+            self.rescan = False
+            self.refresh()
+
+    def check_pending(self):
+        """Ricontrolla solo i file in scrittura, senza rileggere le cartelle"""
+        now = time.time()
+        added = []
+        for path, inode in list(self.pending.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self.pending[path]
+                continue
+            if now - stat.st_mtime >= self.settle_seconds:
+                del self.pending[path]
+                entry = MediaEntry(path, os.path.basename(path), path.lower().endswith(IMAGE_EXTENSIONS),
+                                   stat.st_mtime, stat.st_size)
+                added.append((entry, stat.st_ino))
+                self.catalog.add(path, media_type_of(path))
+        self.publish(added, [])
+        if self.pending:
+            self.settle_timer.start()
+
+    def publish(self, added, removed):
+        # Una rimozione e un'aggiunta con lo stesso inode sono una rinomina
+        removed_by_inode = {self.inodes.get(path, path): path for path in removed}
+        new_entries = []
+        for entry, inode in added:
+            old_path = removed_by_inode.pop(inode, None)
+            self.entries[entry.path] = entry
+            self.inodes[entry.path] = inode
+            if old_path is not None:
+                del self.entries[old_path]
+                self.inodes.pop(old_path, None)
+                self.entry_renamed.emit(old_path, entry)
+            else:
+                new_entries.append(entry)
+
+        removed_paths = list(removed_by_inode.values())
+        for path in removed_paths:
+            del self.entries[path]
+            self.inodes.pop(path, None)
+
+        if removed_paths:
+            self.entries_removed.emit(removed_paths)
+        if new_entries:
+            self.entries_added.emit(new_entries)
+
+    def remove(self, path):
+        """Da chiamare dopo una cancellazione fatta dall'applicazione"""
+        path = os.path.abspath(path)
+        self.catalog.remove(path)
+        if self.entries.pop(path, None) is None:
+            return
+        self.inodes.pop(path, None)
+        self.entries_removed.emit([path])
@@ -0,0 +1,106 @@
+# MediaItemDelegate.py
+
+from PyQt6.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt6.QtGui import QColor, QPen, QFont, QPixmap
+from PyQt6.QtCore import Qt, QRect, QSize, QEvent, pyqtSignal
+
+from MediaListModel import PathRole, IsImageRole
+
+ITEM_SIZE = QSize(170, 190)
+PREVIEW_SIZE = QSize(160, 120)
+DELETE_SIZE = 24
+
+
+class MediaItemDelegate(QStyledItemDelegate):
+    """
+    Disegna gli elementi della galleria (cornice, miniatura, nome e pulsante
+    di cancellazione al passaggio del mouse) senza creare widget.
+    Emette gli stessi segnali del vecchio MediaThumbnailWidget.
+    """
+    clicked = pyqtSignal(str)
+    delete_requested = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.name_font = QFont()
+        self.name_font.setPixelSize(10)
+        self.icon_font = QFont()
+        self.icon_font.setPixelSize(40)
+        self.delete_font = QFont()
+        self.delete_font.setBold(True)
+        # Cache dei pixmap già scalati: path -> (cacheKey del QImage, pixmap)
+        self.pixmaps = {}
+
+    def sizeHint(self, option, index):
+        return ITEM_SIZE
+
+    def delete_rect(self, rect):
+        return QRect(rect.right() - DELETE_SIZE - 5, rect.top() + 5, DELETE_SIZE, DELETE_SIZE)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(painter.RenderHint.Antialiasing)
+        rect = option.rect.adjusted(1, 1, -1, -1)
+        hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
+
+        painter.setPen(QPen(QColor("#007AFF" if hovered else "#555555"), 2 if hovered else 1))
+        painter.setBrush(QColor("#2D2D30"))
+        painter.drawRoundedRect(rect, 10, 10)
+
+        preview = QRect(rect.left() + (rect.width() - PREVIEW_SIZE.width()) // 2, rect.top() + 5,
+                        PREVIEW_SIZE.width(), PREVIEW_SIZE.height())
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor("#3C3C3C"))
+        painter.drawRoundedRect(preview, 5, 5)
+
+        image = index.data(Qt.ItemDataRole.DecorationRole)
+        if image is not None:
+            pixmap = self.scaled_pixmap(index.data(PathRole), image)
+            x = preview.left() + (preview.width() - pixmap.width()) // 2
+            y = preview.top() + (preview.height() - pixmap.height()) // 2
+            painter.drawPixmap(x, y, pixmap)
+        else:
+            # Segnaposto finché la miniatura non arriva dal ThumbnailService
+            painter.setPen(QColor("white"))
+            painter.setFont(self.icon_font)
+            placeholder = "⏳" if index.data(IsImageRole) else "🎬"
+            painter.drawText(preview, Qt.AlignmentFlag.AlignCenter, placeholder)
+
+        painter.setPen(QColor("white"))
+        painter.setFont(self.name_font)
+        name_rect = QRect(rect.left() + 5, preview.bottom() + 5, rect.width() - 10,
+                          rect.bottom() - preview.bottom() - 10)
+        painter.drawText(name_rect, Qt.AlignmentFlag.AlignCenter | Qt.TextFlag.TextWrapAnywhere,
+                         index.data(Qt.ItemDataRole.DisplayRole))
+
+        if hovered:
+            button = self.delete_rect(rect)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor("#FF3B30"))
+            painter.drawEllipse(button)
+            painter.setPen(QColor("white"))
+            painter.setFont(self.delete_font)
+            painter.drawText(button, Qt.AlignmentFlag.AlignCenter, "✕")
+        painter.restore()
+
+    def scaled_pixmap(self, path, image):
+        cached = self.pixmaps.get(path)
+        if cached is not None and cached[0] == image.cacheKey():
+            return cached[1]
+        pixmap = QPixmap.fromImage(image).scaled(PREVIEW_SIZE, Qt.AspectRatioMode.KeepAspectRatio,
+                                                 Qt.TransformationMode.SmoothTransformation)
+        if len(self.pixmaps) > 256:
+            self.pixmaps.clear()
+        self.pixmaps[path] = (image.cacheKey(), pixmap)
+        return pixmap
+
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.Type.MouseButtonRelease
+                and event.button() == Qt.MouseButton.LeftButton):
+            path = index.data(PathRole)
+            if self.delete_rect(option.rect.adjusted(1, 1, -1, -1)).contains(event.position().toPoint()):
+                self.delete_requested.emit(path)
+            else:
+                self.clicked.emit(path)
+            return True
+        return super().editorEvent(event, model, option, index)
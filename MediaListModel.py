@@ -0,0 +1,230 @@
+# MediaListModel.py
+
+import bisect
+import collections
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex
+
+PathRole = Qt.ItemDataRole.UserRole
+IsImageRole = Qt.ItemDataRole.UserRole + 1
+
+# Chiave e verso di ordinamento per ogni modalità della galleria
+# (le chiavi in ordine decrescente sono numeriche: insert_visible le nega)
+SORT_MODES = {
+    "newest": (lambda e: e.mtime, True),
+    "oldest": (lambda e: e.mtime, False),
+    "name": (lambda e: e.name.lower(), False),
+    "size": (lambda e: e.size, True),
+}
+
+
+class MediaListModel(QAbstractListModel):
+    """
+    Modello della galleria: un elenco di file, nessun widget per elemento.
+    La vista chiede i dati solo per gli elementi visibili, quindi le
+    miniature vengono richieste al ThumbnailService mentre si scorre.
+    Le righe sono esposte a pagine (fetchMore); ordinamento e filtro
+    lavorano sull'elenco completo e azzerano solo il modello. Le modifiche
+    del MediaIndex arrivano come differenze e toccano solo le righe coinvolte.
+    """
+
+    def __init__(self, thumbnail_service, page_size=200, thumbnail_items=1024, parent=None):
+        super().__init__(parent)
+        self.thumbnail_service = thumbnail_service
+        self.page_size = page_size
+        self.thumbnail_items = thumbnail_items
+
+        self.entries = {}       # path -> MediaEntry, tutti i file noti
+        self.visible = []       # Filtrati e ordinati
+        self.loaded = 0         # Righe già esposte alla vista
+        self.rows = {}          # path -> riga in self.visible, valido per le prime rows_valid righe
+        self.rows_valid = 0
+        self.sort_mode = "newest"
+        self.kind_filter = "all"
+        self.text_filter = ""
+
+        self.thumbnails = collections.OrderedDict()  # LRU path -> QImage
+        self.requested = set()
+        self.thumbnail_service.thumbnail_ready.connect(self.on_thumbnail_ready)
+
+    def close(self):
+        self.thumbnail_service.thumbnail_ready.disconnect(self.on_thumbnail_ready)
+
+    # --- Caricamento ---
+
+    def set_entries(self, entries):
+        self.entries = {entry.path: entry for entry in entries}
+        self.thumbnails.clear()
+        self.requested.clear()
+        self.apply()
+
+    def matches(self, entry):
+        if self.kind_filter != "all" and entry.is_image != (self.kind_filter == "photo"):
+            return False
+        return not self.text_filter or self.text_filter.lower() in entry.name.lower()
+
+    def apply(self):
+        """Ricalcola l'elenco visibile con filtro e ordinamento correnti"""
+        self.beginResetModel()
+        visible = [entry for entry in self.entries.values() if self.matches(entry)]
+        key, reverse = SORT_MODES[self.sort_mode]
+        visible.sort(key=key, reverse=reverse)
+        self.visible = visible
+        self.rows = {}
+        self.rows_valid = 0
+        self.loaded = min(self.page_size, len(visible))
+        self.endResetModel()
+
+    def set_sort_mode(self, mode):
+        if mode != self.sort_mode:
+            self.sort_mode = mode
+            self.apply()
+
+    def set_filter(self, kind=None, text=None):
+        if kind is not None:
+            self.kind_filter = kind
+        if text is not None:
+            self.text_filter = text
+        self.apply()
+
+    # --- Aggiornamenti incrementali (dal MediaIndex) ---
+
+    def add_entries(self, entries):
+        for entry in entries:
+            self.entries[entry.path] = entry
+            if self.matches(entry):
+                self.insert_visible(entry)
+
+    def insert_visible(self, entry):
+        """Inserisce una riga nella posizione dettata dall'ordinamento corrente (ricerca binaria)"""
+        key, reverse = SORT_MODES[self.sort_mode]
+        # Dopo gli elementi con la stessa chiave, come nella ricerca lineare
+        if reverse:
+            row = bisect.bisect_right(self.visible, -key(entry), key=lambda other: -key(other))
+        else:
+            row = bisect.bisect_right(self.visible, key(entry), key=key)
+        # Oltre l'ultima pagina esposta la riga arriverà con fetchMore
+        exposed = row < self.loaded or self.loaded == len(self.visible)
+        if exposed:
+            self.beginInsertRows(QModelIndex(), row, row)
+        self.visible.insert(row, entry)
+        self.invalidate_rows(row)
+        if exposed:
+            self.loaded += 1
+            self.endInsertRows()
+
+    def remove_paths(self, paths):
+        # Dall'ultima riga alla prima: le righe precedenti non si spostano,
+        # quindi la cache path -> riga resta valida per tutte le successive
+        rows = {path: self.row_of(path) for path in paths}
+        for path in sorted(rows, key=lambda p: -1 if rows[p] is None else rows[p], reverse=True):
+            self.remove_path(path)
+
+    def remove_path(self, path):
+        """Toglie un solo elemento (es. dopo una cancellazione) senza ricaricare"""
+        self.entries.pop(path, None)
+        self.thumbnails.pop(path, None)
+        self.requested.discard(path)
+        row = self.row_of(path)
+        if row is None:
+            return False
+        exposed = row < self.loaded
+        if exposed:
+            self.beginRemoveRows(QModelIndex(), row, row)
+        del self.visible[row]
+        self.rows.pop(path, None)
+        self.invalidate_rows(row)
+        if exposed:
+            self.loaded -= 1
+            self.endRemoveRows()
+        return True
+
+    def rename_path(self, old_path, entry):
+        self.remove_path(old_path)
+        self.add_entries([entry])
+
+    # --- Paginazione ---
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.loaded < len(self.visible)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.page_size, len(self.visible) - self.loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+
+    # --- Interfaccia del modello ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self.loaded:
+            return None
+        entry = self.visible[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return entry.name
+        if role == Qt.ItemDataRole.DecorationRole:
+            return self.thumbnail(entry.path)
+        if role == PathRole:
+            return entry.path
+        if role == IsImageRole:
+            return entry.is_image
+        return None
+
+    def paths(self):
+        """Percorsi nell'ordine mostrato (anche le righe non ancora esposte)"""
+        return [entry.path for entry in self.visible]
+
+    def row_of(self, path):
+        row = self.rows.get(path)
+        if row is not None and row < self.rows_valid and self.visible[row].path == path:
+            return row
+        # Completa la cache solo dalla prima riga non più valida in poi
+        for row in range(self.rows_valid, len(self.visible)):
+            other = self.visible[row].path
+            self.rows[other] = row
+            self.rows_valid = row + 1
+            if other == path:
+                return row
+        return None
+
+    def invalidate_rows(self, row):
+        """Le righe da row in poi si sono spostate: le precedenti restano in cache"""
+        self.rows_valid = min(self.rows_valid, row)
+
+    # --- Miniature ---
+
+    def thumbnail(self, path):
+        """Miniatura se disponibile, altrimenti la richiede (una volta) e restituisce None"""
+        image = self.thumbnails.get(path)
+        if image is not None:
+            self.thumbnails.move_to_end(path)
+            return image
+        if path in self.requested:
+            return None
+        self.requested.add(path)
+        image = self.thumbnail_service.request(path)
+        if image is not None:
+            self.store_thumbnail(path, image)
+        return image
+
+    def store_thumbnail(self, path, image):
+        self.requested.discard(path)
+        self.thumbnails[path] = image
+        while len(self.thumbnails) > self.thumbnail_items:
+            old_path, _ = self.thumbnails.popitem(last=False)
+            self.requested.discard(old_path)
+
+    def on_thumbnail_ready(self, path, image):
+        row = self.row_of(path)
+        if row is None:
+            return
+        self.store_thumbnail(path, image)
+        if row < self.loaded:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
@@ -35,6 +35,10 @@ class MenuBar(QMenuBar):
         c_action.triggered.connect(lambda: self.parent().capture_photo())
         shortcuts_menu.addAction(c_action)
 
+        b_action = QAction("B - Scatto a raffica", self)
+        b_action.triggered.connect(lambda: self.parent().capture_burst())
+        shortcuts_menu.addAction(b_action)
+
         m_action = QAction("M - Specchia Immagine", self)
         m_action.triggered.connect(lambda: self.parent().toggle_mirror_shortcut())
         shortcuts_menu.addAction(m_action)
@@ -0,0 +1,155 @@
+# ModelRegistry.py
+
+import time
+import threading
+from contextlib import contextmanager
+
+STATE_UNLOADED = "non caricato"
+STATE_LOADING = "caricamento"
+STATE_READY = "pronto"
+STATE_FAILED = "errore"
+
+RETRY_SECONDS = 5.0        # Attesa prima di ritentare un caricamento fallito...
+RETRY_MAX_SECONDS = 300.0  # ...raddoppiata a ogni errore fino a questo limite
+
+
+class ModelEntry:
+    def __init__(self, name, loader, warmup=None):
+        self.name = name
+        self.loader = loader
+        self.warmup = warmup
+        self.model = None
+        self.state = STATE_UNLOADED
+        self.last_used = 0.0
+        self.load_seconds = 0.0
+        self.failures = 0          # Errori di caricamento consecutivi
+        self.retry_at = 0.0        # Prima del quale un modello in errore non viene ritentato
+        self.lock = threading.Lock()   # Uso esclusivo del modello (una rete DNN non è rientrante)
+
+
+class ModelRegistry:
+    """
+    Registro dei modelli di visione, condiviso da tutti i CVProcessor.
+
+    Un modello viene caricato solo al primo uso, in un thread in background:
+    nel frattempo use() restituisce None e la modalità mostra lo stato di
+    caricamento invece di bloccare la cattura. Dopo il caricamento viene
+    eseguito un passaggio di warm-up, così il primo frame reale non paga
+    l'inizializzazione della rete. Con idle_unload_seconds > 0 i modelli
+    non usati da quel tempo vengono scaricati (utile su schede da 1-2 GB)
+    e ricaricati al prossimo uso. Un caricamento fallito (es. file del
+    modello mancante) viene ritentato dal primo use() dopo un'attesa che
+    raddoppia a ogni errore, senza riprovare a ogni frame.
+    """
+
+    def __init__(self, idle_unload_seconds=0):
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.idle_unload_seconds = 0
+        self.idle_thread = None
+        self.idle_event = threading.Event()
+        self.configure(idle_unload_seconds)
+
+    def register(self, name, loader, warmup=None):
+        """Registra un modello; se il nome è già registrato resta la prima definizione"""
+        with self.lock:
+            if name not in self.entries:
+                self.entries[name] = ModelEntry(name, loader, warmup)
+
+    def configure(self, idle_unload_seconds):
+        """Imposta dopo quanti secondi di inattività un modello viene scaricato (0 = mai)"""
+        self.idle_unload_seconds = idle_unload_seconds
+        if idle_unload_seconds > 0 and self.idle_thread is None:
+            self.idle_thread = threading.Thread(target=self._idle_loop, daemon=True)
+            self.idle_thread.start()
+        self.idle_event.set()
+
+    def state(self, name):
+        entry = self.entries.get(name)
+        return entry.state if entry else STATE_UNLOADED
+
+    @contextmanager
+    def use(self, name):
+        """
+        Fornisce il modello in uso esclusivo, o None se non è ancora pronto
+        (in quel caso ne avvia il caricamento in background).
+        """
+        entry = self.entries[name]
+        with entry.lock:
+            entry.last_used = time.monotonic()
+            if entry.model is None:
+                self.load_async(name)
+            yield entry.model
+
+    def load_async(self, name):
+        entry = self.entries[name]
+        with self.lock:
+            if entry.state in (STATE_LOADING, STATE_READY):
+                return
+            if entry.state == STATE_FAILED and time.monotonic() < entry.retry_at:
+                return
+            entry.state = STATE_LOADING
+        threading.Thread(target=self._load, args=(entry,), daemon=True).start()
+
+    def preload(self, name):
+        """Carica subito un modello nel thread chiamante (es. all'avvio di un processo worker)"""
+        entry = self.entries[name]
+        with self.lock:
+            if entry.state not in (STATE_UNLOADED, STATE_FAILED):
+                return
+            entry.state = STATE_LOADING
+        self._load(entry)
+
+    def _load(self, entry):
+        start = time.perf_counter()
+        try:
+            model = entry.loader()
+            if entry.warmup is not None:
+                entry.warmup(model)
+        except Exception as e:
+            entry.failures += 1
+            delay = min(RETRY_SECONDS * 2 ** (entry.failures - 1), RETRY_MAX_SECONDS)
+            print(f"Errore nel caricare il modello {entry.name}: {e} (nuovo tentativo tra {delay:.0f}s)")
+            entry.retry_at = time.monotonic() + delay
+            entry.state = STATE_FAILED
+            return
+        entry.load_seconds = time.perf_counter() - start
+        with entry.lock:
+            entry.model = model
+            entry.last_used = time.monotonic()
+            entry.failures = 0
+            entry.state = STATE_READY
+        print(f"✓ Modello {entry.name} pronto in {entry.load_seconds:.2f}s")
+
+    def unload(self, name):
+        entry = self.entries[name]
+        with entry.lock:
+            if entry.state != STATE_READY:
+                return
+            entry.model = None
+            entry.state = STATE_UNLOADED
+        print(f"Modello {name} scaricato per inattività")
+
+    def unload_idle(self):
+        if self.idle_unload_seconds <= 0:
+            return
+        now = time.monotonic()
+        for name, entry in list(self.entries.items()):
+            if entry.state == STATE_READY and now - entry.last_used > self.idle_unload_seconds:
+                self.unload(name)
+
+    def _idle_loop(self):
+        while True:
+            interval = self.idle_unload_seconds
+            # Con lo scaricamento disattivato il thread attende una nuova configurazione
+            self.idle_event.wait(max(1.0, interval / 4) if interval > 0 else None)
+            self.idle_event.clear()
+            self.unload_idle()
+
+    def get_stats(self):
+        return {name: {"state": entry.state, "load_seconds": entry.load_seconds}
+                for name, entry in self.entries.items()}
+
+
+# Istanza condivisa: più CVProcessor (e più camere) usano gli stessi modelli caricati
+model_registry = ModelRegistry()
@@ -0,0 +1,100 @@
+# PhotoWriter.py
+
+import os
+import time
+import queue
+import threading
+import cv2
+
+
+class PhotoWriter:
+    """
+    Salva le foto su disco con un pool di thread in background, così la
+    compressione PNG/JPEG non blocca l'interfaccia né l'anteprima.
+    La coda è limitata: se è piena submit() restituisce False invece di
+    accumulare frame in memoria. cv2.imwrite rilascia il GIL, quindi più
+    worker codificano davvero in parallelo (utile per lo scatto a raffica).
+    """
+
+    def __init__(self, workers=None, max_pending=32, jpeg_quality=95):
+        self.workers = workers or max(1, min(4, os.cpu_count() or 1))
+        self.jpeg_quality = jpeg_quality
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.threads = []
+        self.lock = threading.Lock()
+        self.stats = {
+            "submitted": 0,
+            "saved": 0,
+            "failed": 0,
+            "rejected": 0,
+            "encode_time": 0.0,
+            "submit_time": 0.0,
+            "max_submit_time": 0.0,
+        }
+
+    def start(self):
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, wait=True):
+        """Ferma i worker; con wait=True attende il salvataggio delle foto in coda"""
+        for _ in self.threads:
+            self.pending.put(None)
+        if wait:
+            for thread in self.threads:
+                thread.join()
+        self.threads = []
+
+    def submit(self, frame, path, callback=None):
+        """
+        Accoda un frame da salvare in path. callback(path, success) viene
+        chiamata dal thread worker al termine del salvataggio.
+        """
+        start = time.perf_counter()
+        try:
+            self.pending.put_nowait((frame, path, callback))
+            accepted = True
+        except queue.Full:
+            accepted = False
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.stats["submitted" if accepted else "rejected"] += 1
+            self.stats["submit_time"] += elapsed
+            self.stats["max_submit_time"] = max(self.stats["max_submit_time"], elapsed)
+        return accepted
+
+    def _worker_loop(self):
+        params = [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality]
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            frame, path, callback = item
+            start = time.perf_counter()
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                success = cv2.imwrite(path, frame, params)
+            except Exception as e:
+                print(f"Errore nel salvare l'immagine: {str(e)}")
+                success = False
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.stats["saved" if success else "failed"] += 1
+                self.stats["encode_time"] += elapsed
+            if callback is not None:
+                callback(path, success)
+
+    def pending_count(self):
+        return self.pending.qsize()
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+        done = stats["saved"] + stats["failed"]
+        calls = stats["submitted"] + stats["rejected"]
+        stats["avg_encode_ms"] = 1000 * stats["encode_time"] / done if done else 0.0
+        stats["avg_submit_ms"] = 1000 * stats["submit_time"] / calls if calls else 0.0
+        stats["max_submit_ms"] = 1000 * stats["max_submit_time"]
+        return stats
@@ -0,0 +1,123 @@
+# PowerPolicy.py
+
+import time
+import threading
+import cv2
+
+
+class PowerPolicy:
+    """
+    Modalità a basso consumo della cattura.
+
+    Si entra in risparmio quando la scena è ferma da idle_seconds, non si
+    sta registrando e nessuno sta usando la finestra (ridotta a icona, o
+    nessun input da idle_seconds): la cattura scende a low_power_fps e
+    l'analisi gira solo su un frame ogni analysis_stride. Movimento nella
+    scena, input dell'utente o l'avvio di una registrazione riportano
+    subito alla piena velocità, interrompendo l'attesa della cattura.
+
+    Il movimento si misura su una miniatura in scala di grigi di pochi
+    pixel: costa molto meno dell'analisi che permette di saltare.
+    """
+
+    def __init__(self, enabled=True, idle_seconds=60, low_power_fps=5, analysis_stride=3,
+                 motion_threshold=4.0):
+        self.enabled = enabled
+        self.idle_seconds = idle_seconds
+        self.low_power_fps = low_power_fps
+        self.analysis_stride = max(1, analysis_stride)
+        self.motion_threshold = motion_threshold
+        self.on_wake = None       # Chiamata al ritorno alla piena velocità (es. wake_event.set)
+
+        self.lock = threading.Lock()
+        now = time.monotonic()
+        self.last_motion = now
+        self.last_input = now
+        self.recording = False
+        self.window_visible = True
+        self.low_power = False
+        self.previous = None
+        self.frame_counter = 0
+        self.low_power_seconds = 0.0
+        self.low_power_since = None
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(enabled=settings["enabled"], idle_seconds=settings["idle_seconds"],
+                   low_power_fps=settings["low_power_fps"],
+                   analysis_stride=settings["analysis_stride"],
+                   motion_threshold=settings["motion_threshold"])
+
+    # --- Segnali di attività ---
+
+    def notify_input(self):
+        """Input dell'utente nella finestra (mouse, tastiera)"""
+        self.last_input = time.monotonic()
+        self.wake()
+
+    def set_recording(self, recording):
+        self.recording = recording
+        if recording:
+            self.wake()
+
+    def set_window_visible(self, visible):
+        self.window_visible = visible
+        if visible:
+            self.notify_input()
+
+    def observe(self, frame):
+        """Confronta il frame con il precedente su una miniatura; True se la scena si è mossa"""
+        thumbnail = cv2.cvtColor(cv2.resize(frame, (32, 18), interpolation=cv2.INTER_AREA),
+                                 cv2.COLOR_BGR2GRAY)
+        previous, self.previous = self.previous, thumbnail
+        if previous is None:
+            return False
+        moved = cv2.absdiff(previous, thumbnail).mean() > self.motion_threshold
+        if moved:
+            self.last_motion = time.monotonic()
+            self.wake()
+        else:
+            self.update()
+        return moved
+
+    # --- Decisioni ---
+
+    def update(self):
+        now = time.monotonic()
+        unattended = not self.window_visible or now - self.last_input > self.idle_seconds
+        low_power = (self.enabled and not self.recording and unattended
+                     and now - self.last_motion > self.idle_seconds)
+        self.set_low_power(low_power)
+
+    def wake(self):
+        if self.set_low_power(False) and self.on_wake is not None:
+            self.on_wake()
+
+    def set_low_power(self, low_power):
+        """Restituisce True se lo stato è cambiato"""
+        with self.lock:
+            if low_power == self.low_power:
+                return False
+            self.low_power = low_power
+            now = time.monotonic()
+            if low_power:
+                self.low_power_since = now
+            else:
+                self.low_power_seconds += now - self.low_power_since
+                self.low_power_since = None
+        print("Risparmio energetico attivo" if low_power else "Piena velocità ripristinata")
+        return True
+
+    def capture_interval(self):
+        """Intervallo minimo tra due catture (0 = piena velocità della fotocamera)"""
+        return 1.0 / self.low_power_fps if self.low_power and self.low_power_fps > 0 else 0.0
+
+    def should_analyse(self):
+        """In risparmio solo un frame ogni analysis_stride viene elaborato"""
+        self.frame_counter += 1
+        return not self.low_power or self.frame_counter % self.analysis_stride == 0
+
+    def get_stats(self):
+        with self.lock:
+            current = time.monotonic() - self.low_power_since if self.low_power else 0.0
+            return {"low_power": self.low_power, "low_power_seconds": self.low_power_seconds + current}
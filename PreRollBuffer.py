@@ -0,0 +1,106 @@
+# PreRollBuffer.py
+
+import time
+import queue
+import threading
+import collections
+import cv2
+import numpy as np
+
+
+class PreRollBuffer:
+    """
+    Buffer circolare sempre attivo con gli ultimi N secondi di video,
+    conservati come JPEG per contenere l'uso di RAM (es. su Raspberry Pi).
+
+    add() non blocca il thread di cattura: la compressione avviene su un
+    thread dedicato, che scarta i frame se resta indietro.
+    """
+
+    def __init__(self, seconds=5, jpeg_quality=75, fps=15, max_bytes=32 * 1024 * 1024):
+        self.seconds = seconds
+        self.jpeg_quality = jpeg_quality
+        self.fps = fps
+        self.max_bytes = max_bytes
+
+        self.frames = collections.deque()  # (timestamp, jpeg bytes)
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.last_accepted = 0.0
+
+        self.pending = queue.Queue(maxsize=2)
+        self.running = False
+        self.worker = None
+
+    def start(self):
+        self.running = True
+        self.worker = threading.Thread(target=self._encode_loop, daemon=True)
+        self.worker.start()
+
+    def stop(self):
+        self.running = False
+        if self.worker:
+            self.pending.put(None)
+            self.worker.join()
+            self.worker = None
+        self.clear()
+
+    def add(self, frame, timestamp=None):
+        """Propone un frame al buffer, campionato a self.fps"""
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        if timestamp - self.last_accepted < 1.0 / self.fps:
+            return
+        try:
+            self.pending.put_nowait((timestamp, frame))
+            self.last_accepted = timestamp
+        except queue.Full:
+            pass
+
+    def _encode_loop(self):
+        params = [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality]
+        while self.running:
+            item = self.pending.get()
+            if item is None:
+                break
+            timestamp, frame = item
+            ok, jpeg = cv2.imencode(".jpg", frame, params)
+            if not ok:
+                continue
+            data = jpeg.tobytes()
+            with self.lock:
+                self.frames.append((timestamp, data))
+                self.total_bytes += len(data)
+                self._evict(timestamp)
+
+    def _evict(self, now):
+        while self.frames and (now - self.frames[0][0] > self.seconds
+                               or self.total_bytes > self.max_bytes):
+            _, data = self.frames.popleft()
+            self.total_bytes -= len(data)
+
+    def snapshot(self):
+        """Restituisce (timestamp, jpeg) dei frame nel buffer, dal più vecchio"""
+        with self.lock:
+            return list(self.frames)
+
+    def clear(self):
+        with self.lock:
+            self.frames.clear()
+            self.total_bytes = 0
+
+    def get_stats(self):
+        """Occupazione di memoria del buffer e byte medi per secondo di pre-roll"""
+        with self.lock:
+            count = len(self.frames)
+            total = self.total_bytes
+            span = self.frames[-1][0] - self.frames[0][0] if count > 1 else 0.0
+        return {
+            "frames": count,
+            "seconds": span,
+            "bytes": total,
+            "bytes_per_second": total / span if span > 0 else 0.0,
+        }
+
+    @staticmethod
+    def decode(jpeg):
+        return cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
@@ -4,19 +4,37 @@ import os
 import math
 from datetime import datetime
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
-                            QPushButton, QScrollArea)
+                            QPushButton, QScrollArea, QApplication, QWidget,
+                            QSlider, QComboBox)
 from PyQt6.QtGui import QPixmap, QFont, QKeyEvent
 from PyQt6.QtCore import Qt
 
+from ImageViewerEngine import ImageViewerEngine
+from VideoPlayer import VideoPlayer, SPEEDS
+
 class PreviewDialog(QDialog):
-    def __init__(self, file_paths, initial_index, parent=None):
+    def __init__(self, file_paths, initial_index, parent=None, catalog=None):
         super().__init__(parent)
         self.setWindowTitle("Anteprima Media")
         self.setModal(True)
         self.setStyleSheet("background-color: #2D2D30; color: white;")
         
-        self.file_paths = sorted(file_paths)
+        self.file_paths = list(file_paths)  # Stesso ordine della galleria
         self.current_index = initial_index
+        self.catalog = catalog
+
+        # Decodifica a risoluzione dello schermo, con prefetch delle immagini vicine
+        screen = self.screen() or QApplication.primaryScreen()
+        target = screen.availableGeometry().size() * screen.devicePixelRatio()
+        self.target_size = target
+        self.viewer = ImageViewerEngine(self.file_paths, target)
+        self.viewer.image_ready.connect(self.on_image_ready)
+        self.viewer.image_failed.connect(self.on_image_failed)
+        self.viewer.start()
+        self.finished.connect(self.viewer.stop)
+        self.video_player = None
+        self.video_duration = 0.0
+        self.finished.connect(self.stop_video)
         
         self.init_ui()
         self.load_media(self.current_index)
@@ -32,6 +50,28 @@ class PreviewDialog(QDialog):
         self.scroll_area.setWidget(self.media_label)
         main_layout.addWidget(self.scroll_area)
 
+        # Controlli di riproduzione, visibili solo per i video
+        self.video_controls = QWidget()
+        video_layout = QHBoxLayout(self.video_controls)
+        video_layout.setContentsMargins(0, 0, 0, 0)
+        self.play_button = QPushButton("▶")
+        self.play_button.setFixedWidth(40)
+        self.play_button.clicked.connect(self.toggle_playback)
+        self.seek_slider = QSlider(Qt.Orientation.Horizontal)
+        self.seek_slider.sliderMoved.connect(self.on_slider_moved)
+        self.seek_slider.sliderReleased.connect(self.on_slider_released)
+        self.time_label = QLabel("00:00 / 00:00")
+        self.speed_combo = QComboBox()
+        for speed in SPEEDS:
+            self.speed_combo.addItem(f"{speed}x", speed)
+        self.speed_combo.currentIndexChanged.connect(self.on_speed_changed)
+        video_layout.addWidget(self.play_button)
+        video_layout.addWidget(self.seek_slider)
+        video_layout.addWidget(self.time_label)
+        video_layout.addWidget(self.speed_combo)
+        self.video_controls.hide()
+        main_layout.addWidget(self.video_controls)
+
         self.info_label = QLabel()
         self.info_label.setFont(QFont("Arial", 10))
         self.info_label.setStyleSheet("padding: 10px; background-color: #3C3C3C; border-radius: 5px;")
@@ -60,6 +100,7 @@ class PreviewDialog(QDialog):
         if not 0 <= index < len(self.file_paths):
             return
 
+        self.stop_video()
         self.current_index = index
         file_path = self.file_paths[index]
         file_name = os.path.basename(file_path)
@@ -68,29 +109,118 @@ class PreviewDialog(QDialog):
         self.next_button.setEnabled(index < len(self.file_paths) - 1)
 
         if file_name.lower().endswith(('.png', '.jpg', '.jpeg')):
-            pixmap = QPixmap(file_path)
-            if not pixmap.isNull():
-                self.media_label.setPixmap(pixmap)
-            else:
+            image = self.viewer.request(index)
+            if image is not None:
+                self.show_image(image)
+            elif self.viewer.is_failed(index):
                 self.media_label.setText("Impossibile caricare l'immagine.")
+            else:
+                self.media_label.setText("Caricamento...")
         else:
-            self.media_label.setText(f"🎬\n\n{file_name}\n\n(Per riprodurre, apri con un lettore multimediale esterno)")
-            self.media_label.setStyleSheet("font-size: 24px;")
+            self.media_label.setText("Caricamento...")
+            self.start_video(file_path)
+
+        self.info_label.setText(self.describe(file_path))
 
+    def describe(self, file_path):
+        """Informazioni sul file: dal catalogo se presente, altrimenti dal filesystem"""
+        file_name = os.path.basename(file_path)
+        record = self.catalog.get(file_path) if self.catalog is not None else None
         try:
-            size = os.path.getsize(file_path)
-            mtime = os.path.getmtime(file_path)
-            mod_time = datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M:%S')
-            
-            info_text = (
-                f"<b>File:</b> {file_name}<br>"
-                f"<b>Percorso:</b> {file_path}<br>"
-                f"<b>Dimensione:</b> {self.format_size(size)}<br>"
-                f"<b>Modificato il:</b> {mod_time}"
-            )
-            self.info_label.setText(info_text)
-        except Exception as e:
-            self.info_label.setText(f"Impossibile leggere le informazioni del file: {e}")
+            if record is None:
+                record = {"size": os.path.getsize(file_path), "modified_at": os.path.getmtime(file_path)}
+        except OSError as e:
+            return f"Impossibile leggere le informazioni del file: {e}"
+
+        mod_time = datetime.fromtimestamp(record["modified_at"]).strftime('%Y-%m-%d %H:%M:%S')
+        lines = [
+            f"<b>File:</b> {file_name}",
+            f"<b>Percorso:</b> {file_path}",
+            f"<b>Dimensione:</b> {self.format_size(record['size'])}",
+        ]
+        if record.get("captured_at"):
+            captured = datetime.fromtimestamp(record["captured_at"]).strftime('%Y-%m-%d %H:%M:%S')
+            lines.append(f"<b>Acquisito il:</b> {captured}")
+        lines.append(f"<b>Modificato il:</b> {mod_time}")
+        if record.get("width") and record.get("height"):
+            lines.append(f"<b>Risoluzione:</b> {record['width']}x{record['height']}")
+        if record.get("duration"):
+            lines.append(f"<b>Durata:</b> {self.format_time(record['duration'])} "
+                         f"({record.get('frame_count') or 0} frame)")
+        if record.get("device_type") or record.get("capture_mode"):
+            lines.append(f"<b>Dispositivo:</b> {record.get('device_type') or '-'} | "
+                         f"<b>Modalità:</b> {record.get('capture_mode') or '-'}")
+        return "<br>".join(lines)
+
+    def show_image(self, image):
+        self.media_label.setStyleSheet("")
+        self.media_label.setPixmap(QPixmap.fromImage(image))
+
+    def on_image_ready(self, path, image):
+        if path == self.file_paths[self.current_index]:
+            self.show_image(image)
+
+    def on_image_failed(self, path):
+        if path == self.file_paths[self.current_index]:
+            self.media_label.setText("Impossibile caricare l'immagine.")
+
+    def start_video(self, file_path):
+        self.video_player = VideoPlayer(file_path, self.target_size, parent=self)
+        self.video_player.frame_ready.connect(self.show_image)
+        self.video_player.position_changed.connect(self.on_video_position)
+        self.video_player.duration_changed.connect(self.on_video_duration)
+        self.video_player.playback_finished.connect(lambda: self.play_button.setText("▶"))
+        self.video_player.set_speed(self.speed_combo.currentData())
+        self.video_player.start()
+        self.play_button.setText("▶")
+        self.video_controls.show()
+
+    def stop_video(self):
+        if self.video_player is None:
+            return
+        self.video_player.stop()
+        self.video_player.deleteLater()
+        self.video_player = None
+        self.video_controls.hide()
+
+    def toggle_playback(self):
+        if self.video_player is None:
+            return
+        if self.video_player.is_playing():
+            self.video_player.pause()
+            self.play_button.setText("▶")
+        else:
+            self.video_player.play()
+            self.play_button.setText("⏸")
+
+    def on_slider_moved(self, value):
+        # Durante il trascinamento basta il keyframe più vicino
+        if self.video_player is not None:
+            self.video_player.seek(value / 1000, exact=False)
+
+    def on_slider_released(self):
+        if self.video_player is not None:
+            self.video_player.seek(self.seek_slider.value() / 1000)
+
+    def on_speed_changed(self):
+        if self.video_player is not None:
+            self.video_player.set_speed(self.speed_combo.currentData())
+
+    def on_video_duration(self, seconds):
+        self.video_duration = seconds
+        self.seek_slider.setRange(0, int(seconds * 1000))
+        self.on_video_position(self.video_player.position if self.video_player else 0.0)
+
+    def on_video_position(self, seconds):
+        if not self.seek_slider.isSliderDown():
+            self.seek_slider.setValue(int(seconds * 1000))
+        self.time_label.setText(f"{self.format_time(seconds)} / "
+                                f"{self.format_time(self.video_duration)}")
+
+    def format_time(self, seconds):
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
 
     def format_size(self, size_bytes):
         if size_bytes == 0:
@@ -114,6 +244,8 @@ class PreviewDialog(QDialog):
             self.show_previous()
         elif event.key() == Qt.Key.Key_Right:
             self.show_next()
+        elif event.key() == Qt.Key.Key_Space and self.video_player is not None:
+            self.toggle_playback()
         elif event.key() == Qt.Key.Key_Escape:
             self.accept()
         else:
@@ -0,0 +1,228 @@
+# SegmentedWriter.py
+
+import os
+import re
+import glob
+import time
+import queue
+import threading
+
+from FrameTimeline import FrameTimeline
+
+# Nomi delle registrazioni dell'applicazione: <data>_<ora>[_<stream>]_0001.mp4
+SESSION_STAMP = re.compile(r"^\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}")
+SESSION_STAMP_GLOB = "[0-9]" * 4 + "-" + "[0-9]" * 2 + "-" + "[0-9]" * 2 + "_" + \
+    "[0-9]" * 2 + "-" + "[0-9]" * 2 + "-" + "[0-9]" * 2
+SEGMENT_NUMBER_GLOB = "_" + "[0-9]" * 4
+
+class RetentionPolicy:
+    """
+    Anello di conservazione dei segmenti: elimina i segmenti più vecchi
+    quando si supera la dimensione totale o l'età massima.
+    """
+
+    def __init__(self, max_total_bytes=None, max_age_seconds=None):
+        self.max_total_bytes = max_total_bytes
+        self.max_age_seconds = max_age_seconds
+
+    def is_enabled(self):
+        return bool(self.max_total_bytes) or bool(self.max_age_seconds)
+
+    def enforce(self, pattern, protected=()):
+        """Applica la politica ai file che corrispondono a pattern. Restituisce i file eliminati"""
+        if not self.is_enabled():
+            return []
+
+        segments = []
+        for path in glob.glob(pattern):
+            if path in protected:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            segments.append((stat.st_mtime, stat.st_size, path))
+        segments.sort()
+
+        total = sum(size for _, size, _ in segments)
+        total += sum(os.path.getsize(p) for p in protected if os.path.exists(p))
+        now = time.time()
+        removed = []
+        for mtime, size, path in segments:
+            too_old = self.max_age_seconds and now - mtime > self.max_age_seconds
+            too_big = self.max_total_bytes and total > self.max_total_bytes
+            if not (too_old or too_big):
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed.append(path)
+            except OSError as e:
+                print(f"Errore nell'eliminare il segmento {path}: {e}")
+        return removed
+
+
+class SegmentedWriter:
+    """
+    Scrive il video in una sequenza di segmenti, ruotando ogni N secondi
+    (conteggio esatto dei frame) o ogni N byte. Senza limiti scrive un unico
+    file nel percorso indicato.
+
+    Il nuovo segmento viene aperto prima di chiudere il precedente, e la
+    chiusura (flush dell'encoder, scrittura dell'indice MP4, retention) avviene
+    su un thread separato: il ciclo di scrittura non perde frame.
+
+    I frame con timestamp passano da un FrameTimeline quando l'encoder è a
+    FPS costanti, oppure vengono scritti con il loro timestamp quando
+    l'encoder supporta il frame rate variabile.
+    """
+
+    SIZE_CHECK_INTERVAL = 15  # frame tra due controlli della dimensione del file
+
+    def __init__(self, encoder_factory, path, width, height, fps,
+                 segment_seconds=None, segment_bytes=None, retention=None):
+        self.encoder_factory = encoder_factory
+        self.path = path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.segment_seconds = segment_seconds
+        self.segment_bytes = segment_bytes
+        self.retention = retention or RetentionPolicy()
+
+        self.encoder = None
+        self.encoder_lock = threading.Lock()   # self.encoder cambia nel thread di scrittura, il closer lo legge
+        self.segment_index = 0
+        self.segment_frames = 0
+        self.segment_start = None
+        self.segment_paths = []
+        self.timeline = FrameTimeline(fps)
+        self.max_frames = int(round(segment_seconds * fps)) if segment_seconds else None
+
+        self.close_queue = queue.Queue()
+        self.closer_thread = None
+
+    def is_segmented(self):
+        return bool(self.max_frames) or bool(self.segment_bytes)
+
+    def segment_path(self, index):
+        """Percorso del segmento index: <nome>_0001.mp4"""
+        if not self.is_segmented():
+            return self.path
+        stem, ext = os.path.splitext(self.path)
+        return f"{stem}_{index:04d}{ext}"
+
+    def segment_pattern(self):
+        """
+        Pattern glob dei segmenti soggetti alla retention di questo writer.
+
+        Per i nomi dell'applicazione (<data>_<ora>[_<stream>].mp4) comprende
+        i segmenti dello stesso stream di tutte le sessioni, e solo quelli:
+        il flusso grezzo (_raw) ha la sua retention e non tocca i segmenti
+        dell'elaborato, né viceversa. Per qualunque altro nome comprende solo
+        i segmenti di questa sessione. Altri file della cartella (es.
+        vacanze_0001.mp4) non vengono mai toccati.
+        """
+        directory = glob.escape(os.path.dirname(self.path))
+        stem, ext = os.path.splitext(os.path.basename(self.path))
+        match = SESSION_STAMP.match(stem)
+        if match:
+            stream_suffix = glob.escape(stem[match.end():])
+            name = SESSION_STAMP_GLOB + stream_suffix
+        else:
+            name = glob.escape(stem)
+        return os.path.join(directory, name + SEGMENT_NUMBER_GLOB + glob.escape(ext))
+
+    def open(self):
+        if self.is_segmented():
+            self.closer_thread = threading.Thread(target=self._closer_loop, daemon=True)
+            self.closer_thread.start()
+        return self._open_segment()
+
+    def _open_segment(self):
+        self.segment_index += 1
+        path = self.segment_path(self.segment_index)
+        encoder = self.encoder_factory()
+        if not encoder.open(path, self.width, self.height, self.fps):
+            return False
+        with self.encoder_lock:
+            self.encoder = encoder
+        self.segment_frames = 0
+        self.segment_start = None
+        self.segment_paths.append(path)
+        return True
+
+    def write(self, frame, timestamp=None):
+        """Scrive un frame; timestamp è l'istante di cattura (time.monotonic)"""
+        if timestamp is None or self.encoder.supports_timestamps:
+            self._write_frame(frame, timestamp)
+        else:
+            for output_frame in self.timeline.push(frame, timestamp):
+                self._write_frame(output_frame, None)
+
+    def _write_frame(self, frame, timestamp):
+        if self._should_rotate(timestamp):
+            self.rotate()
+        self.encoder.write(frame, timestamp)
+        if self.segment_frames == 0:
+            self.segment_start = timestamp
+        self.segment_frames += 1
+
+    def _should_rotate(self, timestamp=None):
+        if self.segment_frames == 0:
+            return False
+        if self.max_frames:
+            if timestamp is not None and self.segment_start is not None:
+                # Encoder a frame rate variabile: conta il tempo reale
+                if timestamp - self.segment_start >= self.segment_seconds:
+                    return True
+            elif self.segment_frames >= self.max_frames:
+                return True
+        if self.segment_bytes and self.segment_frames % self.SIZE_CHECK_INTERVAL == 0:
+            try:
+                return os.path.getsize(self.encoder.path) >= self.segment_bytes
+            except OSError:
+                return False
+        return False
+
+    def rotate(self):
+        """Passa al segmento successivo senza bloccare il ciclo di scrittura"""
+        old_encoder = self.encoder
+        if not self._open_segment():
+            raise Exception(f"Impossibile aprire il segmento {self.segment_index}")
+        self.close_queue.put(old_encoder)
+
+    def _closer_loop(self):
+        while True:
+            encoder = self.close_queue.get()
+            if encoder is None:
+                break
+            encoder.release()
+            with self.encoder_lock:
+                current = self.encoder
+            removed = self.retention.enforce(
+                self.segment_pattern(), protected=(current.path,) if current else ()
+            )
+            for path in removed:
+                print(f"Segmento eliminato dalla retention: {os.path.basename(path)}")
+
+    def release(self, end_time=None):
+        """Chiude il writer; con end_time il video viene completato fino a quell'istante"""
+        if self.encoder and end_time is not None and not self.encoder.supports_timestamps:
+            for frame in self.timeline.finish(end_time):
+                self._write_frame(frame, None)
+        if self.encoder:
+            self.encoder.release()
+            with self.encoder_lock:
+                self.encoder = None
+        if self.closer_thread:
+            self.close_queue.put(None)
+            self.closer_thread.join()
+            self.closer_thread = None
+            # L'ultimo segmento appena chiuso viene registrato nel catalogo: non si elimina
+            last_segment = self.segment_paths[-1] if self.segment_paths else None
+            removed = self.retention.enforce(
+                self.segment_pattern(), protected=(last_segment,) if last_segment else ()
+            )
+            for path in removed:
+                print(f"Segmento eliminato dalla retention: {os.path.basename(path)}")
@@ -1,10 +1,40 @@
 import os
 import json
+import atexit
+import tempfile
+import threading
+
+SCHEMA_VERSION = 1
+
+
+def migrate_v1(settings):
+    """v0 -> v1: le sezioni annidate devono essere dizionari (non null)"""
+    for key in ("encoder", "recording", "photo", "dump", "timelapse", "preroll"):
+        if settings.get(key) is None:
+            settings.pop(key, None)
+    return settings
+
+
+# Migrazioni dello schema: versione di arrivo -> funzione
+MIGRATIONS = {
+    1: migrate_v1,
+}
+
 
 class SettingsManager:
-    """Gestisce le impostazioni dell'applicazione per tutti i dispositivi"""
+    """
+    Gestisce le impostazioni dell'applicazione per tutti i dispositivi.
+    
+    Il file viene letto una sola volta: i getter leggono dalla memoria.
+    Le modifiche notificano subito gli iscritti (subscribe) e vengono
+    scritte su disco al più una volta ogni save_delay secondi (più
+    modifiche ravvicinate, es. il trascinamento di uno slider, diventano
+    una sola scrittura). La scrittura è atomica: file temporaneo nella
+    stessa cartella, fsync e os.replace, quindi un crash non lascia mai
+    un settings.json troncato.
+    """
     
-    def __init__(self):
+    def __init__(self, save_delay=1.0):
         # Crea la directory VisionPy_Pro se non esiste
         self.app_dir = os.path.expanduser("~/VisionPy_Pro")
         self.settings_file = os.path.join(self.app_dir, "settings.json")
@@ -15,51 +45,170 @@ class SettingsManager:
             "device_type": "pc",          # DEFAULT: PC
             "resolution": [1280, 720],
             "fps": 30,
-            "camera_index": 0             # NEW: Per PC/Jetson, quale webcam usare
+            "camera_index": 0,            # NEW: Per PC/Jetson, quale webcam usare
+            "encoder": {},                # Override del profilo di encoding del dispositivo
+            "recording": {                # Registrazione a segmenti (0 = disattivato)
+                "segment_seconds": 0,
+                "segment_mb": 0,
+                "retention_mb": 0,
+                "retention_hours": 0,
+                "raw_stream": False,      # Registra anche il flusso grezzo in parallelo
+                "raw_resolution": None    # None = risoluzione della fotocamera
+            },
+            "photo": {
+                "jpeg_quality": 95,
+                "burst_count": 10         # Foto per ogni scatto a raffica
+            },
+            "dump": {
+                "seconds": 60             # Capacità del ring del dump grezzo
+            },
+            "timelapse": {
+                "interval": 10,           # Secondi tra due scatti
+                "playback_fps": 25,       # FPS del video time-lapse
+                "low_power_fps": 2        # Cadenza di cattura tra gli scatti (0 = piena)
+            },
+            "preroll": {                  # Secondi registrati prima del trigger (0 = disattivato)
+                "seconds": 0,
+                "jpeg_quality": 75,
+                "fps": 15,
+                "max_mb": 32
+            },
+            "models": {
+                "idle_unload_seconds": 0  # Scarica i modelli inutilizzati (0 = mai)
+            },
+            "processing": {
+                "workers": 0,             # Processi di elaborazione (0 = nel thread della camera)
+                "pipeline": False         # Cattura, regolazioni, analisi e uscita in thread separati
+            },
+            "power": {                    # Risparmio energetico con scena ferma e finestra inutilizzata
+                "enabled": True,
+                "idle_seconds": 60,
+                "low_power_fps": 5,
+                "analysis_stride": 3,     # In risparmio si analizza un frame ogni N
+                "motion_threshold": 4.0   # Differenza media (0-255) che conta come movimento
+            },
+            "stream": {                   # Streaming MJPEG/HTTP dello stream elaborato
+                "enabled": False,
+                "host": "0.0.0.0",
+                "port": 8080,
+                "qualities": [50, 80],    # Livelli JPEG: ogni frame è codificato una volta per livello
+                "max_fps": 15
+            }
         }
         
         # Crea la directory se non esiste
         os.makedirs(self.app_dir, exist_ok=True)
+        
+        self.save_delay = save_delay
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()   # Serializza i salvataggi su disco
+        self.subscribers = []   # (chiave o None, callback)
+        self.save_timer = None
+        self.writes = 0         # Scritture su disco effettuate
+        self.settings = self.read_file()
+        
+        # Le modifiche ancora in attesa vengono scritte all'uscita
+        atexit.register(self.flush)
     
-    def load_settings(self):
-        """Carica le impostazioni dal file JSON"""
+    def read_file(self):
+        """Legge il file JSON, applica le migrazioni e lo unisce ai default"""
         if not os.path.exists(self.settings_file):
-            return self.default_settings.copy()
+            return {**self.default_settings, "schema_version": SCHEMA_VERSION}
         
         try:
             with open(self.settings_file, 'r', encoding='utf-8') as f:
                 settings = json.load(f)
-            
-            # Unisce le impostazioni caricate con quelle di default
-            return {**self.default_settings, **settings}
         except (json.JSONDecodeError, IOError):
             print("Errore nel leggere il file delle impostazioni, uso quelle di default.")
-            return self.default_settings.copy()
+            return {**self.default_settings, "schema_version": SCHEMA_VERSION}
+        
+        version = settings.get("schema_version", 0)
+        for target in sorted(MIGRATIONS):
+            if version < target:
+                settings = MIGRATIONS[target](settings)
+                print(f"✓ Impostazioni migrate alla versione {target}")
+        settings["schema_version"] = SCHEMA_VERSION
+        
+        # Unisce le impostazioni caricate con quelle di default
+        return {**self.default_settings, **settings}
+    
+    def load_settings(self):
+        """Restituisce una copia delle impostazioni in memoria"""
+        with self.lock:
+            return json.loads(json.dumps(self.settings))
     
     def save_setting(self, key, value):
-        """Salva una singola impostazione nel file JSON"""
-        settings = self.load_settings()
-        settings[key] = value
-        
-        try:
-            os.makedirs(self.app_dir, exist_ok=True)
-            with open(self.settings_file, 'w', encoding='utf-8') as f:
-                json.dump(settings, f, indent=4)
-        except IOError as e:
-            print(f"Errore nel salvare l'impostazione '{key}': {e}")
+        """Aggiorna un'impostazione in memoria, la notifica e programma il salvataggio"""
+        with self.lock:
+            if self.settings.get(key) == value:
+                return
+            self.settings[key] = value
+            if self.save_timer is None:
+                self.save_timer = threading.Timer(self.save_delay, self.flush)
+                self.save_timer.daemon = True
+                self.save_timer.start()
+            subscribers = [callback for wanted, callback in self.subscribers
+                           if wanted is None or wanted == key]
+        for callback in subscribers:
+            callback(key, value)
+    
+    def subscribe(self, callback, key=None):
+        """callback(key, value) a ogni modifica (di key, o di tutte se None)"""
+        with self.lock:
+            self.subscribers.append((key, callback))
+    
+    def unsubscribe(self, callback):
+        with self.lock:
+            self.subscribers = [(k, c) for k, c in self.subscribers if c != callback]
+    
+    def flush(self, force=False):
+        """Scrive subito le modifiche in attesa (file temporaneo + rename atomico)"""
+        # Un solo salvataggio alla volta (timer, chiusura, atexit): dall'istantanea
+        # fino al rename, così un'istantanea vecchia non sostituisce una più recente
+        with self.write_lock:
+            with self.lock:
+                if self.save_timer is None and not force:
+                    return
+                if self.save_timer is not None:
+                    self.save_timer.cancel()
+                    self.save_timer = None
+                data = json.dumps(self.settings, indent=4)
+            
+            try:
+                os.makedirs(self.app_dir, exist_ok=True)
+                try:
+                    mode = os.stat(self.settings_file).st_mode & 0o777
+                except FileNotFoundError:
+                    mode = 0o644
+                fd, tmp_path = tempfile.mkstemp(dir=self.app_dir, prefix=".settings-", suffix=".tmp")
+                try:
+                    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                        # mkstemp crea il file con permessi 0600: si mantengono quelli del file attuale
+                        os.fchmod(f.fileno(), mode)
+                        f.write(data)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_path, self.settings_file)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+                self.writes += 1
+            except IOError as e:
+                print(f"Errore nel salvare le impostazioni: {e}")
     
     def get_device_type(self):
         """Restituisce il tipo di dispositivo salvato"""
-        settings = self.load_settings()
+        settings = self.settings
         return settings.get("device_type", "pc")
     
     def set_device_type(self, device_type):
-        """Salva il tipo di dispositivo"""
+        """Salva il tipo di dispositivo (subito: al primo avvio decide se mostrare il dialogo)"""
         self.save_setting("device_type", device_type)
+        self.flush(force=True)
     
     def get_camera_index(self):
         """Restituisce l'indice della webcam (per PC/Jetson)"""
-        settings = self.load_settings()
+        settings = self.settings
         return settings.get("camera_index", 0)
     
     def set_camera_index(self, index):
@@ -68,7 +217,7 @@ class SettingsManager:
     
     def get_resolution(self):
         """Restituisce la risoluzione salvata"""
-        settings = self.load_settings()
+        settings = self.settings
         res = settings.get("resolution", [1280, 720])
         return tuple(res)
     
@@ -78,9 +227,71 @@ class SettingsManager:
     
     def get_fps(self):
         """Restituisce gli FPS salvati"""
-        settings = self.load_settings()
+        settings = self.settings
         return settings.get("fps", 30)
     
     def set_fps(self, fps):
         """Salva gli FPS"""
         self.save_setting("fps", fps)
+    
+    def get_encoder_settings(self):
+        """Restituisce gli override dell'encoder video (backend e opzioni)"""
+        settings = self.settings
+        return dict(settings.get("encoder", {}))
+    
+    def set_encoder_settings(self, encoder_settings):
+        """Salva gli override dell'encoder video"""
+        self.save_setting("encoder", encoder_settings)
+    
+    def get_recording_settings(self):
+        """Restituisce le impostazioni di registrazione (segmenti e retention)"""
+        settings = self.settings
+        return {**self.default_settings["recording"], **settings.get("recording", {})}
+    
+    def set_recording_settings(self, recording_settings):
+        """Salva le impostazioni di registrazione"""
+        self.save_setting("recording", recording_settings)
+    
+    def get_preroll_settings(self):
+        """Restituisce le impostazioni del buffer di pre-roll"""
+        settings = self.settings
+        return {**self.default_settings["preroll"], **settings.get("preroll", {})}
+    
+    def set_preroll_settings(self, preroll_settings):
+        """Salva le impostazioni del buffer di pre-roll"""
+        self.save_setting("preroll", preroll_settings)
+    
+    def get_photo_settings(self):
+        """Restituisce le impostazioni delle foto (qualità JPEG, raffica)"""
+        settings = self.settings
+        return {**self.default_settings["photo"], **settings.get("photo", {})}
+    
+    def get_dump_settings(self):
+        """Restituisce le impostazioni del dump grezzo"""
+        settings = self.settings
+        return {**self.default_settings["dump"], **settings.get("dump", {})}
+    
+    def get_model_settings(self):
+        """Restituisce le impostazioni del registro dei modelli"""
+        settings = self.settings
+        return {**self.default_settings["models"], **settings.get("models", {})}
+    
+    def get_processing_settings(self):
+        """Restituisce le impostazioni dell'elaborazione multiprocesso"""
+        settings = self.settings
+        return {**self.default_settings["processing"], **settings.get("processing", {})}
+    
+    def get_power_settings(self):
+        """Restituisce le impostazioni del risparmio energetico"""
+        settings = self.settings
+        return {**self.default_settings["power"], **settings.get("power", {})}
+    
+    def get_stream_settings(self):
+        """Restituisce le impostazioni dello streaming MJPEG"""
+        settings = self.settings
+        return {**self.default_settings["stream"], **settings.get("stream", {})}
+    
+    def get_timelapse_settings(self):
+        """Restituisce le impostazioni del time-lapse"""
+        settings = self.settings
+        return {**self.default_settings["timelapse"], **settings.get("timelapse", {})}
@@ -0,0 +1,42 @@
+# SharedFrameRing.py
+
+import numpy as np
+from multiprocessing import shared_memory
+
+
+class SharedFrameRing:
+    """
+    Ring di slot per frame in un blocco di multiprocessing.shared_memory.
+
+    Il processo principale crea il ring (name=None), i worker vi si
+    collegano per nome: un frame passa da un processo all'altro senza
+    essere serializzato, tra processi viaggiano solo indice dello slot e
+    forma. L'assegnazione degli slot liberi è compito di chi crea il ring.
+    """
+
+    def __init__(self, slots, slot_bytes, name=None):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.owner = name is None
+        if self.owner:
+            self.memory = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        else:
+            try:
+                # Il blocco appartiene al processo principale: chi si collega non lo traccia
+                self.memory = shared_memory.SharedMemory(name=name, track=False)
+            except TypeError:
+                self.memory = shared_memory.SharedMemory(name=name)
+        self.name = self.memory.name
+
+    def view(self, slot, shape):
+        """Array numpy (uint8) che punta direttamente allo slot indicato"""
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.memory.buf,
+                          offset=slot * self.slot_bytes)
+
+    def fits(self, frame):
+        return frame.dtype == np.uint8 and frame.nbytes <= self.slot_bytes
+
+    def close(self):
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
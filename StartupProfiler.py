@@ -0,0 +1,38 @@
+# StartupProfiler.py
+
+import time
+
+
+class StartupProfiler:
+    """
+    Misura le fasi dell'avvio (import, finestra, fotocamera, primo frame,
+    caricamenti in background). Le misure costano poco e vengono sempre
+    registrate; il resoconto viene stampato solo con --startup-profile.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.enabled = False
+        self.marks = []          # (fase, secondi dall'avvio)
+        self.reported = set()
+
+    def mark(self, phase):
+        self.marks.append((phase, time.perf_counter() - self.start))
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def report(self, title):
+        """Stampa le fasi registrate finora (una volta per titolo)"""
+        if not self.enabled or title in self.reported:
+            return
+        self.reported.add(title)
+        print(f"--- Profilo di avvio: {title} ---")
+        previous = 0.0
+        for phase, at in self.marks:
+            print(f"{1000 * at:8.1f} ms  (+{1000 * (at - previous):7.1f} ms)  {phase}")
+            previous = at
+
+
+# Istanza condivisa: main.py la abilita, i moduli registrano le fasi
+profiler = StartupProfiler()
@@ -0,0 +1,265 @@
+# StreamServer.py
+
+import time
+import socket
+import asyncio
+import threading
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+
+BOUNDARY = b"visionpyframe"
+SEND_BUFFER_BYTES = 128 * 1024   # Buffer di invio per client: circa un frame, non una coda
+
+INDEX_PAGE = b"""<!DOCTYPE html>
+<html><head><title>VisionPy Pro</title></head>
+<body style="margin:0;background:#1E1E1E">
+<img src="/stream" style="width:100%;height:auto">
+</body></html>
+"""
+
+
+class StreamClient:
+    """Un client MJPEG collegato: qualità richiesta, primo frame accettabile e ultimo inviato"""
+
+    def __init__(self, address, quality, start_seq=0):
+        self.address = address
+        self.quality = quality
+        self.start_seq = start_seq   # Frame pubblicato al collegamento: i precedenti sono vecchi
+        self.last_seq = -1
+        self.sent = 0
+        self.skipped = 0
+
+
+class StreamServer:
+    """
+    Server HTTP (asyncio) per vedere da remoto lo stream elaborato:
+    - /         pagina con lo stream
+    - /stream   MJPEG (multipart/x-mixed-replace), ?quality=N
+    - /snapshot ultimo frame in JPEG, ?quality=N
+
+    publish() viene chiamata dal thread della cattura e si limita a tenere
+    un riferimento all'ultimo frame: senza client non si codifica nulla.
+    Con client collegati ogni frame viene codificato una sola volta per
+    livello di qualità richiesto (al più max_fps volte al secondo) e gli
+    stessi byte vengono inviati a tutti. Un client lento non accumula
+    frame: quando ha finito di ricevere il precedente riceve il più
+    recente, saltando quelli intermedi. Le qualità richieste vengono
+    arrotondate al livello configurato più vicino. Un client appena
+    collegato riceve solo frame pubblicati da quel momento, mai un JPEG
+    rimasto in cache da quando lo stream si era fermato.
+    """
+
+    def __init__(self, host="0.0.0.0", port=8080, qualities=(80,), max_fps=15):
+        self.host = host
+        self.port = port
+        self.qualities = tuple(sorted(qualities)) or (80,)
+        self.max_fps = max_fps
+        self.loop = None
+        self.thread = None
+        self.server = None
+        self.ready = threading.Event()
+        self.executor = ThreadPoolExecutor(max_workers=len(self.qualities), thread_name_prefix="mjpeg")
+
+        self.lock = threading.Lock()
+        self.frame = None           # Ultimo frame pubblicato (BGR), non copiato
+        self.seq = 0                # Numero dell'ultimo frame pubblicato
+        self.encoded = {}           # qualità -> (seq, jpeg)
+        self.clients = set()
+        self.new_frame = None       # asyncio.Event: c'è un frame da codificare
+        self.frame_encoded = None   # asyncio.Condition: nuovi JPEG pronti
+        self.stats = {"published": 0, "encoded": 0, "sent": 0, "skipped": 0, "snapshots": 0}
+
+    # --- Thread della cattura ---
+
+    def publish(self, frame, timestamp=None):
+        """Nuovo frame elaborato (BGR); da qualunque thread, costo trascurabile senza client"""
+        with self.lock:
+            self.frame = frame
+            self.seq += 1
+            self.stats["published"] += 1
+            if not self.clients or self.loop is None:
+                return
+        self.loop.call_soon_threadsafe(self.new_frame.set)
+
+    # --- Avvio e arresto ---
+
+    def start(self):
+        """Avvia il server nel suo thread; restituisce False se la porta non è disponibile"""
+        self.thread = threading.Thread(target=self._run, name="stream-server", daemon=True)
+        self.thread.start()
+        self.ready.wait(timeout=5)
+        return self.server is not None
+
+    def stop(self):
+        if self.loop is not None and self.thread is not None and self.thread.is_alive():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=5)
+        self.executor.shutdown(wait=False)
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.new_frame = asyncio.Event()
+        self.frame_encoded = asyncio.Condition()
+        try:
+            self.server = self.loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port))
+        except OSError as e:
+            print(f"Errore nell'avvio dello streaming su {self.host}:{self.port}: {e}")
+            self.ready.set()
+            self.loop.close()
+            return
+        # Con port=0 il sistema sceglie una porta libera
+        self.port = self.server.sockets[0].getsockname()[1]
+        print(f"✓ Streaming MJPEG su http://{self.host}:{self.port}/")
+        encoder = self.loop.create_task(self._encode_loop())
+        self.ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            encoder.cancel()
+            self.server.close()
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.close()
+
+    # --- Codifica (una per frame e per qualità) ---
+
+    def nearest_quality(self, quality):
+        if quality is None:
+            return self.qualities[-1]
+        return min(self.qualities, key=lambda level: abs(level - quality))
+
+    @staticmethod
+    def encode(frame, quality):
+        ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return buffer.tobytes() if ok else None
+
+    async def _encode_loop(self):
+        last_encode = 0.0
+        while True:
+            await self.new_frame.wait()
+            self.new_frame.clear()
+            # Limite di FPS dello stream: i frame arrivati nel frattempo si saltano
+            if self.max_fps > 0:
+                delay = last_encode + 1.0 / self.max_fps - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            last_encode = time.monotonic()
+            with self.lock:
+                frame, seq = self.frame, self.seq
+                qualities = {client.quality for client in self.clients}
+            if frame is None or not qualities:
+                continue
+            # Le qualità diverse vengono codificate in parallelo (imencode rilascia il GIL)
+            qualities = sorted(qualities)
+            results = await asyncio.gather(*[
+                self.loop.run_in_executor(self.executor, self.encode, frame, quality)
+                for quality in qualities])
+            for quality, jpeg in zip(qualities, results):
+                if jpeg is not None:
+                    self.encoded[quality] = (seq, jpeg)
+                    self.stats["encoded"] += 1
+            async with self.frame_encoded:
+                self.frame_encoded.notify_all()
+
+    # --- HTTP ---
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=10)
+            method, target = request.split(b"\r\n", 1)[0].decode("latin-1").split(" ")[:2]
+            url = urlsplit(target)
+            query = parse_qs(url.query)
+            quality = int(query["quality"][0]) if query.get("quality", [""])[0].isdigit() else None
+            if method != "GET":
+                await self._respond(writer, "405 Method Not Allowed", "text/plain", b"Metodo non supportato")
+            elif url.path == "/":
+                await self._respond(writer, "200 OK", "text/html; charset=utf-8", INDEX_PAGE)
+            elif url.path == "/snapshot":
+                await self._snapshot(writer, self.nearest_quality(quality))
+            elif url.path == "/stream":
+                await self._stream(writer, self.nearest_quality(quality))
+            else:
+                await self._respond(writer, "404 Not Found", "text/plain", b"Non trovato")
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, asyncio.LimitOverrunError,
+                ValueError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            # Arresto del server con client ancora collegati
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+
+    async def _respond(self, writer, status, content_type, body):
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Length: {len(body)}\r\nCache-Control: no-cache\r\n"
+                     f"Connection: close\r\n\r\n".encode("latin-1") + body)
+        await writer.drain()
+
+    async def _snapshot(self, writer, quality):
+        with self.lock:
+            frame, seq = self.frame, self.seq
+        if frame is None:
+            await self._respond(writer, "503 Service Unavailable", "text/plain", b"Nessun frame disponibile")
+            return
+        # Se lo stream ha già codificato l'ultimo frame a questa qualità si riusano i suoi byte
+        encoded_seq, jpeg = self.encoded.get(quality, (-1, None))
+        if encoded_seq != seq:
+            jpeg = await self.loop.run_in_executor(self.executor, self.encode, frame, quality)
+        self.stats["snapshots"] += 1
+        await self._respond(writer, "200 OK", "image/jpeg", jpeg or b"")
+
+    async def _stream(self, writer, quality):
+        with self.lock:
+            start_seq = self.seq
+        client = StreamClient(writer.get_extra_info("peername"), quality, start_seq)
+        # Buffer piccoli (asyncio e socket): drain() attende che il client abbia
+        # davvero ricevuto il frame, così uno lento salta frame invece di accumularli
+        writer.transport.set_write_buffer_limits(high=0)
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER_BYTES)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: multipart/x-mixed-replace; boundary="
+                     + BOUNDARY + b"\r\nCache-Control: no-cache\r\nConnection: close\r\n\r\n")
+        with self.lock:
+            self.clients.add(client)
+        self.new_frame.set()
+        try:
+            while True:
+                async with self.frame_encoded:
+                    await self.frame_encoded.wait_for(
+                        lambda: self.encoded.get(quality, (-1, None))[0]
+                        > max(client.last_seq, client.start_seq - 1))
+                seq, jpeg = self.encoded[quality]
+                # Frame pubblicati mentre il client riceveva il precedente: saltati
+                if client.last_seq >= 0:
+                    client.skipped += seq - client.last_seq - 1
+                client.last_seq = seq
+                writer.write(b"--" + BOUNDARY + b"\r\nContent-Type: image/jpeg\r\nContent-Length: "
+                             + str(len(jpeg)).encode() + b"\r\n\r\n" + jpeg + b"\r\n")
+                await writer.drain()
+                client.sent += 1
+        finally:
+            with self.lock:
+                self.clients.discard(client)
+                self.stats["sent"] += client.sent
+                self.stats["skipped"] += client.skipped
+                last_client = not self.clients
+            # Senza client i JPEG in cache invecchiano: non vanno riusati
+            if last_client:
+                self.encoded.clear()
+
+    def get_stats(self):
+        """Contatori complessivi, compresi i client ancora collegati"""
+        with self.lock:
+            return {**self.stats, "clients": len(self.clients),
+                    "sent": self.stats["sent"] + sum(client.sent for client in self.clients),
+                    "skipped": self.stats["skipped"] + sum(client.skipped for client in self.clients)}
@@ -0,0 +1,73 @@
+# SyntheticSource.py
+
+import time
+import cv2
+import numpy as np
+
+
+class SyntheticSource:
+    """
+    Sorgente video sintetica e deterministica, con la stessa interfaccia di
+    base di CameraManager (start/stop/get_frame). Utile per benchmark e prove
+    senza una fotocamera collegata.
+    """
+
+    def __init__(self, resolution=(1280, 720), fps=30, paced=False, num_frames=None, static=False):
+        self.resolution = resolution
+        self.fps = fps
+        self.paced = paced
+        self.num_frames = num_frames
+        self.static = static      # Scena ferma: ogni frame è identico al primo
+        self.frame_index = 0
+        self.start_time = None
+        self.background = None
+
+    def start(self):
+        width, height = self.resolution
+        # Sfondo a gradiente: dà all'encoder un contenuto realistico da comprimere
+        x = np.linspace(0, 255, width, dtype=np.float32)
+        y = np.linspace(0, 255, height, dtype=np.float32)
+        self.background = np.dstack([
+            np.tile(x, (height, 1)),
+            np.tile(y[:, None], (1, width)),
+            np.full((height, width), 96, dtype=np.float32)
+        ]).astype(np.uint8)
+        self.frame_index = 0
+        self.start_time = time.monotonic()
+        return True
+
+    def stop(self):
+        self.background = None
+
+    def render(self, index):
+        """Genera il frame numero index (sempre identico a parità di indice)"""
+        width, height = self.resolution
+        frame = self.background.copy()
+        size = max(20, height // 6)
+        x = int((index * 7) % max(1, width - size))
+        y = int((height - size) / 2 + np.sin(index / 15.0) * (height - size) / 3)
+        cv2.rectangle(frame, (x, y), (x + size, y + size), (0, 200, 255), -1)
+        cv2.putText(frame, f"#{index}", (20, height - 20),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+        return frame
+
+    def get_frame(self):
+        """Restituisce il frame successivo, rispettando gli FPS se paced=True"""
+        if self.background is None:
+            return None
+        if self.num_frames is not None and self.frame_index >= self.num_frames:
+            return None
+        if self.paced:
+            deadline = self.start_time + self.frame_index / self.fps
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        frame = self.render(0 if self.static else self.frame_index)
+        self.frame_index += 1
+        return frame
+
+    def get_resolution(self):
+        return self.resolution
+
+    def get_fps(self):
+        return self.fps
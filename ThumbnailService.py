@@ -0,0 +1,276 @@
+# ThumbnailService.py
+
+import os
+import hashlib
+import threading
+import collections
+import cv2
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+VIDEO_EXTENSIONS = ('.mp4',)
+
+
+def bgr_to_qimage(frame):
+    """Converte un array BGR in una QImage indipendente dal buffer NumPy"""
+    h, w = frame.shape[:2]
+    return QImage(frame.data, w, h, frame.strides[0], QImage.Format.Format_BGR888).copy()
+
+
+class ThumbnailJob(QRunnable):
+    """Genera (o legge dalla cache su disco) la miniatura di un file"""
+
+    def __init__(self, service, path, key, generation, strip_frames=1):
+        super().__init__()
+        self.service = service
+        self.path = path
+        self.key = key
+        self.generation = generation
+        self.strip_frames = strip_frames
+
+    def is_cancelled(self):
+        return self.generation != self.service.generation
+
+    def run(self):
+        if self.is_cancelled():
+            return
+        try:
+            image = self.service.load_cached(self.key)
+            if image is None:
+                thumbnail = self.service.render(self.path, self.strip_frames, self.is_cancelled)
+                if thumbnail is None:
+                    self.service.discard(self.key)
+                    return
+                self.service.store_cached(self.key, thumbnail)
+                image = bgr_to_qimage(thumbnail)
+            if not self.is_cancelled():
+                self.service.deliver(self.path, self.key, image)
+        except Exception as e:
+            self.service.discard(self.key)
+            print(f"Errore nella miniatura di {os.path.basename(self.path)}: {e}")
+
+
+class ThumbnailService(QObject):
+    """
+    Servizio di miniature per la galleria:
+    - decodifica a risoluzione ridotta (cv2.IMREAD_REDUCED_*) su un QThreadPool
+    - fotogramma di copertina dei video (o striscia di più fotogrammi),
+      estratto con seek al keyframe invece di una lettura dall'inizio
+    - cache su disco indicizzata da percorso + mtime + dimensione, con
+      eliminazione LRU quando supera max_cache_bytes
+    - piccola cache in memoria per le riaperture della galleria
+    Le miniature arrivano con il segnale thumbnail_ready, nel thread della GUI.
+    Durante una registrazione i video vengono rimandati e il pool usa un
+    solo thread, per non sottrarre CPU all'encoder.
+    """
+    thumbnail_ready = pyqtSignal(str, QImage)
+
+    def __init__(self, cache_dir=None, size=(160, 120), max_cache_bytes=64 * 1024 * 1024,
+                 memory_items=512, max_threads=None):
+        super().__init__()
+        self.cache_dir = cache_dir or os.path.expanduser("~/VisionPy_Pro/.thumbnails")
+        self.size = size
+        self.max_cache_bytes = max_cache_bytes
+        self.memory_items = memory_items
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(max_threads or max(1, min(4, os.cpu_count() or 1)))
+
+        self.lock = threading.Lock()
+        self.evict_lock = threading.Lock()
+        self.memory_cache = collections.OrderedDict()
+        self.pending = set()
+        self.generation = 0
+        self.recording_active = False
+        self.deferred = []
+        self.max_threads = self.pool.maxThreadCount()
+        self.cache_bytes = sum(entry.stat().st_size for entry in os.scandir(self.cache_dir)
+                               if entry.is_file())
+
+    def cache_key(self, path, strip_frames=1):
+        """Chiave di cache: cambia se il file viene modificato o sostituito"""
+        stat = os.stat(path)
+        raw = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{strip_frames}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def cache_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.jpg")
+
+    def request(self, path, strip_frames=1):
+        """
+        Restituisce subito la miniatura se è in memoria, altrimenti None e la
+        genera in background (arriverà con thumbnail_ready).
+        Per i video, strip_frames > 1 produce una striscia di fotogrammi.
+        """
+        try:
+            key = self.cache_key(path, strip_frames)
+        except OSError:
+            return None
+        with self.lock:
+            if key in self.memory_cache:
+                self.memory_cache.move_to_end(key)
+                return self.memory_cache[key]
+            if key in self.pending:
+                return None
+            self.pending.add(key)
+            job = ThumbnailJob(self, path, key, self.generation, strip_frames)
+            if self.recording_active and path.lower().endswith(VIDEO_EXTENSIONS):
+                self.deferred.append(job)
+                return None
+        self.pool.start(job)
+        return None
+
+    def cancel_all(self):
+        """Annulla le miniature in coda e scarta quelle in corso (es. chiusura galleria)"""
+        with self.lock:
+            self.generation += 1
+            self.pending.clear()
+            self.deferred.clear()
+        self.pool.clear()
+
+    def set_recording_active(self, active):
+        """Durante la registrazione: un solo thread e nessuna estrazione video"""
+        with self.lock:
+            self.recording_active = active
+            deferred = [] if active else self.deferred
+            if not active:
+                self.deferred = []
+        self.pool.setMaxThreadCount(1 if active else self.max_threads)
+        for job in deferred:
+            if job.generation == self.generation:
+                self.pool.start(job)
+
+    def deliver(self, path, key, image):
+        """Chiamata dai worker: memorizza la miniatura e la notifica alla GUI"""
+        with self.lock:
+            self.pending.discard(key)
+            self.memory_cache[key] = image
+            while len(self.memory_cache) > self.memory_items:
+                self.memory_cache.popitem(last=False)
+        self.thumbnail_ready.emit(path, image)
+
+    def discard(self, key):
+        """Chiamata dai worker quando la miniatura non può essere generata"""
+        with self.lock:
+            self.pending.discard(key)
+
+    def render(self, path, strip_frames=1, is_cancelled=None):
+        """Decodifica il file a risoluzione ridotta e lo adatta alla miniatura (BGR)"""
+        if path.lower().endswith(VIDEO_EXTENSIONS):
+            return self.render_video(path, strip_frames, is_cancelled)
+        if not path.lower().endswith(IMAGE_EXTENSIONS):
+            return None
+        frame = cv2.imread(path, self.reduced_flag(path))
+        if frame is None:
+            return None
+        return self.fit(frame)
+
+    def render_video(self, path, strip_frames=1, is_cancelled=None):
+        """
+        Estrae la copertina (al 10% della durata) o una striscia di fotogrammi
+        equidistanti. Ogni posizione viene raggiunta con un seek, che riparte
+        dal keyframe precedente invece di decodificare il video dall'inizio.
+        """
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            return None
+        try:
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+            duration_ms = 1000 * frame_count / fps if fps > 0 and frame_count > 0 else 0
+            if strip_frames <= 1:
+                positions = [duration_ms * 0.1]
+            else:
+                positions = [duration_ms * (i + 0.5) / strip_frames for i in range(strip_frames)]
+
+            frames = []
+            for position in positions:
+                if is_cancelled is not None and is_cancelled():
+                    return None
+                if position > 0:
+                    cap.set(cv2.CAP_PROP_POS_MSEC, position)
+                ok, frame = cap.read()
+                if ok:
+                    frames.append(self.fit(frame))
+        finally:
+            cap.release()
+
+        if not frames:
+            return None
+        if len(frames) == 1:
+            return frames[0]
+        return cv2.hconcat(frames)
+
+    def reduced_flag(self, path):
+        """Sceglie il fattore di riduzione in base alle dimensioni lette dall'header"""
+        source = QImageReader(path).size()
+        target_w, target_h = self.size
+        if source.isValid():
+            for factor, flag in ((8, cv2.IMREAD_REDUCED_COLOR_8),
+                                 (4, cv2.IMREAD_REDUCED_COLOR_4),
+                                 (2, cv2.IMREAD_REDUCED_COLOR_2)):
+                if source.width() // factor >= target_w and source.height() // factor >= target_h:
+                    return flag
+        return cv2.IMREAD_COLOR
+
+    def fit(self, frame):
+        h, w = frame.shape[:2]
+        scale = min(self.size[0] / w, self.size[1] / h, 1.0)
+        if scale < 1.0:
+            frame = cv2.resize(frame, (max(1, int(w * scale)), max(1, int(h * scale))),
+                               interpolation=cv2.INTER_AREA)
+        return frame
+
+    def load_cached(self, key):
+        path = self.cache_path(key)
+        if not os.path.exists(path):
+            return None
+        image = QImage(path)
+        if image.isNull():
+            return None
+        try:
+            os.utime(path)  # Aggiorna l'età LRU
+        except OSError:
+            pass
+        return image
+
+    def store_cached(self, key, thumbnail):
+        path = self.cache_path(key)
+        if not cv2.imwrite(path, thumbnail, [int(cv2.IMWRITE_JPEG_QUALITY), 85]):
+            return
+        with self.lock:
+            self.cache_bytes += os.path.getsize(path)
+            evict = self.cache_bytes > self.max_cache_bytes
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """Elimina le miniature usate meno di recente fino al 90% del limite"""
+        if not self.evict_lock.acquire(blocking=False):
+            return  # Un altro worker sta già liberando spazio
+        try:
+            self._evict()
+        finally:
+            self.evict_lock.release()
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_cache_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        with self.lock:
+            self.cache_bytes = total
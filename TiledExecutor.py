@@ -0,0 +1,81 @@
+# TiledExecutor.py
+
+import os
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TiledExecutor:
+    """
+    Esegue un'operazione per pixel (o su un piccolo intorno) dividendo il
+    frame in bande orizzontali elaborate in parallelo da un pool di thread:
+    le funzioni OpenCV rilasciano il GIL, quindi le bande girano davvero
+    su core diversi.
+
+    func(src_band, dst_band) scrive il risultato della banda in dst_band.
+    Con halo = 0 dst_band è una vista dell'uscita preallocata: nessuna
+    copia. Con halo > 0 la banda sorgente include halo righe sopra e sotto
+    (il raggio del kernel), così ogni pixel vede gli stessi vicini che
+    vedrebbe nel frame intero e il risultato è identico bit per bit; le
+    righe interne vengono poi copiate nell'uscita, ognuna dal suo thread.
+    Le operazioni non locali (es. l'isteresi di Canny) non vanno divise.
+    """
+
+    def __init__(self, bands=None, min_band_rows=64):
+        self.bands = bands or os.cpu_count() or 1
+        self.min_band_rows = min_band_rows
+        self.pool = None
+        self.lock = threading.Lock()
+
+    def set_bands(self, bands):
+        """Numero di bande (e di thread); 1 = esecuzione nel thread chiamante"""
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+        self.bands = max(1, bands)
+
+    def band_ranges(self, rows):
+        bands = max(1, min(self.bands, rows // self.min_band_rows))
+        step = -(-rows // bands)
+        return [(y, min(y + step, rows)) for y in range(0, rows, step)]
+
+    def run(self, func, src, dst=None, halo=0, channels=None, dtype=None):
+        """Applica func a src per bande e restituisce dst (allocato se None)"""
+        if dst is None:
+            if channels is None:
+                shape = src.shape
+            elif channels == 1:
+                shape = src.shape[:2]
+            else:
+                shape = src.shape[:2] + (channels,)
+            dst = np.empty(shape, dtype=dtype or src.dtype)
+        ranges = self.band_ranges(src.shape[0])
+        if len(ranges) == 1:
+            func(src, dst)
+            return dst
+
+        with self.lock:
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(max_workers=max(1, self.bands - 1), thread_name_prefix="tile")
+        rows = src.shape[0]
+
+        def run_band(y0, y1):
+            if halo == 0:
+                func(src[y0:y1], dst[y0:y1])
+                return
+            top, bottom = max(0, y0 - halo), min(rows, y1 + halo)
+            band = np.empty((bottom - top,) + dst.shape[1:], dtype=dst.dtype)
+            func(src[top:bottom], band)
+            dst[y0:y1] = band[y0 - top:y1 - top]
+
+        # L'ultima banda gira nel thread chiamante, che altrimenti resterebbe in attesa
+        futures = [self.pool.submit(run_band, y0, y1) for y0, y1 in ranges[:-1]]
+        run_band(*ranges[-1])
+        for future in futures:
+            future.result()
+        return dst
+
+
+# Istanza condivisa: un solo pool di thread per tutte le fasi che usano le bande
+tiled_executor = TiledExecutor()
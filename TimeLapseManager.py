@@ -0,0 +1,116 @@
+# TimeLapseManager.py
+
+import math
+import time
+import queue
+import threading
+from PyQt6.QtCore import QTimer, QObject, Qt, pyqtSignal
+
+from EncoderBackend import create_encoder
+
+QUEUE_FRAMES = 4   # Frame in attesa dell'encoder oltre i quali lo scatto si salta
+
+
+class TimeLapseManager(QObject):
+    """
+    Intervallometro: cattura un frame ogni N secondi e lo aggiunge subito a
+    un video time-lapse, senza salvare migliaia di PNG intermedi.
+
+    Gli scatti sono pianificati su scadenze assolute (start + k * intervallo,
+    misurate con time.monotonic) e non contando i tick del timer: il ritardo
+    di un singolo scatto non si accumula sui successivi, anche dopo ore.
+
+    stop() non attende l'encoder: la chiusura del file (con ffmpeg fino a
+    30 secondi) avviene nel thread dell'encoding, che al termine emette
+    timelapse_finished.
+    """
+    shot_taken = pyqtSignal(int)        # Numero di frame nel time-lapse
+    timelapse_finished = pyqtSignal(str)
+
+    def __init__(self, camera_manager, parent=None):
+        super().__init__(parent)
+        self.camera_manager = camera_manager
+        self.shot_timer = QTimer(self)
+        self.shot_timer.setSingleShot(True)
+        self.shot_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.shot_timer.timeout.connect(self.take_shot)
+
+        self.interval = 10.0
+        self.start_time = None
+        self.shot_index = 0
+        self.path = None
+        # Coda corta: l'encoding avviene fuori dal thread della GUI
+        # (una nuova coda per ogni time-lapse, il precedente può ancora chiudersi)
+        self.frame_queue = None
+        self.encoder_threads = []   # Time-lapse in corso o che stanno ancora chiudendo il file
+
+    def is_running(self):
+        return self.start_time is not None
+
+    def start(self, path, interval, playback_fps=25, encoder_settings=None):
+        """Avvia il time-lapse: un frame ogni interval secondi, riprodotto a playback_fps"""
+        if self.is_running():
+            return False
+        width, height = self.camera_manager.get_resolution()
+        encoder = create_encoder(self.camera_manager.get_device_type(), encoder_settings)
+        if not encoder.open(path, width, height, playback_fps):
+            return False
+
+        self.path = path
+        self.interval = interval
+        self.shot_index = 0
+        # Un posto in più riservato al segnale di fine: stop() non si blocca mai
+        self.frame_queue = queue.Queue(maxsize=QUEUE_FRAMES + 1)
+        encoder_thread = threading.Thread(target=self._encode_loop,
+                                          args=(encoder, self.frame_queue, path), daemon=True)
+        encoder_thread.start()
+        self.encoder_threads = [t for t in self.encoder_threads if t.is_alive()] + [encoder_thread]
+
+        self.start_time = time.monotonic()
+        self.take_shot()
+        return True
+
+    def stop(self, wait=False):
+        """Ferma gli scatti; il file viene chiuso nel thread dell'encoding (wait=True lo attende)"""
+        if self.is_running():
+            self.shot_timer.stop()
+            self.start_time = None
+            self.frame_queue.put(None)
+        if wait:
+            for encoder_thread in self.encoder_threads:
+                encoder_thread.join()
+            self.encoder_threads = []
+
+    def take_shot(self):
+        if not self.is_running():
+            return
+        frame = self.camera_manager.capture_frame()
+        if frame is not None:
+            if self.frame_queue.qsize() < QUEUE_FRAMES:
+                self.frame_queue.put_nowait(frame)
+            else:
+                print("Time-lapse: encoder in ritardo, frame saltato")
+        self.schedule_next()
+
+    def schedule_next(self):
+        """Programma lo scatto successivo sulla prossima scadenza non ancora passata"""
+        now = time.monotonic()
+        elapsed = now - self.start_time
+        self.shot_index = max(self.shot_index + 1, math.floor(elapsed / self.interval) + 1)
+        deadline = self.start_time + self.shot_index * self.interval
+        self.shot_timer.start(max(0, int(round((deadline - now) * 1000))))
+
+    def _encode_loop(self, encoder, frame_queue, path):
+        frames_written = 0
+        while True:
+            frame = frame_queue.get()
+            if frame is None:
+                break
+            try:
+                encoder.write(frame)
+                frames_written += 1
+                self.shot_taken.emit(frames_written)
+            except Exception as e:
+                print(f"Errore durante la scrittura del time-lapse: {e}")
+        encoder.release()
+        self.timelapse_finished.emit(path)
@@ -0,0 +1,125 @@
+# VideoIndex.py
+
+import os
+import json
+import bisect
+import hashlib
+import cv2
+
+from EncoderBackend import pyav_available
+
+# Un seek di OpenCV (backend FFmpeg) riparte dal keyframe che precede
+# target - 16 frame e decodifica in avanti fino a target
+SEEK_PREROLL_FRAMES = 16
+
+
+class VideoIndex:
+    """
+    Indice di un file video: durata, fps e istanti dei keyframe.
+
+    Con PyAV i keyframe vengono letti demultiplexando i pacchetti, senza
+    decodificarli; senza PyAV l'indice contiene solo i metadati e i seek
+    restano affidati a OpenCV (che riparte comunque dal keyframe precedente).
+    L'indice si costruisce una volta per file e viene salvato in cache_dir,
+    indicizzato da percorso + mtime + dimensione. La costruzione si
+    interrompe quando cancel (threading.Event) viene impostato: in quel
+    caso non si salva nulla e si restituisce None.
+    """
+
+    def __init__(self, duration=0.0, fps=0.0, frame_count=0, keyframes=None):
+        self.duration = duration
+        self.fps = fps
+        self.frame_count = frame_count
+        self.keyframes = keyframes or []
+        # GOP misurato: distanza mediana tra due keyframe (0 se non noto)
+        gaps = sorted(b - a for a, b in zip(self.keyframes, self.keyframes[1:]))
+        self.gop_seconds = gaps[len(gaps) // 2] if gaps else 0.0
+
+    @classmethod
+    def load_or_build(cls, path, cache_dir=None, cancel=None):
+        cache_dir = cache_dir or os.path.expanduser("~/VisionPy_Pro/.videoindex")
+        stat = os.stat(path)
+        raw = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}"
+        cache_path = os.path.join(cache_dir, hashlib.sha1(raw.encode("utf-8")).hexdigest() + ".json")
+
+        try:
+            with open(cache_path, "r") as f:
+                return cls(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            pass
+
+        index = cls.build(path, cancel)
+        if index is None:
+            return None
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_path, "w") as f:
+                json.dump(index.to_dict(), f)
+        except OSError as e:
+            print(f"Errore nel salvare l'indice di {os.path.basename(path)}: {e}")
+        return index
+
+    @classmethod
+    def build(cls, path, cancel=None):
+        cap = cv2.VideoCapture(path)
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        cap.release()
+        duration = frame_count / fps if fps > 0 else 0.0
+
+        keyframes = []
+        if pyav_available():
+            try:
+                keyframes = cls.read_keyframes(path, cancel)
+                if keyframes is None:
+                    return None
+            except Exception as e:
+                print(f"Errore nella lettura dei keyframe di {os.path.basename(path)}: {e}")
+        return cls(duration, fps, frame_count, keyframes)
+
+    @staticmethod
+    def read_keyframes(path, cancel=None):
+        """Istanti (secondi) dei keyframe, leggendo solo i pacchetti; None se interrotto"""
+        import av
+
+        keyframes = []
+        with av.open(path) as container:
+            stream = container.streams.video[0]
+            time_base = float(stream.time_base)
+            for packet in container.demux(stream):
+                if cancel is not None and cancel.is_set():
+                    return None
+                if packet.is_keyframe and packet.pts is not None:
+                    keyframes.append(packet.pts * time_base)
+        return keyframes
+
+    def to_dict(self):
+        return {
+            "duration": self.duration,
+            "fps": self.fps,
+            "frame_count": self.frame_count,
+            "keyframes": self.keyframes,
+        }
+
+    def keyframe_before(self, seconds):
+        """Ultimo keyframe non successivo a seconds (None se l'indice non li conosce)"""
+        i = bisect.bisect_right(self.keyframes, seconds)
+        return self.keyframes[i - 1] if i > 0 else None
+
+    def keyframe_after(self, seconds):
+        i = bisect.bisect_right(self.keyframes, seconds)
+        return self.keyframes[i] if i < len(self.keyframes) else None
+
+    def keyframe_jump(self, position, skip, fps):
+        """
+        Keyframe a cui saltare per avanzare di skip frame da position, o None
+        se conviene decodificarli con grab(). Il seek costa circa un GOP più
+        SEEK_PREROLL_FRAMES frame decodificati, quindi si salta solo quando
+        il passo supera quel costo (con i GOP lunghi di x264 quasi mai).
+        """
+        if not self.keyframes or fps <= 0:
+            return None
+        if skip <= self.gop_seconds * fps + SEEK_PREROLL_FRAMES:
+            return None
+        keyframe = self.keyframe_before(position + skip / fps)
+        return keyframe if keyframe is not None and keyframe > position else None
@@ -0,0 +1,280 @@
+# VideoPlayer.py
+
+import time
+import queue
+import threading
+import cv2
+from PyQt6.QtCore import QObject, QTimer, QSize, Qt, pyqtSignal
+from PyQt6.QtGui import QImage
+
+from VideoIndex import VideoIndex
+
+SPEEDS = (1, 2, 4, 8)
+
+
+class VideoPlayer(QObject):
+    """
+    Riproduzione video dentro l'applicazione.
+
+    Un thread decodifica i frame, già ridotti alla dimensione di
+    visualizzazione, in una coda corta (buffer_frames): quando è piena il
+    decoder si ferma, quindi CPU e memoria restano limitate anche con file
+    di un'ora. Un QTimer nel thread della GUI mostra i frame quando il loro
+    istante raggiunge l'orologio di riproduzione.
+
+    - seek: con l'indice dei keyframe lo scrubbing si ferma sul keyframe
+      precedente invece che sul frame esatto; OpenCV decodifica comunque
+      dal keyframe che lo precede, mai dall'inizio del file
+    - 2x/4x/8x: i frame intermedi vengono saltati con grab(), senza
+      conversione né copia (grab() però li decodifica). Si salta tra
+      keyframe solo se il passo supera il costo di un seek (un GOP più il
+      preroll di OpenCV, vedi VideoIndex.keyframe_jump): con i GOP lunghi
+      prodotti dall'app grab() resta più veloce (benchmark.py playback)
+    L'indice si costruisce in un thread che stop() interrompe.
+    """
+    frame_ready = pyqtSignal(QImage)
+    position_changed = pyqtSignal(float)
+    duration_changed = pyqtSignal(float)
+    playback_finished = pyqtSignal()
+
+    def __init__(self, path, target_size, buffer_frames=4, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.target_size = QSize(target_size)
+        self.frames = queue.Queue(maxsize=buffer_frames)
+        self.index = None
+
+        self.condition = threading.Condition()
+        self.running = False
+        self.playing = False
+        self.speed = 1
+        self.generation = 0
+        self.seek_request = None        # (secondi, esatto)
+        self.worker = None
+        self.index_thread = None
+        self.index_cancel = threading.Event()
+
+        # Orologio di riproduzione (thread della GUI)
+        self.position = 0.0
+        self.clock_base = 0.0
+        self.clock_start = time.monotonic()
+        self.next_frame = None
+        self.awaiting_seek = False      # Da fermi si mostra solo il frame del seek
+        self.at_end = False
+        self.present_timer = QTimer(self)
+        self.present_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.present_timer.timeout.connect(self.present)
+
+    # --- Comandi (thread della GUI) ---
+
+    def start(self):
+        self.running = True
+        self.worker = threading.Thread(target=self._decode_loop, daemon=True)
+        self.worker.start()
+        self.present_timer.start(10)
+        self.seek(0.0)
+
+    def stop(self):
+        self.present_timer.stop()
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.worker:
+            self.worker.join()
+            self.worker = None
+        # La lettura dei keyframe di un file lungo non deve sopravvivere al player
+        self.index_cancel.set()
+        if self.index_thread:
+            self.index_thread.join()
+            self.index_thread = None
+
+    def play(self):
+        if self.at_end:
+            self.seek(0.0)
+        self.restart_clock(self.position)
+        with self.condition:
+            self.playing = True
+            self.condition.notify()
+
+    def pause(self):
+        with self.condition:
+            self.playing = False
+        self.restart_clock(self.position)
+
+    def is_playing(self):
+        return self.playing
+
+    def set_speed(self, speed):
+        self.restart_clock(self.position)
+        with self.condition:
+            self.speed = speed
+        # I frame già in coda sono stati scelti con il passo precedente
+        self.seek(self.position)
+
+    def seek(self, seconds, exact=True):
+        """exact=False (scrubbing) si ferma al keyframe precedente, se noto"""
+        with self.condition:
+            self.generation += 1
+            self.seek_request = (max(0.0, seconds), exact)
+            self.condition.notify()
+        self.next_frame = None
+        self.awaiting_seek = True
+        self.at_end = False
+        self.position = max(0.0, seconds)
+        self.restart_clock(self.position)
+
+    def restart_clock(self, position):
+        self.clock_base = position
+        self.clock_start = time.monotonic()
+
+    def clock(self):
+        if not self.playing:
+            return self.clock_base
+        return self.clock_base + (time.monotonic() - self.clock_start) * self.speed
+
+    def present(self):
+        """Mostra il frame più recente il cui istante è già stato raggiunto"""
+        shown = None
+        while True:
+            if self.next_frame is None:
+                try:
+                    self.next_frame = self.frames.get_nowait()
+                except queue.Empty:
+                    break
+            generation, pts, image = self.next_frame
+            if generation != self.generation:
+                self.next_frame = None
+                continue
+            if image is None:
+                # Fine del file
+                self.next_frame = None
+                self.pause()
+                self.at_end = True
+                self.playback_finished.emit()
+                break
+            if self.playing:
+                if pts > self.clock():
+                    break
+            elif not self.awaiting_seek:
+                break
+            # Da fermi il frame del seek si mostra subito, poi ci si ferma
+            shown = (pts, image)
+            self.next_frame = None
+            self.awaiting_seek = False
+            if not self.playing:
+                break
+        if shown is not None:
+            self.position = shown[0]
+            if not self.playing:
+                self.restart_clock(self.position)
+            self.frame_ready.emit(shown[1])
+            self.position_changed.emit(self.position)
+
+    # --- Decoder (thread dedicato) ---
+
+    def _decode_loop(self):
+        cap = cv2.VideoCapture(self.path)
+        if not cap.isOpened():
+            print(f"Errore: impossibile aprire il video {self.path}")
+            return
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        self.duration_changed.emit(frame_count / fps)
+        # Finché l'indice dei keyframe non è pronto si usano solo i metadati:
+        # la lettura dei pacchetti di un file lungo non ritarda il primo frame
+        self.index = VideoIndex(frame_count / fps, fps, frame_count)
+        self.index_thread = threading.Thread(target=self._build_index, daemon=True)
+        self.index_thread.start()
+
+        generation = -1
+        ended = False
+        try:
+            while True:
+                with self.condition:
+                    while (self.running and self.seek_request is None
+                           and (not self.playing or ended)):
+                        self.condition.wait()
+                    if not self.running:
+                        return
+                    request = self.seek_request
+                    self.seek_request = None
+                    generation = self.generation
+                    speed = self.speed
+
+                if request is not None:
+                    ended = False
+                    self.flush()
+                    seconds, exact = request
+                    if not exact:
+                        keyframe = self.index.keyframe_before(seconds)
+                        seconds = keyframe if keyframe is not None else seconds
+                    cap.set(cv2.CAP_PROP_POS_MSEC, seconds * 1000)
+                    ok = self.grab_frames(cap, 1)
+                else:
+                    ok = self.advance(cap, speed, fps)
+
+                if not ok:
+                    ended = True
+                    self.push((generation, None, None))
+                    continue
+                ok, frame = cap.retrieve()
+                if not ok:
+                    continue
+                pts = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                self.push((generation, pts, self.to_qimage(frame)))
+        finally:
+            cap.release()
+
+    def _build_index(self):
+        try:
+            index = VideoIndex.load_or_build(self.path, cancel=self.index_cancel)
+            if index is not None:
+                self.index = index
+        except OSError as e:
+            print(f"Errore nell'indice del video: {e}")
+
+    def advance(self, cap, speed, fps):
+        """Porta il decoder al prossimo frame da mostrare con il passo della velocità"""
+        keyframe = None
+        if speed > 1:
+            position = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            keyframe = self.index.keyframe_jump(position, speed - 1, fps)
+        if keyframe is not None:
+            cap.set(cv2.CAP_PROP_POS_MSEC, keyframe * 1000)
+            return self.grab_frames(cap, 1)
+        return self.grab_frames(cap, speed)
+
+    @staticmethod
+    def grab_frames(cap, count):
+        for _ in range(count):
+            if not cap.grab():
+                return False
+        return True
+
+    def push(self, item):
+        """Inserisce nella coda; se è piena aspetta, ma esce subito su seek o stop"""
+        while True:
+            with self.condition:
+                if not self.running or self.seek_request is not None:
+                    return
+            try:
+                self.frames.put(item, timeout=0.05)
+                return
+            except queue.Full:
+                continue
+
+    def flush(self):
+        while True:
+            try:
+                self.frames.get_nowait()
+            except queue.Empty:
+                return
+
+    def to_qimage(self, frame):
+        h, w = frame.shape[:2]
+        scale = min(self.target_size.width() / w, self.target_size.height() / h, 1.0)
+        if scale < 1.0:
+            frame = cv2.resize(frame, (max(1, int(w * scale)), max(1, int(h * scale))),
+                               interpolation=cv2.INTER_AREA)
+            h, w = frame.shape[:2]
+        return QImage(frame.data, w, h, frame.strides[0], QImage.Format.Format_BGR888).copy()
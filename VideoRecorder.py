@@ -0,0 +1,185 @@
+# VideoRecorder.py
+
+import os
+import time
+import queue
+import threading
+
+from EncoderBackend import create_encoder
+from SegmentedWriter import SegmentedWriter, RetentionPolicy
+from PreRollBuffer import PreRollBuffer
+from EventEmitter import EventEmitter
+
+class VideoRecorder(EventEmitter):
+    """
+    Registrazione di uno stream video, senza Qt: coda dei frame, encoder e
+    segmenti in un thread proprio. RecordingThread ne è il client Qt.
+    Chiusura del file (flush dell'encoder) e catalogazione dei segmenti
+    avvengono alla fine del thread: stop_recording() segnala soltanto e,
+    se richiesto, attende.
+
+    Eventi (EventEmitter, chiamati dal thread della registrazione):
+    - "finished" (successo)
+    - "status" (messaggio)
+    - "stats" (throughput dello stream, ogni STATS_INTERVAL secondi)
+    """
+    
+    STATS_INTERVAL = 2.0  # secondi tra due aggiornamenti delle statistiche
+    
+    def __init__(self, camera_manager, encoder_settings=None, recording_settings=None,
+                 stream_name="elaborato", catalog=None):
+        super().__init__()
+        self.camera_manager = camera_manager
+        self.stream_name = stream_name
+        self.catalog = catalog
+        self.encoder_settings = encoder_settings or {}
+        self.recording_settings = recording_settings or {}
+        self.recording_path = None
+        self.is_recording = False
+        self.stop_time = None
+        self.thread = None
+        self.writer = None
+        self.preroll = None
+        self.frame_queue = queue.Queue(maxsize=30)
+        self.frames_received = 0
+        self.frames_dropped = 0
+        self.frames_encoded = 0
+
+    def add_frame_to_queue(self, frame, timestamp=None):
+        """
+        Aggiunge un frame alla coda per la registrazione.
+        timestamp è l'istante di cattura (time.monotonic): i frame persi o
+        elaborati più lentamente degli FPS del file vengono compensati.
+        """
+        if self.is_recording:
+            if timestamp is None:
+                timestamp = time.monotonic()
+            self.frames_received += 1
+            if self.frame_queue.full():
+                try:
+                    self.frame_queue.get_nowait()
+                    self.frames_dropped += 1
+                except queue.Empty:
+                    pass
+            self.frame_queue.put((frame, timestamp))
+
+    def start_recording(self, path, width, height, fps, preroll=None):
+        """
+        Avvia la registrazione. preroll è uno snapshot di PreRollBuffer: viene
+        scritto in testa al file, prima dei frame live.
+        """
+        self.recording_path = path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.preroll = preroll
+        self.stop_time = None
+        self.is_recording = True
+        self.thread = threading.Thread(target=self.run, name=f"recording-{self.stream_name}", daemon=True)
+        self.thread.start()
+        
+    def create_writer(self):
+        """Crea il writer: file unico oppure segmenti a rotazione con retention"""
+        device_type = self.camera_manager.get_device_type()
+        settings = self.recording_settings
+        mb = 1024 * 1024
+        retention = RetentionPolicy(
+            max_total_bytes=settings.get("retention_mb", 0) * mb or None,
+            max_age_seconds=settings.get("retention_hours", 0) * 3600 or None
+        )
+        # L'encoder (OpenCV o ffmpeg) dipende dal profilo del dispositivo
+        return SegmentedWriter(
+            lambda: create_encoder(device_type, self.encoder_settings),
+            self.recording_path, self.width, self.height, self.fps,
+            segment_seconds=settings.get("segment_seconds", 0) or None,
+            segment_bytes=settings.get("segment_mb", 0) * mb or None,
+            retention=retention
+        )
+
+    def run(self):
+        success = False
+        try:
+            os.makedirs(os.path.dirname(self.recording_path), exist_ok=True)
+            
+            self.writer = self.create_writer()
+            if not self.writer.open():
+                raise Exception("Impossibile aprire il file video per la scrittura.")
+
+            self.emit("status", f"Registrazione in corso: {os.path.basename(self.recording_path)}")
+            
+            # Il pre-roll precede i frame live sulla stessa linea temporale
+            if self.preroll:
+                for timestamp, jpeg in self.preroll:
+                    frame = PreRollBuffer.decode(jpeg)
+                    if frame is not None:
+                        self.writer.write(frame, timestamp)
+                self.preroll = None
+            
+            last_stats = time.monotonic()
+            last_encoded = 0
+            while self.is_recording or not self.frame_queue.empty():
+                try:
+                    frame, timestamp = self.frame_queue.get(timeout=1.0)
+                    self.writer.write(frame, timestamp)
+                    self.frames_encoded += 1
+                    
+                    now = time.monotonic()
+                    if now - last_stats >= self.STATS_INTERVAL:
+                        fps = (self.frames_encoded - last_encoded) / (now - last_stats)
+                        self.emit("stats", self.get_stats(fps))
+                        last_stats = now
+                        last_encoded = self.frames_encoded
+                except queue.Empty:
+                    continue
+            success = True
+            
+        except Exception as e:
+            self.emit("status", f"Errore durante la registrazione: {str(e)}")
+        finally:
+            self.is_recording = False
+            if self.writer:
+                # Completa il video fino all'istante dello stop
+                try:
+                    self.writer.release(end_time=self.stop_time or time.monotonic())
+                    self.register_segments(self.writer.segment_paths)
+                except Exception as e:
+                    print(f"Errore nella chiusura del video: {e}")
+                    success = False
+                self.writer = None
+            if success:
+                self.emit("status", "Registrazione fermata e salvata.")
+            self.emit("finished", success)
+            
+    def get_stats(self, encode_fps=0.0):
+        """Statistiche dello stream: frame ricevuti, scartati per coda piena e codificati"""
+        return {
+            "stream": self.stream_name,
+            "received": self.frames_received,
+            "dropped": self.frames_dropped,
+            "encoded": self.frames_encoded,
+            "encode_fps": encode_fps,
+            "queue": self.frame_queue.qsize(),
+        }
+
+    def register_segments(self, paths):
+        """Aggiunge al catalogo i file scritti (durata e frame vengono letti in background)"""
+        if self.catalog is None:
+            return
+        capture_mode = "video" if self.stream_name == "elaborato" else f"video_{self.stream_name}"
+        for path in paths:
+            if os.path.exists(path):  # La retention può aver già eliminato i segmenti più vecchi
+                self.catalog.add(path, "video", self.width, self.height,
+                                 device_type=self.camera_manager.get_device_type().value,
+                                 capture_mode=capture_mode)
+
+    def stop_recording(self, wait=True):
+        """
+        Ferma la registrazione: il thread scrive i frame ancora in coda, chiude
+        il file ed emette "finished". Con wait=False non si attende la chiusura
+        (es. dal thread della GUI).
+        """
+        if self.stop_time is None:
+            self.stop_time = time.monotonic()
+        self.is_recording = False
+        if wait and self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
\ No newline at end of file
@@ -0,0 +1,719 @@
+#!/usr/bin/env python3
+# benchmark.py - Misure di prestazione di VisionPy Pro
+#
+# Uso: python3 benchmark.py <nome> [opzioni]
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+from SyntheticSource import SyntheticSource
+
+
+def cpu_times():
+    """Tempo CPU (utente + sistema) del processo e dei processi figli"""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def bench_encoders(args):
+    """Confronta throughput, CPU e dimensione file dei backend di encoding"""
+    from EncoderBackend import OpenCVEncoder, FfmpegEncoder, ENCODER_PROFILES, ffmpeg_available
+
+    source = SyntheticSource(resolution=(args.width, args.height), fps=args.fps)
+    source.start()
+    # La clip viene generata prima per non misurare il rendering
+    clip = [source.render(i) for i in range(args.frames)]
+
+    candidates = [("opencv/mp4v", OpenCVEncoder())]
+    if ffmpeg_available():
+        for device, profile in ENCODER_PROFILES.items():
+            options = profile["options"]
+            candidates.append((f"ffmpeg/{device}", FfmpegEncoder(**options)))
+    else:
+        print("ffmpeg non disponibile: misuro solo OpenCV")
+
+    print(f"Clip: {args.frames} frame {args.width}x{args.height} @ {args.fps} FPS")
+    print(f"{'backend':<22}{'FPS':>10}{'CPU s':>10}{'CPU %':>10}{'MB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, encoder in candidates:
+            path = os.path.join(tmp, label.replace("/", "_") + ".mp4")
+            if not encoder.open(path, args.width, args.height, args.fps):
+                print(f"{label:<22} impossibile aprire l'encoder")
+                continue
+            cpu_start = cpu_times()
+            wall_start = time.perf_counter()
+            for frame in clip:
+                encoder.write(frame)
+            encoder.release()
+            wall = time.perf_counter() - wall_start
+            cpu = cpu_times() - cpu_start
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            print(f"{label:<22}{len(clip) / wall:>10.1f}{cpu:>10.2f}"
+                  f"{100 * cpu / wall:>10.0f}{size_mb:>10.2f}")
+
+
+def bench_segments(args):
+    """Registra la sorgente sintetica a segmenti e misura il costo della rotazione"""
+    import cv2
+    from EncoderBackend import create_encoder
+    from SegmentedWriter import SegmentedWriter, RetentionPolicy
+
+    source = SyntheticSource(resolution=(args.width, args.height), fps=args.fps)
+    source.start()
+    segment_seconds = 2
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = SegmentedWriter(
+            lambda: create_encoder("pc"),
+            os.path.join(tmp, "loop.mp4"), args.width, args.height, args.fps,
+            segment_seconds=segment_seconds,
+            retention=RetentionPolicy(max_total_bytes=args.retention_mb * 1024 * 1024 or None)
+        )
+        if not writer.open():
+            print("Impossibile aprire il writer")
+            return
+        rollover, normal = [], []
+        for _ in range(args.frames):
+            frame = source.get_frame()
+            rotating = writer._should_rotate()
+            start = time.perf_counter()
+            writer.write(frame)
+            (rollover if rotating else normal).append(time.perf_counter() - start)
+        writer.release()
+
+        print(f"Segmenti da {segment_seconds}s: {len(writer.segment_paths)} creati")
+        print(f"Scrittura frame: media {1000 * sum(normal) / len(normal):.2f} ms, "
+              f"max {1000 * max(normal):.2f} ms")
+        if rollover:
+            print(f"Rotazione: media {1000 * sum(rollover) / len(rollover):.2f} ms, "
+                  f"max {1000 * max(rollover):.2f} ms")
+        total_frames = 0
+        for path in writer.segment_paths:
+            if not os.path.exists(path):
+                print(f"  {os.path.basename(path)}: eliminato dalla retention")
+                continue
+            cap = cv2.VideoCapture(path)
+            count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            cap.release()
+            total_frames += count
+            print(f"  {os.path.basename(path)}: {count} frame, "
+                  f"{os.path.getsize(path) / 1024:.0f} KB")
+        print(f"Frame nei segmenti rimasti: {total_frames}/{args.frames}")
+
+
+def bench_timing(args):
+    """
+    Registra una sorgente sintetica cadenzata più lenta degli FPS del file
+    (come la modalità YOLO) e verifica che la durata del video corrisponda
+    al tempo reale.
+    """
+    import cv2
+    from EncoderBackend import create_encoder
+    from SegmentedWriter import SegmentedWriter
+
+    container_fps = args.fps
+    for source_fps in (container_fps, 8):
+        for backend in ("opencv", "pyav"):
+            source = SyntheticSource(resolution=(args.width, args.height),
+                                     fps=source_fps, paced=True)
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "timing.mp4")
+                writer = SegmentedWriter(
+                    lambda: create_encoder("pc", {"backend": backend}),
+                    path, args.width, args.height, container_fps
+                )
+                if not writer.open():
+                    print(f"{backend}: impossibile aprire il writer")
+                    continue
+                label = writer.encoder.name
+                source.start()
+                start = time.monotonic()
+                while time.monotonic() - start < args.seconds:
+                    frame = source.get_frame()
+                    writer.write(frame, time.monotonic())
+                end = time.monotonic()
+                writer.release(end_time=end)
+
+                cap = cv2.VideoCapture(path)
+                last_ms = 0.0
+                frames = 0
+                while cap.grab():
+                    frames += 1
+                    last_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+                cap.release()
+                duration = last_ms / 1000.0 + 1.0 / container_fps
+                wall = end - start
+                print(f"sorgente {source_fps:>2} FPS, {label:<7} file {container_fps} FPS: "
+                      f"{frames} frame, durata {duration:.2f}s su {wall:.2f}s reali "
+                      f"(errore {1000 * (duration - wall):+.0f} ms)")
+
+
+def bench_photos(args):
+    """Raffica di foto: tempo di blocco del chiamante e throughput di salvataggio"""
+    from PhotoWriter import PhotoWriter
+
+    source = SyntheticSource(resolution=(args.width, args.height), fps=args.fps)
+    source.start()
+    frames = [source.render(i) for i in range(args.frames)]
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = PhotoWriter(max_pending=len(frames))
+        writer.start()
+        start = time.perf_counter()
+        for i, frame in enumerate(frames):
+            writer.submit(frame, os.path.join(tmp, f"burst_{i:03d}.jpg"))
+        writer.stop(wait=True)
+        elapsed = time.perf_counter() - start
+        stats = writer.get_stats()
+    print(f"{stats['saved']} foto {args.width}x{args.height} con {writer.workers} worker")
+    print(f"Throughput sostenuto: {stats['saved'] / elapsed:.1f} foto/s")
+    print(f"Encoding medio per foto: {stats['avg_encode_ms']:.1f} ms")
+    print(f"Blocco del chiamante (thread GUI): medio {stats['avg_submit_ms']:.3f} ms, "
+          f"max {stats['max_submit_ms']:.3f} ms")
+
+
+def bench_thumbnails(args):
+    """Tempo alla prima miniatura e a tutte, a cache fredda e a cache calda"""
+    import cv2
+    from PyQt6.QtCore import QCoreApplication, QEventLoop, QTimer
+    from ThumbnailService import ThumbnailService
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)  # noqa: F841
+    source = SyntheticSource(resolution=(args.width, args.height), fps=args.fps)
+    source.start()
+    with tempfile.TemporaryDirectory() as tmp:
+        photo_dir = os.path.join(tmp, "photos")
+        os.makedirs(photo_dir)
+        for i in range(args.frames):
+            cv2.imwrite(os.path.join(photo_dir, f"photo_{i:05d}.jpg"), source.render(i))
+        paths = sorted(os.path.join(photo_dir, f) for f in os.listdir(photo_dir))
+        cache_dir = os.path.join(tmp, "cache")
+
+        for label in ("cache fredda", "cache calda"):
+            # Un nuovo servizio per ogni giro: la cache in memoria parte vuota
+            service = ThumbnailService(cache_dir=cache_dir)
+            loop = QEventLoop()
+            arrivals = []
+            start = time.perf_counter()
+
+            def on_ready(path, image):
+                arrivals.append(time.perf_counter() - start)
+                if len(arrivals) == len(paths):
+                    loop.quit()
+
+            service.thumbnail_ready.connect(on_ready)
+            for path in paths:
+                service.request(path)
+            request_time = time.perf_counter() - start
+            QTimer.singleShot(120000, loop.quit)
+            loop.exec()
+            print(f"{label}: {len(arrivals)} miniature, richieste in {1000 * request_time:.1f} ms, "
+                  f"prima dopo {1000 * arrivals[0]:.1f} ms, tutte dopo {1000 * arrivals[-1]:.0f} ms")
+
+
+def bench_viewer(args):
+    """Latenza di navigazione del visualizzatore su una raffica di foto, avanti e indietro"""
+    import cv2
+    import statistics
+    from PyQt6.QtCore import QCoreApplication, QEventLoop, QSize, QTimer
+    from PyQt6.QtGui import QImage
+    from ImageViewerEngine import ImageViewerEngine
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)  # noqa: F841
+    source = SyntheticSource(resolution=(args.width, args.height), fps=args.fps)
+    source.start()
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(args.frames):
+            path = os.path.join(tmp, f"burst_{i:05d}.jpg")
+            cv2.imwrite(path, source.render(i))
+            paths.append(path)
+
+        # Riferimento: decodifica completa nel thread chiamante, come prima
+        start = time.perf_counter()
+        for path in paths[:20]:
+            QImage(path)
+        print(f"Decodifica completa sincrona: {1000 * (time.perf_counter() - start) / 20:.1f} ms/foto")
+
+        engine = ImageViewerEngine(paths, QSize(1280, 720))
+        engine.start()
+        loop = QEventLoop()
+        timer = QTimer()
+        timer.setSingleShot(True)
+        timer.timeout.connect(loop.quit)
+        waiting = {}
+        engine.image_ready.connect(lambda path, image: loop.quit() if path == waiting.get("path") else None)
+
+        def wait(ms, path=None):
+            waiting["path"] = path
+            timer.start(ms)
+            loop.exec()
+            timer.stop()
+            waiting["path"] = None
+
+        def navigate(order, dwell_ms):
+            latencies = []
+            for index in order:
+                start = time.perf_counter()
+                if engine.request(index) is None:
+                    wait(5000, paths[index])
+                latencies.append(1000 * (time.perf_counter() - start))
+                # Tempo in cui l'utente guarda la foto prima di passare alla successiva
+                wait(dwell_ms)
+            return latencies
+
+        for label, order in (("avanti", range(len(paths))),
+                             ("indietro", range(len(paths) - 1, -1, -1))):
+            latencies = sorted(navigate(order, 100))
+            p95 = latencies[int(0.95 * (len(latencies) - 1))]
+            print(f"{label}: mediana {statistics.median(latencies):.2f} ms, "
+                  f"p95 {p95:.2f} ms, max {latencies[-1]:.1f} ms")
+        engine.stop()
+        print(engine.get_stats())
+
+
+def bench_catalog(args):
+    """Elenco della galleria dal catalogo SQLite con --frames voci (es. 50000)"""
+    from MediaCatalog import MediaCatalog, UPSERT, COLUMNS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog = MediaCatalog(os.path.join(tmp, "media.db"))
+        photo_dir = os.path.join(tmp, "photos")
+        now = time.time()
+        rows = []
+        for i in range(args.frames):
+            record = {"path": os.path.join(photo_dir, f"photo_{i:06d}.jpg"), "type": "photo",
+                      "size": 200000, "width": args.width, "height": args.height, "duration": None,
+                      "frame_count": None, "device_type": "pc", "capture_mode": "foto",
+                      "captured_at": now - i, "modified_at": now - i, "indexed_at": now}
+            rows.append(tuple(record[c] for c in COLUMNS))
+        start = time.perf_counter()
+        with catalog.lock, catalog.connection:
+            catalog.connection.executemany(UPSERT, rows)
+        print(f"Inserimento di {len(rows)} voci: {time.perf_counter() - start:.2f} s")
+
+        start = time.perf_counter()
+        entries = catalog.entries([photo_dir])
+        print(f"Elenco completo: {len(entries)} voci in {1000 * (time.perf_counter() - start):.1f} ms")
+
+        start = time.perf_counter()
+        last_hour = catalog.query(start=now - 3600)
+        print(f"Ultima ora: {len(last_hour)} voci in {1000 * (time.perf_counter() - start):.2f} ms")
+        catalog.close()
+
+
+def bench_processing(args):
+    """Scalabilità dell'elaborazione: CameraThread (1 thread) e FrameProcessPool da 1 a --workers processi"""
+    from CVProcessor import CVProcessor, MODE_MODELS
+    from FrameProcessPool import FrameProcessPool
+
+    source = SyntheticSource(resolution=(args.width, args.height), fps=args.fps)
+    source.start()
+    clip = [source.render(i) for i in range(args.frames)]
+    params = {"resolution": (args.width, args.height), "fps": args.fps}
+    print(f"Modalità: {args.mode}, {args.frames} frame {args.width}x{args.height}")
+
+    # Riferimento: elaborazione nel thread, come CameraThread senza pool
+    models = MODE_MODELS.get(args.mode, ())
+    processor = CVProcessor()
+    for name in models:
+        processor.registry.preload(name)
+    processor.process_frame(clip[0], args.mode, **params)
+    start = time.perf_counter()
+    for frame in clip:
+        processor.process_frame(frame, args.mode, **params)
+    baseline = args.frames / (time.perf_counter() - start)
+    print(f"{'esecuzione':<14}{'FPS':>10}{'speedup':>10}")
+    print(f"{'thread':<14}{baseline:>10.1f}{1.0:>10.2f}")
+
+    for workers in range(1, args.workers + 1):
+        pool = FrameProcessPool(workers=workers, max_resolution=(args.width, args.height),
+                                preload=models)
+        pool.start()
+        # Riscaldamento: avvio dei processi e caricamento dei modelli esclusi dalla misura
+        for frame in clip[:2 * workers]:
+            pool.submit(frame, 0.0, args.mode, **params)
+        pool.wait_idle(timeout=60)
+
+        start = time.perf_counter()
+        received, order_ok, last = 0, True, -1.0
+        for i, frame in enumerate(clip):
+            # A differenza della fotocamera, qui nessun frame viene scartato
+            while pool.submit(frame, float(i), args.mode, **params) is None:
+                for timestamp, _ in pool.collect(timeout=0.01):
+                    order_ok &= timestamp > last
+                    last = timestamp
+                    received += 1
+        for timestamp, _ in pool.wait_idle(timeout=60):
+            order_ok &= timestamp > last
+            last = timestamp
+            received += 1
+        fps = received / (time.perf_counter() - start)
+        pool.stop()
+        order = "" if order_ok and received == args.frames else "  (ordine o conteggio errati!)"
+        print(f"{f'{workers} processi':<14}{fps:>10.1f}{fps / baseline:>10.2f}{order}")
+
+
+def bench_tiles(args):
+    """Fasi per pixel a bande (TiledExecutor) contro un solo thread: tempo e uguaglianza bit per bit"""
+    import numpy as np
+    from CameraManager import CameraManager
+    from CVProcessor import CVProcessor
+    from FrameContext import FrameContext
+    from TiledExecutor import tiled_executor
+
+    source = SyntheticSource(resolution=(args.width, args.height), fps=args.fps)
+    source.start()
+    clip = [source.render(i) for i in range(min(args.frames, 30))]
+    camera_manager = CameraManager()
+    processor = CVProcessor()
+    stages = [
+        ("apply_controls", lambda f: camera_manager.apply_controls(f, 20, 15, 30)),
+        ("segment_by_color", lambda f: processor.segment_by_color(f, 20, 140, 40, 255, 40, 255)),
+        ("gaussian_blur 15", lambda f: FrameContext(f).blurred(15)),
+        ("gaussian_blur 51", lambda f: FrameContext(f).blurred(51)),
+    ]
+    bands = os.cpu_count() or 1
+    print(f"{len(clip)} frame {args.width}x{args.height}, {bands} bande")
+    print(f"{'fase':<20}{'1 banda ms':>12}{'bande ms':>12}{'speedup':>10}{'identico':>10}")
+    for label, stage in stages:
+        timings, outputs = {}, {}
+        for count in (1, bands):
+            tiled_executor.set_bands(count)
+            stage(clip[0])
+            start = time.perf_counter()
+            outputs[count] = [stage(frame) for frame in clip]
+            timings[count] = 1000 * (time.perf_counter() - start) / len(clip)
+        identical = all(np.array_equal(a, b) for a, b in zip(outputs[1], outputs[bands]))
+        print(f"{label:<20}{timings[1]:>12.2f}{timings[bands]:>12.2f}"
+              f"{timings[1] / timings[bands]:>10.2f}{'sì' if identical else 'NO':>10}")
+
+
+def bench_context(args):
+    """Più analisi sullo stesso frame: un FrameContext condiviso contro uno per fase"""
+    from CVProcessor import CVProcessor
+    from FrameContext import FrameContext
+
+    source = SyntheticSource(resolution=(args.width, args.height), fps=args.fps)
+    source.start()
+    clip = [source.render(i) for i in range(args.frames)]
+    processor = CVProcessor()
+
+    stages = [
+        processor.detect_edges,
+        processor.detect_motion,
+        lambda frame, context: processor.segment_by_color(frame, 20, 140, 40, 255, 40, 255, context),
+        processor.detect_objects_yolo,
+    ]
+
+    print(f"{args.frames} frame {args.width}x{args.height}: contorni, movimento, colore, YOLO")
+    for label, shared in (("un contesto per fase", False), ("contesto condiviso", True)):
+        hits = misses = 0
+        start = time.perf_counter()
+        for frame in clip:
+            contexts = [FrameContext(frame)] if shared else [FrameContext(frame) for _ in stages]
+            for i, stage in enumerate(stages):
+                stage(frame, contexts[0 if shared else i])
+            for context in contexts:
+                hits += context.hits
+                misses += context.misses
+                context.release()
+        elapsed = 1000 * (time.perf_counter() - start) / len(clip)
+        print(f"{label:<22}{elapsed:>8.2f} ms/frame  {misses} calcoli, {hits} riusi")
+
+
+def bench_pipeline(args):
+    """Cattura → regolazioni → analisi → uscita: in sequenza e a pipeline, con l'utilizzo di ogni fase"""
+    import cv2
+    from CameraManager import CameraManager
+    from CVProcessor import CVProcessor
+    from FramePipeline import FramePipeline
+
+    source = SyntheticSource(resolution=(args.width, args.height), fps=args.fps)
+    source.start()
+    clip = [source.render(i) for i in range(min(args.frames, 60))]
+    camera_manager = CameraManager()
+    processor = CVProcessor()
+    params = {"resolution": (args.width, args.height), "fps": args.fps}
+
+    def adjust(frame):
+        return camera_manager.apply_controls(frame, 10, 10, 20)
+
+    def analyse(frame):
+        return processor.process_frame(frame, args.mode, **params)
+
+    output_count = [0]
+
+    def output(frame):
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        output_count[0] += 1
+
+    print(f"Modalità: {args.mode}, {args.width}x{args.height}, {args.seconds:.0f}s per misura")
+    start = time.perf_counter()
+    frames = 0
+    while time.perf_counter() - start < args.seconds:
+        output(analyse(adjust(clip[frames % len(clip)])))
+        frames += 1
+    print(f"{'in sequenza':<14}{frames / (time.perf_counter() - start):>8.1f} FPS")
+
+    pipeline = FramePipeline([("regolazioni", adjust), ("analisi", analyse), ("uscita", output)])
+    counter = iter(range(1 << 62))
+    output_count[0] = 0
+    pipeline.start()
+    pipeline.get_stats()
+    start = time.perf_counter()
+    pipeline.run(lambda: clip[next(counter) % len(clip)],
+                 lambda: time.perf_counter() - start < args.seconds, drop_when_full=False)
+    elapsed = time.perf_counter() - start
+    stats = pipeline.get_stats()
+    print(f"{'a pipeline':<14}{output_count[0] / elapsed:>8.1f} FPS")
+    print(f"{'fase':<14}{'utilizzo':>10}{'bloccata':>10}{'in attesa':>10}{'scartati':>10}")
+    for name, stage in stats["stages"].items():
+        print(f"{name:<14}{stage['utilization']:>10.0%}{stage['blocked']:>10.0%}"
+              f"{stage['waiting']:>10.0%}{stage['dropped']:>10}")
+    print(f"Collo di bottiglia: {stats['bottleneck']}")
+
+
+def bench_playback(args):
+    """Frame mostrati al secondo a 2x/4x/8x: grab() contro salti tra keyframe, e la scelta del player"""
+    import cv2
+    from EncoderBackend import create_encoder
+    from VideoIndex import VideoIndex
+    from VideoPlayer import SPEEDS
+
+    source = SyntheticSource(resolution=(args.width, args.height), fps=args.fps)
+    source.start()
+    with tempfile.TemporaryDirectory() as tmp:
+        # Stesso encoder (e stesso GOP) delle registrazioni dell'app
+        path = os.path.join(tmp, "playback.mp4")
+        encoder = create_encoder("pc")
+        if not encoder.open(path, args.width, args.height, args.fps):
+            print("Impossibile aprire l'encoder")
+            return
+        for i in range(args.frames):
+            encoder.write(source.render(i))
+        encoder.release()
+        index = VideoIndex.build(path)
+        if not index.keyframes:
+            print("Keyframe non disponibili (PyAV assente): il player usa solo grab()")
+        print(f"Clip: {args.frames} frame, {len(index.keyframes)} keyframe, "
+              f"GOP {index.gop_seconds * args.fps:.0f} frame")
+
+        def keyframe_step(cap, position, skip):
+            keyframe = index.keyframe_before(position + skip / args.fps)
+            if keyframe is None or keyframe <= position:
+                keyframe = index.keyframe_after(position + skip / args.fps)
+            if keyframe is None:
+                return False
+            cap.set(cv2.CAP_PROP_POS_MSEC, keyframe * 1000)
+            return cap.grab()
+
+        def measure(speed, strategy):
+            cap = cv2.VideoCapture(path)
+            shown = 0
+            start = time.perf_counter()
+            while time.perf_counter() - start < args.seconds:
+                position = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                keyframe = index.keyframe_jump(position, speed - 1, args.fps)
+                if strategy == "keyframe" or (strategy == "player" and keyframe is not None):
+                    ok = keyframe_step(cap, position, speed - 1)
+                else:
+                    ok = all(cap.grab() for _ in range(speed))
+                if not ok:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+                cap.retrieve()
+                shown += 1
+            cap.release()
+            return shown / (time.perf_counter() - start)
+
+        strategies = ["grab", "player"] + (["keyframe"] if index.keyframes else [])
+        print(f"{'velocità':<10}" + "".join(f"{name:>12}" for name in strategies) + "  (frame mostrati/s)")
+        for speed in SPEEDS[1:]:
+            print(f"{speed}x{'':<8}" + "".join(f"{measure(speed, name):>12.1f}" for name in strategies))
+
+
+def bench_power(args):
+    """CPU media e FPS del ciclo di cattura: piena velocità, risparmio energetico, camera senza frame"""
+    import threading
+    from CaptureEngine import CaptureEngine
+    from CVProcessor import CVProcessor
+    from PowerPolicy import PowerPolicy
+
+    class BenchSource(SyntheticSource):
+        def apply_controls(self, frame, brightness, contrast, saturation):
+            return frame
+
+    cases = [
+        ("piena velocità", dict(static=False), None),
+        ("risparmio", dict(static=True), PowerPolicy(idle_seconds=0)),
+        ("camera senza frame", dict(num_frames=0), None),
+    ]
+    processor = CVProcessor()
+    print(f"Modalità: {args.mode}, {args.width}x{args.height} a {args.fps} FPS, {args.seconds:.0f}s per misura")
+    print(f"{'caso':<22}{'CPU':>8}{'FPS':>8}")
+    for label, source_options, policy in cases:
+        source = BenchSource(resolution=(args.width, args.height), fps=args.fps, paced=True,
+                             **source_options)
+        engine = CaptureEngine(source, processor)
+        engine.set_mode(args.mode)
+        engine.set_power_policy(policy)
+        if policy is not None:
+            policy.set_window_visible(False)
+        published = [0]
+        engine.connect("frame", lambda frame, timestamp: published.__setitem__(0, published[0] + 1))
+
+        def stop():
+            engine.running = False
+            engine.wake_event.set()
+
+        timer = threading.Timer(args.seconds, stop)
+        cpu_start, start = cpu_times(), time.perf_counter()
+        timer.start()
+        engine.run()   # Il ciclo di cattura gira nel thread del benchmark
+        elapsed = time.perf_counter() - start
+        cpu = (cpu_times() - cpu_start) / elapsed
+        source.stop()
+        print(f"{label:<22}{cpu:>8.0%}{published[0] / elapsed:>8.1f}")
+
+
+def bench_startup(args):
+    """Tempo di import e memoria (RSS massimo) dell'avvio headless rispetto a quello con interfaccia"""
+    import subprocess
+
+    probe = ("import resource, time; start = time.perf_counter(); import {module}; "
+             "print(time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)")
+    print(f"{'avvio':<16}{'import':>10}{'RSS max':>12}")
+    for label, module in (("headless", "HeadlessApp"), ("interfaccia", "MainWindow")):
+        result = subprocess.run([sys.executable, "-c", probe.format(module=module)],
+                                capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        if result.returncode != 0:
+            print(f"{label:<16}{'errore':>10}  {result.stderr.strip().splitlines()[-1]}")
+            continue
+        seconds, rss_kb = result.stdout.split()
+        print(f"{label:<16}{float(seconds) * 1000:>8.0f} ms{int(rss_kb) / 1024:>9.0f} MB")
+
+
+def bench_stream(args):
+    """Streaming MJPEG: codifiche per frame senza client e con --clients client locali (più uno lento)"""
+    import threading
+    import http.client
+    from StreamServer import StreamServer
+
+    source = SyntheticSource(resolution=(args.width, args.height), fps=args.fps, paced=True)
+    source.start()
+    server = StreamServer(host="127.0.0.1", port=0, qualities=(50, 80), max_fps=args.fps)
+    if not server.start():
+        return 1
+    running = threading.Event()
+    running.set()
+
+    def feed():
+        while running.is_set():
+            server.publish(source.get_frame())
+
+    def watch(quality, delay, received):
+        """Client MJPEG: legge i frame per --seconds secondi, con un'attesa opzionale tra uno e l'altro"""
+        connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=10)
+        connection.request("GET", f"/stream?quality={quality}")
+        response = connection.getresponse()   # Tenuta in vita: chiuderla chiuderebbe anche fp
+        stream = response.fp
+        deadline = time.monotonic() + args.seconds
+        while time.monotonic() < deadline:
+            line = stream.readline()
+            if not line:
+                break
+            if line.lower().startswith(b"content-length:"):
+                stream.readline()
+                jpeg = stream.read(int(line.split(b":")[1]))
+                if jpeg[:2] == b"\xff\xd8":
+                    received[0] += 1
+                time.sleep(delay)
+        connection.close()
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+
+    def measure(label, clients):
+        before = server.get_stats()
+        cpu_start, start = cpu_times(), time.perf_counter()
+        counters = [[0] for _ in clients]
+        threads = [threading.Thread(target=watch, args=(quality, delay, received))
+                   for (quality, delay), received in zip(clients, counters)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if not threads:
+            time.sleep(args.seconds)
+        elapsed = time.perf_counter() - start
+        cpu = (cpu_times() - cpu_start) / elapsed
+        stats = server.get_stats()
+        published = stats["published"] - before["published"]
+        encoded = stats["encoded"] - before["encoded"]
+        print(f"{label:<26}{cpu:>7.0%}{published:>10}{encoded:>10}")
+        for (quality, delay), received in zip(clients, counters):
+            kind = "lento" if delay else "normale"
+            print(f"    client {kind:<8} q={quality:<4}{received[0] / elapsed:>6.1f} FPS ricevuti")
+
+    print(f"{args.width}x{args.height} a {args.fps} FPS, {args.seconds:.0f}s per misura "
+          f"(la CPU include i client locali)")
+    print(f"{'caso':<26}{'CPU':>7}{'frame':>10}{'codifiche':>10}")
+    measure("nessun client", [])
+    clients = [(80, 0.0)] * max(1, args.clients - 1) + [(50, 0.0), (80, 0.5)]
+    measure(f"{len(clients)} client, 2 qualità", clients)
+
+    connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=10)
+    connection.request("GET", "/snapshot")
+    response = connection.getresponse()
+    snapshot = response.read()
+    print(f"/snapshot: {response.status}, {len(snapshot) / 1024:.0f} KB")
+    connection.close()
+
+    running.clear()
+    feeder.join()
+    server.stop()
+    source.stop()
+    stats = server.get_stats()
+    print(f"Frame saltati dai client (lenti o oltre max_fps): {stats['skipped']}")
+
+
+BENCHMARKS = {
+    "encoders": bench_encoders,
+    "segments": bench_segments,
+    "timing": bench_timing,
+    "photos": bench_photos,
+    "thumbnails": bench_thumbnails,
+    "viewer": bench_viewer,
+    "catalog": bench_catalog,
+    "processing": bench_processing,
+    "tiles": bench_tiles,
+    "context": bench_context,
+    "pipeline": bench_pipeline,
+    "playback": bench_playback,
+    "power": bench_power,
+    "startup": bench_startup,
+    "stream": bench_stream,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark di VisionPy Pro")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--retention-mb", type=int, default=0)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--mode", default="Rilevamento Contorni")
+    parser.add_argument("--clients", type=int, default=3)
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,28 +1,56 @@
 #!/usr/bin/env python3
 import sys
 import os
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import Qt
-from MainWindow import MainWindow
+import argparse
+
+# Il profiler parte per primo: misura anche l'import di PyQt6 e OpenCV
+from StartupProfiler import profiler
 
 def main():
+    parser = argparse.ArgumentParser(description="VisionPy Pro")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="stampa la durata di ogni fase dell'avvio")
+    parser.add_argument("--headless", action="store_true",
+                        help="esegue cattura ed elaborazione senza interfaccia (e senza Qt)")
+    parser.add_argument("--mode", default="Normale",
+                        help="modalità di elaborazione in headless (es. \"Rilevamento Volti\")")
+    parser.add_argument("--record", action="store_true",
+                        help="in headless registra lo stream elaborato fino all'arresto")
+    parser.add_argument("--seconds", type=float, default=0,
+                        help="in headless termina dopo questi secondi (0 = fino a SIGINT/SIGTERM)")
+    args, qt_args = parser.parse_known_args()
+    profiler.enabled = args.startup_profile
+    
     # Assicurati che le directory necessarie esistano
     os.makedirs(os.path.expanduser("~/VisionPy_Pro/photos"), exist_ok=True)
     os.makedirs(os.path.expanduser("~/VisionPy_Pro/videos"), exist_ok=True)
     
+    if args.headless:
+        # Nessun import di PyQt6: avvio più rapido e meno memoria, niente display
+        from HeadlessApp import HeadlessApp
+        profiler.mark("import dei moduli")
+        app = HeadlessApp(mode=args.mode, record=args.record, seconds=args.seconds)
+        sys.exit(app.run())
+    
+    from PyQt6.QtWidgets import QApplication
+    from MainWindow import MainWindow
+    profiler.mark("import dei moduli")
+    
     # Crea l'applicazione PyQt6
-    app = QApplication(sys.argv)
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setApplicationName("VisionPy Pro")
     
     # Imposta uno stile moderno per una migliore resa grafica
     app.setStyle("Fusion")
+    profiler.mark("QApplication creata")
     
     # Crea e mostra la finestra principale
     window = MainWindow()
     window.show()
+    profiler.mark("finestra mostrata")
     
     # Esegui il loop dell'applicazione
     sys.exit(app.exec())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -10,9 +10,9 @@ if [ ! -f "$MAIN_SCRIPT" ]; then
 fi
 
 echo -e "--- Avvio dell'applicazione ---"
-echo "Esecuzione di: $PYTHON_CMD $MAIN_SCRIPT"
+echo "Esecuzione di: $PYTHON_CMD $MAIN_SCRIPT $*"
 echo "------------------------------------"
 
- $PYTHON_CMD "$MAIN_SCRIPT"
+ $PYTHON_CMD "$MAIN_SCRIPT" "$@"
 
 echo -e "\n--- Applicazione terminata ---"